@@ -1,39 +1,61 @@
-import subprocess
 import uvicorn
 import os
 import logging
-from master_server.config import Environment
+import logging.config
+from master_server.config import Environment, get_server_workers, get_settings
+from master_server.database.migration import run_migrations
 
 
-def alembic_upgrade():
-    cmd = "alembic upgrade head"
-    subprocess.run(
-        cmd,
-        shell=True,
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True,
-    )
+def get_log_config() -> str:
+    """
+    Rich console logs in DEVELOPMENT, JSON logs written by a background thread otherwise
+    """
+    if os.getenv("ENVIRONMENT") == Environment.DEVELOPMENT.value:
+        return "./config.ini"
+    return "./config.production.ini"
 
 
-def run_server():
-    config = uvicorn.Config(
-        "master_server.server:app",
-        host="0.0.0.0",
-        port=1140,
-        log_config="./config.ini",
-        loop="uvloop",
-    )
+def alembic_upgrade():
+    logging.config.fileConfig(get_log_config(), disable_existing_loggers=False)
+    run_migrations()
+
+
+def get_server_options() -> dict:
+    """
+    Build uvicorn options for the current environment.
+
+    In DEVELOPMENT a single reloading worker is started. In PRODUCTION uvicorn's
+    supervisor runs SERVER_WORKERS processes (default: one per CPU core) on a shared
+    socket, restarts workers that exit after SERVER_LIMIT_MAX_REQUESTS requests and
+    restarts all workers gracefully on SIGHUP. Each worker's database pool is a share
+    of DB_MAX_CONNECTIONS.
+    """
+    settings = get_settings()
+
+    options = {
+        "app": "master_server.server:app",
+        "host": "0.0.0.0",
+        "port": 1140,
+        "log_config": get_log_config(),
+        "loop": "uvloop",
+    }
 
     if os.getenv("ENVIRONMENT") == Environment.DEVELOPMENT.value:
-        config.log_level = logging.DEBUG
-        config.reload = True
+        options["log_level"] = logging.DEBUG
+        options["reload"] = True
+        return options
 
-    server = uvicorn.Server(config)
-    server.run()
+    options["workers"] = get_server_workers(settings)
+    options["limit_max_requests"] = settings.SERVER_LIMIT_MAX_REQUESTS
+    options["timeout_graceful_shutdown"] = settings.SERVER_TIMEOUT_GRACEFUL_SHUTDOWN
+    return options
+
+
+def run_server():
+    uvicorn.run(**get_server_options())
 
 
 if __name__ == "__main__":
+    # Workers import the app only, so migrations run once in the supervisor process
     alembic_upgrade()
     run_server()
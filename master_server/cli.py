@@ -0,0 +1,82 @@
+import sys
+import asyncio
+import argparse
+from contextlib import nullcontext
+from pydantic_core import to_json
+from .database.config import async_session
+from .database.user.service import UserService
+from .utils.bulk import iter_csv, iter_file_chunks, iter_ndjson
+
+
+async def import_users(path: str, format: str, batch_size: int) -> int:
+    parser = iter_csv if format == "csv" else iter_ndjson
+
+    with await asyncio.to_thread(open, path, "rb") as file:
+        async with async_session() as db_session:
+            result = await UserService(db_session=db_session).bulk_add_users(
+                parser(iter_file_chunks(file)), batch_size=batch_size
+            )
+
+    for reject in result.rejected:
+        print(reject.model_dump_json(), file=sys.stderr)
+    print(f"Inserted {result.inserted} users, rejected {len(result.rejected)} rows")
+    return 0
+
+
+async def export_users(path: str, batch_size: int) -> int:
+    output = (
+        nullcontext(sys.stdout.buffer)
+        if path == "-"
+        else await asyncio.to_thread(open, path, "wb")
+    )
+
+    with output as file:
+        lines = []
+        async with async_session() as db_session:
+            async for user in UserService(db_session=db_session).stream_users(
+                batch_size=batch_size
+            ):
+                lines.append(to_json(user) + b"\n")
+                # Written a page at a time, off the event loop
+                if len(lines) >= batch_size:
+                    await asyncio.to_thread(file.writelines, lines)
+                    lines = []
+
+        await asyncio.to_thread(file.writelines, lines)
+
+    return 0
+
+
+def main(argv=None) -> int:
+    """
+    Bulk user import and export.
+
+    Examples:
+
+        python -m master_server.cli import-users users.csv --format csv
+
+        python -m master_server.cli export-users users.ndjson
+    """
+    parser = argparse.ArgumentParser(prog="python -m master_server.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import-users", help="Import users from a file")
+    import_parser.add_argument("path", help="NDJSON or CSV file with a header line")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"])
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+
+    export_parser = commands.add_parser("export-users", help="Export users as NDJSON")
+    export_parser.add_argument("path", nargs="?", default="-", help="Output file")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import-users":
+        format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        return asyncio.run(import_users(args.path, format, args.batch_size))
+
+    return asyncio.run(export_users(args.path, args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
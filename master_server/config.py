@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Optional
 from enum import Enum
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,8 +25,81 @@ class Settings(BaseSettings):
     # Optional settings
     ENVIRONMENT: str = Environment.PRODUCTION.value
     ORIGINS: list[str] = ["*"]
+    # Admin endpoints are disabled unless an admin API key is set
+    ADMIN_API_KEY: Optional[str] = None
+
+    # Request metrics served at /metrics, enabled by default outside production
+    METRICS_ENABLED: Optional[bool] = None
+
+    # Log requests exceeding the query budget, adds overhead to every query
+    QUERY_INSPECTOR_ENABLED: bool = False
+    QUERY_BUDGET_MAX_QUERIES: int = 20
+    QUERY_BUDGET_MAX_DB_SECONDS: float = 0.5
+
+    # Production server settings, SERVER_WORKERS defaults to one worker per CPU core.
+    # Every worker takes a share of DB_MAX_CONNECTIONS, raise it with the core count
+    SERVER_WORKERS: Optional[int] = None
+    SERVER_LIMIT_MAX_REQUESTS: Optional[int] = None
+    SERVER_TIMEOUT_GRACEFUL_SHUTDOWN: Optional[int] = 30
+
+    # Database connection pool settings, only applied to PostgreSQL.
+    # DB_MAX_CONNECTIONS is the budget of all workers together, keep it below the
+    # server's max_connections. Unless set, DB_POOL_SIZE and DB_MAX_OVERFLOW of each
+    # worker are derived from it, see get_pool_limits.
+    DB_MAX_CONNECTIONS: int = 80
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Email outbox worker settings
+    EMAIL_WORKER_ENABLED: bool = True
+    EMAIL_WORKER_CONCURRENCY: int = 4
+    EMAIL_WORKER_BATCH_SIZE: int = 100
+    EMAIL_WORKER_MAX_ATTEMPTS: int = 5
+    EMAIL_WORKER_BACKOFF_SECONDS: float = 2.0
+    EMAIL_WORKER_POLL_INTERVAL: float = 1.0
+    # Sent and failed emails are deleted by the login token purge job after this delay
+    EMAIL_OUTBOX_RETENTION_SECONDS: float = 86400.0
+
+    # Magic link login token settings, expired and used tokens are purged periodically
+    LOGIN_TOKEN_TTL_SECONDS: float = 900.0
+    LOGIN_TOKEN_PURGE_ENABLED: bool = True
+    LOGIN_TOKEN_PURGE_INTERVAL: float = 300.0
+    LOGIN_TOKEN_PURGE_BATCH_SIZE: int = 1000
+
+    # Authenticated user cache settings. The cache is per worker, changes made by
+    # other workers, such as bans, are seen after at most USER_CACHE_TTL_SECONDS.
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # JWT settings, JWT_BACKEND is either "jose" or "pyjwt"
+    JWT_BACKEND: str = "jose"
+    JWT_CACHE_MAX_SIZE: int = 10000
+
+    # Websocket pub/sub settings, PUBSUB_BACKEND is either "memory" or "postgres".
+    # Use "postgres" to reach clients connected to other workers.
+    PUBSUB_BACKEND: str = "memory"
+    PUBSUB_FLUSH_INTERVAL: float = 0.01
+    PUBSUB_MAX_BATCH_SIZE: int = 100
+    # Broadcasts too large for a NOTIFY are stored this long for other workers to read
+    PUBSUB_PAYLOAD_RETENTION_SECONDS: float = 60.0
+    PUBSUB_RECONNECT_INTERVAL: float = 1.0
 
 
 @lru_cache
 def get_settings():
     return Settings()
+
+
+def get_server_workers(settings: Settings) -> int:
+    """
+    Number of server workers. DEVELOPMENT runs a single reloading worker, production
+    SERVER_WORKERS or one worker per CPU core.
+    """
+    if settings.ENVIRONMENT == Environment.DEVELOPMENT.value:
+        return 1
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
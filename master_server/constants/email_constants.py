@@ -0,0 +1,4 @@
+# Magic link email, MAGIC_LINK_KEY is substituted with the link per recipient
+MAGIC_LINK_KEY = "-link-"
+MAGIC_LINK_SUBJECT = "Your Magic Link Login"
+MAGIC_LINK_HTML_CONTENT = f"Click <a href='{MAGIC_LINK_KEY}'>here</a> to log in."
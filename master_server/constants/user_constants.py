@@ -0,0 +1,41 @@
+# Unique indexes on the user table, matched against database error messages.
+# sqlite reports unique column violations as "<table>.<column>".
+USERNAME_UNIQUE_CONSTRAINTS = ("ix_user_username_lower", "user.username")
+EMAIL_UNIQUE_CONSTRAINTS = ("ix_user_email", "user.email")
+
+# Fields accepted by the bulk user import, other fields use the model defaults
+BULK_IMPORT_FIELDS = (
+    "email",
+    "username",
+    "first_name",
+    "last_name",
+    "date_of_birth",
+    "address",
+    "phone",
+    "role",
+    "balance",
+    "is_verified",
+    "created_with_ip",
+)
+
+# Bind parameters allowed in a single statement by asyncpg, bulk inserts send one per
+# column of every row
+MAX_BIND_PARAMETERS = 32767
+
+# Secrets left out of the bulk user export
+USER_EXPORT_EXCLUDE = {"token", "api_key"}
+
+# Gravatar avatars, hashes of this many distinct emails are kept in memory
+GRAVATAR_BASE_URL = "https://www.gravatar.com/avatar/"
+GRAVATAR_HASH_CACHE_SIZE = 10000
+
+# Profile fields a user must provide before using endpoints requiring an active user
+USER_PROFILE_FIELDS = (
+    "username",
+    "first_name",
+    "last_name",
+    "date_of_birth",
+    "address",
+    "phone",
+    "api_key",
+)
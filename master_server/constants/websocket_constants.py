@@ -0,0 +1,9 @@
+# Binary frame header: protocol version, frame type, sequence number, payload length
+FRAME_HEADER_FORMAT = "!BBII"
+FRAME_PROTOCOL_VERSION = 1
+# Largest payload accepted in a single frame
+MAX_FRAME_PAYLOAD_BYTES = 1024 * 1024
+
+# Received websocket messages buffered ahead of processing, the socket is not read
+# while the buffer is full
+MAX_BUFFERED_MESSAGES = 64
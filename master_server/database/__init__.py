@@ -1 +1,5 @@
 from .user.model import User
+from .email.model import EmailOutbox
+from .wallet.model import BalanceLedger
+from .login_token.model import LoginToken
+from .pubsub.model import PubSubPayload
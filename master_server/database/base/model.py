@@ -1,9 +1,147 @@
 from datetime import datetime
-from typing import Any, Optional
+from functools import cache, lru_cache
+from typing import Any, Optional, Union
+from pydantic import (
+    BaseModel,
+    TypeAdapter,
+    ValidationError,
+    create_model,
+    field_validator,
+)
+from pydantic_core import ErrorDetails
 from sqlmodel import SQLModel, Field
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy import event
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy import event, inspect
+from ..unit_of_work import write_scope
+
+
+def get_field_validators(
+    model: type[SQLModel], names: Optional[frozenset[str]] = None
+) -> dict:
+    """
+    Copy the field validators of model, for the given fields or all of them.
+    """
+    validators = {}
+    for name, decorator in model.__pydantic_decorators__.field_validators.items():
+        fields = [
+            field for field in decorator.info.fields if names is None or field in names
+        ]
+        if fields:
+            validators[name] = field_validator(*fields, mode=decorator.info.mode)(
+                getattr(decorator.func, "__func__", decorator.func)
+            )
+    return validators
+
+
+@lru_cache(maxsize=256)
+def get_fields_validator(
+    model: type[SQLModel], names: frozenset[str]
+) -> type[BaseModel]:
+    """
+    Build a model with only the given fields of model, with their types, constraints and
+    field validators.
+    """
+    fields = {
+        name: (field.annotation, field)
+        for name, field in model.model_fields.items()
+        if name in names
+    }
+    return create_model(
+        model.__name__, __validators__=get_field_validators(model, names), **fields
+    )
+
+
+@cache
+def get_rows_validator(model: type[SQLModel]) -> TypeAdapter:
+    """
+    Build an adapter validating lists of rows with the fields, defaults and field
+    validators of model, without creating model instances.
+    """
+    fields = {
+        name: (field.annotation, field) for name, field in model.model_fields.items()
+    }
+    row_model = create_model(
+        model.__name__, __validators__=get_field_validators(model), **fields
+    )
+    return TypeAdapter(list[row_model])
+
+
+def validate_fields(
+    model: type[SQLModel], values: dict, instance: Optional[SQLModel] = None
+):
+    """
+    Validate some fields of model, without validating the others.
+
+    Model validators may read any field, so models having them are validated in full,
+    with values applied over instance.
+
+    Parameters:
+
+        model (type[SQLModel]): Model defining the fields.
+
+        values (dict): Values of the fields to validate.
+
+        instance (Optional[SQLModel]): Current values, for models with model validators.
+
+    Raises:
+
+        ValidationError: When a value is invalid.
+    """
+    if not values:
+        return
+
+    if model.__pydantic_decorators__.model_validators:
+        current = instance.model_dump() if instance is not None else {}
+        model.model_validate({**current, **values})
+        return
+
+    get_fields_validator(model, frozenset(values)).model_validate(values)
+
+
+def validate_rows(
+    model: type[SQLModel], rows: list[dict], exclude: Optional[set[str]] = None
+) -> list[Union[dict, list[ErrorDetails]]]:
+    """
+    Validate many candidate rows of model at once, e.g. for imports.
+
+    All rows are validated in a single call, and once more without the invalid rows
+    when some of them fail.
+
+    Parameters:
+
+        model (type[SQLModel]): Model defining the fields.
+
+        rows (list[dict]): Field values of every row.
+
+        exclude (Optional[set[str]]): Fields left out of the validated values.
+
+    Returns:
+
+        list[Union[dict, list[ErrorDetails]]]: For every row, its validated values with
+        defaults applied, or its validation errors.
+    """
+    adapter = get_rows_validator(model)
+    try:
+        return [
+            row.model_dump(exclude=exclude) for row in adapter.validate_python(rows)
+        ]
+    except ValidationError as e:
+        errors: dict[int, list[ErrorDetails]] = {}
+        for error in e.errors():
+            index, *location = error["loc"]
+            errors.setdefault(index, []).append({**error, "loc": tuple(location)})
+
+    valid_rows = iter(
+        adapter.validate_python(
+            [row for index, row in enumerate(rows) if index not in errors]
+        )
+    )
+    return [
+        errors[index]
+        if index in errors
+        else next(valid_rows).model_dump(exclude=exclude)
+        for index in range(len(rows))
+    ]
 
 
 class Base(SQLModel):
@@ -14,42 +152,42 @@ class Base(SQLModel):
         super().__init_subclass__(**kwargs)
         cls.__tablename__ = cls.__name__.lower()
 
+    def changed_fields(self) -> dict:
+        """
+        Return the fields changed since the instance was loaded, or all fields set on
+        creation for a new instance.
+        """
+        state = inspect(self)
+        if not state.has_identity:
+            return {name: getattr(self, name) for name in self.model_fields_set}
+
+        return {
+            attr.key: attr.value
+            for attr in state.attrs
+            if attr.key in type(self).model_fields and attr.history.has_changes()
+        }
+
     async def save(self, db_session: AsyncSession):
-        try:
-            self.model_validate(self.model_dump())  # Validate the current instance
+        validate_fields(type(self), self.changed_fields())
 
+        async with write_scope(db_session):
             db_session.add(self)
-            await db_session.commit()
-        except (SQLAlchemyError, IntegrityError) as ex:
-            await db_session.rollback()
-            raise ex
 
     async def delete(self, db_session: AsyncSession):
-        try:
+        async with write_scope(db_session):
             await db_session.delete(self)
-            await db_session.commit()
-        except SQLAlchemyError as ex:
-            await db_session.rollback()
-            raise ex
 
     async def update(self, db: AsyncSession, **kwargs):
-        try:
-            if not kwargs:
-                return True
+        if not kwargs:
+            return True
 
-            updated_instance = self.model_copy(update=kwargs)
-            updated_instance.model_validate(
-                updated_instance.model_dump()
-            )  # This triggers Pydantic validation
+        # Only the updated fields are validated
+        validate_fields(type(self), kwargs, self)
 
+        async with write_scope(db):
             for k, v in kwargs.items():
                 setattr(self, k, v)
 
-            await db.commit()
-        except SQLAlchemyError as ex:
-            await db.rollback()
-            raise ex
-
 
 class TimeStampMixin(SQLModel):
     created_at: datetime = Field(default_factory=datetime.now, nullable=False)
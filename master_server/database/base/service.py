@@ -1,4 +1,6 @@
 from typing import Optional
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
@@ -15,3 +17,11 @@ class BaseService:
 
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
+
+    def insert(self, model: type[SQLModel]):
+        """
+        Return an INSERT statement for the session's dialect, supporting ON CONFLICT.
+        """
+        if self.db_session.bind.dialect.name == "postgresql":
+            return postgresql.insert(model)
+        return sqlite.insert(model)
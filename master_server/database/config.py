@@ -1,17 +1,91 @@
-import os
 from collections.abc import AsyncGenerator
+from sqlalchemy.engine import make_url
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from ..config import get_settings
+from .pool import TimedAsyncQueuePool
+from .unit_of_work import unit_of_work
+from ..config import get_server_workers, get_settings, Settings
+
+
+def get_pool_limits(settings: Settings) -> tuple[int, int]:
+    """
+    Pool size and max overflow of each worker.
+
+    Each worker gets an equal share of DB_MAX_CONNECTIONS, minus its LISTEN connection
+    when broadcasts go through PostgreSQL. Two thirds of the share stay open and the
+    rest is overflow. The email worker and the login token purger borrow connections
+    from this pool, DB_POOL_SIZE and DB_MAX_OVERFLOW override the derived values.
+
+    Parameters:
+
+        settings (Settings): The application settings.
+
+    Returns:
+
+        tuple[int, int]: pool_size and max_overflow.
+    """
+    share = settings.DB_MAX_CONNECTIONS // get_server_workers(settings)
+    if settings.PUBSUB_BACKEND == "postgres":
+        share -= 1
+    share = max(share, 2)
+
+    pool_size = settings.DB_POOL_SIZE
+    if pool_size is None:
+        pool_size = share * 2 // 3
+
+    max_overflow = settings.DB_MAX_OVERFLOW
+    if max_overflow is None:
+        max_overflow = max(share - pool_size, 0)
+
+    return pool_size, max_overflow
+
+
+def get_engine_options(settings: Settings) -> dict:
+    """
+    Build create_async_engine keyword arguments from settings.
+
+    Pool settings only apply to PostgreSQL, other drivers keep their default pool.
+    """
+    options = {"future": True}
+
+    if make_url(settings.PG_DATABASE_URL).get_backend_name() != "postgresql":
+        return options
+
+    pool_size, max_overflow = get_pool_limits(settings)
+    options.update(
+        poolclass=TimedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    return options
+
 
 settings = get_settings()
 # Create SQLModel engine
-engine = create_async_engine(settings.PG_DATABASE_URL, future=True)
+engine = create_async_engine(settings.PG_DATABASE_URL, **get_engine_options(settings))
+
+# Process-wide session factory, shared by every request
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_session() -> AsyncGenerator:
-    async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
+    """
+    Request-scoped unit of work, with one transaction per request.
+
+    Base model writes flush instead of committing. The transaction is
+    committed once after the endpoint returns, and rolled back if it raises.
+    """
+    async with async_session() as session, unit_of_work(session):
+        yield session
+
+
+async def get_autocommit_session() -> AsyncGenerator:
+    """
+    Session for endpoints that need immediate commits, every Base model write commits.
+    """
     async with async_session() as session:
         yield session
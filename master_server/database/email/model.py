@@ -0,0 +1,51 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, Column, JSON
+from ..base.model import Base, TimeStampMixin
+from master_server.enums.email_enums import EmailStatusEnum
+
+
+class EmailOutbox(Base, TimeStampMixin, table=True):
+    """
+    Represents an email waiting to be delivered by the outbox worker.
+
+    Attributes:
+
+        recipient (str): The email address to deliver to.
+
+        subject (str): The email subject.
+
+        html_content (str): The email body, may contain substitution keys.
+
+        substitutions (Optional[dict]): Per recipient values for the keys in html_content.
+
+        status (EmailStatusEnum): Delivery status of the email.
+
+        attempts (int): Number of failed delivery attempts.
+
+        next_attempt_at (datetime): The email is not picked up by the worker before this time.
+
+        last_error (Optional[str]): Error of the last failed delivery attempt.
+
+        sent_at (Optional[datetime]): Delivery timestamp of the email.
+
+    """
+
+    recipient: str = Field(nullable=False)
+    subject: str = Field(nullable=False)
+    html_content: str = Field(nullable=False)
+    substitutions: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    status: EmailStatusEnum = Field(default=EmailStatusEnum.PENDING, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    sent_at: Optional[datetime] = Field(default=None)
+
+
+# The worker polls due emails by status and next_attempt_at
+Index(
+    "ix_emailoutbox_status_next_attempt_at",
+    EmailOutbox.status,
+    EmailOutbox.next_attempt_at,
+)
@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete
+from sqlmodel import select, col
+from .model import EmailOutbox
+from master_server.enums.email_enums import EmailStatusEnum
+from ..base.service import BaseService
+from ..unit_of_work import write_scope
+
+
+class EmailOutboxService(BaseService):
+    """
+    Email Outbox Service
+    """
+
+    def enqueue(
+        self,
+        recipient: str,
+        subject: str,
+        html_content: str,
+        substitutions: Optional[dict] = None,
+    ) -> EmailOutbox:
+        """
+        Add an email to the outbox without committing.
+
+        The email is written by the caller's next commit, so it is only delivered
+        when the surrounding transaction succeeds.
+
+        Parameters:
+
+            recipient (str): The email address to deliver to.
+
+            subject (str): The email subject.
+
+            html_content (str): The email body, may contain substitution keys.
+
+            substitutions (Optional[dict]): Values for the keys in html_content.
+
+        Returns:
+
+            EmailOutbox: The pending outbox row.
+        """
+        message = EmailOutbox(
+            recipient=recipient,
+            subject=subject,
+            html_content=html_content,
+            substitutions=substitutions,
+        )
+        self.db_session.add(message)
+        return message
+
+    async def claim_due(self, limit: int, lease_seconds: float) -> list[EmailOutbox]:
+        """
+        Claim due emails for delivery.
+
+        Claimed emails are marked as SENDING and hidden from other workers for
+        lease_seconds. If the worker dies before reporting a result, the email is
+        claimed again once the lease expires.
+
+        Parameters:
+
+            limit (int): Maximum number of emails to claim.
+
+            lease_seconds (float): How long the claim is valid.
+
+        Returns:
+
+            list[EmailOutbox]: The claimed emails.
+        """
+        now = datetime.now()
+        statement = (
+            select(EmailOutbox)
+            .where(
+                col(EmailOutbox.status).in_(
+                    [EmailStatusEnum.PENDING, EmailStatusEnum.SENDING]
+                ),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with write_scope(self.db_session):
+            result = await self.db_session.exec(statement)
+            messages = result.all()
+
+            for message in messages:
+                message.status = EmailStatusEnum.SENDING
+                message.next_attempt_at = now + timedelta(seconds=lease_seconds)
+
+        return list(messages)
+
+    async def mark_sent(self, messages: list[EmailOutbox]):
+        """
+        Mark emails as delivered, dropping their substitutions.
+
+        Substitutions may hold secrets like magic links, they are not kept once
+        they can no longer be delivered.
+
+        Parameters:
+
+            messages (list[EmailOutbox]): Delivered emails.
+        """
+        now = datetime.now()
+        async with write_scope(self.db_session):
+            for message in messages:
+                message.status = EmailStatusEnum.SENT
+                message.sent_at = now
+                message.last_error = None
+                message.substitutions = None
+
+    async def mark_failed(
+        self,
+        messages: list[EmailOutbox],
+        error: str,
+        max_attempts: int,
+        backoff_seconds: float,
+    ):
+        """
+        Record a failed delivery and schedule a retry with exponential backoff.
+
+        Substitutions of emails marked as FAILED are dropped like in mark_sent.
+
+        Parameters:
+
+            messages (list[EmailOutbox]): Emails that failed to deliver.
+
+            error (str): The delivery error.
+
+            max_attempts (int): Emails are marked as FAILED after this many attempts.
+
+            backoff_seconds (float): Delay before the first retry, doubled on each attempt.
+        """
+        now = datetime.now()
+        async with write_scope(self.db_session):
+            for message in messages:
+                message.attempts += 1
+                message.last_error = error
+
+                if message.attempts >= max_attempts:
+                    message.status = EmailStatusEnum.FAILED
+                    message.substitutions = None
+                else:
+                    message.status = EmailStatusEnum.PENDING
+                    message.next_attempt_at = now + timedelta(
+                        seconds=backoff_seconds * 2 ** (message.attempts - 1)
+                    )
+
+    async def purge(self, older_than: datetime, batch_size: int = 1000) -> int:
+        """
+        Delete sent and failed emails, writing every batch on its own.
+
+        Parameters:
+
+            older_than (datetime): Only emails last updated before this time are deleted.
+
+            batch_size (int): Maximum number of emails deleted per statement.
+
+        Returns:
+
+            int: Number of deleted emails.
+        """
+        deleted = 0
+        while True:
+            batch = (
+                select(EmailOutbox.id)
+                .where(
+                    col(EmailOutbox.status).in_(
+                        [EmailStatusEnum.SENT, EmailStatusEnum.FAILED]
+                    ),
+                    EmailOutbox.updated_at < older_than,
+                )
+                .limit(batch_size)
+            )
+            async with write_scope(self.db_session):
+                result = await self.db_session.exec(
+                    delete(EmailOutbox)
+                    .where(EmailOutbox.id.in_(batch.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
@@ -0,0 +1,29 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field
+from ..base.model import Base
+
+
+class LoginToken(Base, table=True):
+    """
+    Single-use magic link token. Only the hash of the token is stored.
+
+    Attributes:
+
+        token_hash (str): SHA-256 hex digest of the token.
+
+        user_id (int): The user logging in with the token.
+
+        issued_at (datetime): When the token was issued.
+
+        expires_at (datetime): The token can not be used after this time.
+
+        used_at (Optional[datetime]): When the token was used, a token can only be used once.
+
+    """
+
+    token_hash: str = Field(index=True, unique=True, nullable=False)
+    user_id: int = Field(foreign_key="user.id", index=True, nullable=False)
+    issued_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    expires_at: datetime = Field(index=True, nullable=False)
+    used_at: Optional[datetime] = Field(default=None)
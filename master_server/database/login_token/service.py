@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, or_, update
+from sqlmodel import select
+from .model import LoginToken
+from master_server.utils.auth import hash_login_token
+from ..base.service import BaseService
+from ..unit_of_work import write_scope
+
+
+class LoginTokenService(BaseService):
+    """
+    Login Token Service
+
+    Tokens are looked up by their hash, so a leaked table can not be used to log in.
+    """
+
+    def issue(self, user_id: int, token: str, ttl_seconds: float) -> LoginToken:
+        """
+        Add a login token without committing.
+
+        The token is written by the caller's next commit, together with the magic
+        link email sending it.
+
+        Parameters:
+
+            user_id (int): The user logging in with the token.
+
+            token (str): The plaintext token sent to the user.
+
+            ttl_seconds (float): How long the token can be used.
+
+        Returns:
+
+            LoginToken: The pending token row.
+        """
+        now = datetime.now()
+        login_token = LoginToken(
+            token_hash=hash_login_token(token),
+            user_id=user_id,
+            issued_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+        )
+        self.db_session.add(login_token)
+        return login_token
+
+    async def consume(self, token: str) -> Optional[int]:
+        """
+        Use a login token, in a single conditional UPDATE. The caller commits.
+
+        Parameters:
+
+            token (str): The plaintext token from the magic link.
+
+        Returns:
+
+            Optional[int]: Id of the token's user, None when the token is unknown,
+            expired or already used.
+        """
+        now = datetime.now()
+        statement = (
+            update(LoginToken)
+            .where(
+                LoginToken.token_hash == hash_login_token(token),
+                LoginToken.expires_at > now,
+                LoginToken.used_at.is_(None),
+            )
+            .values(used_at=now)
+            .returning(LoginToken.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db_session.exec(statement)
+        return result.scalar_one_or_none()
+
+    async def purge(self, batch_size: int = 1000) -> int:
+        """
+        Delete expired and used tokens, writing every batch on its own.
+
+        Parameters:
+
+            batch_size (int): Maximum number of tokens deleted per statement.
+
+        Returns:
+
+            int: Number of deleted tokens.
+        """
+        now = datetime.now()
+        deleted = 0
+        while True:
+            batch = (
+                select(LoginToken.id)
+                .where(
+                    or_(LoginToken.expires_at <= now, LoginToken.used_at.is_not(None))
+                )
+                .limit(batch_size)
+            )
+            async with write_scope(self.db_session):
+                result = await self.db_session.exec(
+                    delete(LoginToken)
+                    .where(LoginToken.id.in_(batch.scalar_subquery()))
+                    .execution_options(synchronize_session=False)
+                )
+
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
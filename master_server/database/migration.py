@@ -0,0 +1,108 @@
+import asyncio
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import Connection, pool
+from sqlalchemy.ext.asyncio import create_async_engine
+from ..config import get_settings
+from ..utils.logging import AppLogger, ElapsedTimeLogger
+
+logger = AppLogger().get_logger()
+
+ALEMBIC_CONFIG_PATH = "alembic.ini"
+
+# Key of the Postgres advisory lock held while migrating, shared by all replicas
+MIGRATION_LOCK_KEY = 7408153316
+
+
+def get_alembic_config(path: str = ALEMBIC_CONFIG_PATH) -> Config:
+    config = Config(path)
+    # The application configures logging, env.py must not override it
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def get_current_heads(connection: Connection) -> set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def upgrade_connection(
+    connection: Connection, config: Config, head_revisions: set[str]
+) -> bool:
+    """
+    Upgrade the database on the given connection while holding the migration lock.
+
+    Returns:
+
+        bool: True if migrations were applied, False if another replica already did.
+    """
+    is_postgres = connection.dialect.name == "postgresql"
+
+    if is_postgres:
+        connection.exec_driver_sql(f"SELECT pg_advisory_lock({MIGRATION_LOCK_KEY})")
+
+    try:
+        # Another replica may have migrated while we waited for the lock
+        if get_current_heads(connection) == head_revisions:
+            return False
+
+        # Alembic must start its own transactions, migrations with autocommit
+        # blocks can't run inside ours. The advisory lock outlives the commit.
+        connection.commit()
+
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        return True
+    except Exception:
+        # Leave the aborted transaction so the lock can be released
+        connection.rollback()
+        raise
+    finally:
+        if is_postgres:
+            connection.exec_driver_sql(
+                f"SELECT pg_advisory_unlock({MIGRATION_LOCK_KEY})"
+            )
+
+
+async def upgrade_database(
+    database_url: Optional[str] = None, config: Optional[Config] = None
+) -> bool:
+    """
+    Upgrade the database to head, skipping it when the schema is already up to date.
+
+    Parameters:
+
+        database_url (Optional[str]): Database to upgrade, defaults to PG_DATABASE_URL.
+
+        config (Optional[Config]): Alembic config, defaults to alembic.ini.
+
+    Returns:
+
+        bool: True if migrations were applied.
+    """
+    database_url = database_url or get_settings().PG_DATABASE_URL
+    config = config or get_alembic_config()
+    head_revisions = set(ScriptDirectory.from_config(config).get_heads())
+
+    engine = create_async_engine(database_url, poolclass=pool.NullPool)
+    try:
+        async with engine.connect() as connection:
+            current_heads = await connection.run_sync(get_current_heads)
+            if current_heads == head_revisions:
+                logger.info("Database schema is up to date, skipping migrations")
+                return False
+
+            upgraded = await connection.run_sync(
+                upgrade_connection, config, head_revisions
+            )
+            await connection.commit()
+            return upgraded
+    finally:
+        await engine.dispose()
+
+
+def run_migrations() -> bool:
+    with ElapsedTimeLogger("Database migration"):
+        return asyncio.run(upgrade_database())
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlmodel import Field
+from ..base.model import Base
+
+
+class PubSubPayload(Base, table=True):
+    """
+    Broadcast too large for a NOTIFY payload, the NOTIFY only carries its id.
+
+    Attributes:
+
+        channel (str): The channel the payload was published to.
+
+        payload (str): JSON array of messages.
+
+        created_at (datetime): Payloads are deleted once listeners had time to read them.
+
+    """
+
+    channel: str = Field(nullable=False)
+    payload: str = Field(nullable=False)
+    created_at: datetime = Field(
+        default_factory=datetime.now, index=True, nullable=False
+    )
@@ -0,0 +1,88 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Session.info flag set on sessions in a unit of work
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+@asynccontextmanager
+async def unit_of_work(db_session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Commit everything written in the block once, or roll it back if the block raises.
+
+    Base model writes in the block flush instead of committing.
+
+    Parameters:
+
+        db_session (AsyncSession): Session of the unit of work.
+    """
+    db_session.info[UNIT_OF_WORK_KEY] = True
+    try:
+        yield db_session
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+    finally:
+        db_session.info.pop(UNIT_OF_WORK_KEY, None)
+
+
+def in_unit_of_work(db_session: AsyncSession) -> bool:
+    return db_session.info.get(UNIT_OF_WORK_KEY, False)
+
+
+@asynccontextmanager
+async def write_scope(
+    db_session: AsyncSession, savepoint: bool = False
+) -> AsyncIterator[None]:
+    """
+    Write the changes made in the block.
+
+    In a unit of work, the changes are flushed and committed by the session's owner,
+    a failure aborts the whole unit of work. With savepoint, the block runs in a
+    SAVEPOINT instead and a failure only undoes the block. Outside of a unit of work,
+    the changes are committed immediately and the session is rolled back on failure.
+
+    Parameters:
+
+        db_session (AsyncSession): Session the changes are made in.
+
+        savepoint (bool): Only undo the block on failure, for nested operations the
+        caller recovers from. Costs a SAVEPOINT and a RELEASE round trip.
+    """
+    if in_unit_of_work(db_session):
+        if savepoint:
+            async with db_session.begin_nested():
+                yield
+        else:
+            yield
+            await db_session.flush()
+        return
+
+    try:
+        yield
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        raise
+
+
+def enable_sqlite_savepoints(engine: AsyncEngine):
+    """
+    Let SQLAlchemy emit BEGIN on a sqlite engine instead of the driver.
+
+    The sqlite driver only begins a transaction before writes, so a savepoint
+    released before the first write commits on its own. Units of work need this on
+    sqlite engines where connections are not shared between sessions.
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def sqlite_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def sqlite_begin(connection):
+        connection.exec_driver_sql("BEGIN")
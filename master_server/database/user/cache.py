@@ -0,0 +1,96 @@
+from typing import Optional, Union
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.config import get_settings
+from master_server.utils.cache import CacheBackend, LRUCacheBackend
+
+# Session.info key holding the emails to invalidate once the transaction commits
+PENDING_INVALIDATIONS_KEY = "user_cache_invalidations"
+
+
+class UserCache:
+    """
+    Cache of user rows keyed by email, used by the authentication path.
+
+    Entries are plain column values, so they can be stored in a shared backend and
+    attached to any session. Entries are invalidated when the transaction updating
+    or deleting a user commits. Invalidating earlier would let a concurrent request
+    cache the row being replaced until the entry expires.
+
+    The default backend is per worker process: a worker only drops the entries of
+    its own writes, so other workers see a change, such as a ban, after at most
+    USER_CACHE_TTL_SECONDS.
+
+    Attributes:
+
+        backend (Optional[CacheBackend]): Cache storage, caching is disabled when None.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend
+
+    def get(self, email: str) -> Optional[dict]:
+        if self.backend is None:
+            return None
+        return self.backend.get(email)
+
+    def set(self, email: str, values: dict):
+        if self.backend is not None:
+            self.backend.set(email, values)
+
+    def invalidate(self, *emails: Optional[str]):
+        if self.backend is None:
+            return
+        for email in emails:
+            if email:
+                self.backend.delete(email)
+
+    def invalidate_on_commit(
+        self, db_session: Union[AsyncSession, Session], *emails: Optional[str]
+    ):
+        """
+        Invalidate users once the session's transaction commits, nothing is invalidated
+        when it rolls back.
+
+        Parameters:
+
+            db_session (Union[AsyncSession, Session]): Session writing the users.
+
+            emails (Optional[str]): Emails of the written users.
+        """
+        if self.backend is None:
+            return
+        session = getattr(db_session, "sync_session", db_session)
+        pending = session.info.setdefault(PENDING_INVALIDATIONS_KEY, set())
+        pending.update(email for email in emails if email)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def create_user_cache() -> UserCache:
+    settings = get_settings()
+    if not settings.USER_CACHE_ENABLED:
+        return UserCache()
+
+    return UserCache(
+        LRUCacheBackend(
+            max_size=settings.USER_CACHE_MAX_SIZE,
+            ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+        )
+    )
+
+
+user_cache = create_user_cache()
+
+
+@event.listens_for(Session, "after_commit")
+def user_cache_after_commit(session: Session):
+    user_cache.invalidate(*session.info.pop(PENDING_INVALIDATIONS_KEY, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def user_cache_after_rollback(session: Session):
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
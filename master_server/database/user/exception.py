@@ -1,3 +1,11 @@
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from master_server.constants.user_constants import (
+    USERNAME_UNIQUE_CONSTRAINTS,
+    EMAIL_UNIQUE_CONSTRAINTS,
+)
+
+
 class UsernameAlreadyTaken(Exception):
     def __init__(self, username: str = ""):
         self.message = f"""
@@ -11,6 +19,47 @@ class EmailAlreadyTaken(Exception):
         Email {email} is already taken.
         """
 
+
+class InvalidCursor(Exception):
+    def __init__(self, cursor: str = ""):
+        self.message = f"""
+        Cursor {cursor} is invalid.
+        """
+
+
+def raise_conflict_error(
+    error: IntegrityError, username: Optional[str] = None, email: Optional[str] = None
+):
+    """
+    Map a unique violation on the user table to its domain exception.
+
+    Parameters:
+
+        error (IntegrityError): Error raised by the database.
+
+        username (Optional[str]): Username that was written.
+
+        email (Optional[str]): Email that was written.
+
+    Raises:
+
+        UsernameAlreadyTaken: When the username unique index was violated.
+
+        EmailAlreadyTaken: When the email unique index was violated.
+
+        IntegrityError: The original error for any other violation.
+    """
+    message = str(error.orig)
+
+    if any(name in message for name in USERNAME_UNIQUE_CONSTRAINTS):
+        raise UsernameAlreadyTaken(username or "") from error
+
+    if any(name in message for name in EMAIL_UNIQUE_CONSTRAINTS):
+        raise EmailAlreadyTaken(email or "") from error
+
+    raise error
+
+
 # Below code is the same as the above.
 
 
@@ -22,4 +71,4 @@ class EmailAlreadyTaken(Exception):
 # class EmailAlreadyTaken(Exception):
 #     def __init__(self, email: str = ""):
 #         message = f"Email '{email}' is already taken."
-#         super().__init__(message)
\ No newline at end of file
+#         super().__init__(message)
@@ -1,11 +1,14 @@
-import string
 from typing import Optional
 from datetime import datetime
 from pydantic import field_validator
+from sqlalchemy import Index, String, and_, cast, event, func, inspect
 from sqlmodel import Field, Column, JSON
 from ..base.model import Base, TimeStampMixin
+from .cache import user_cache
+from master_server.constants.user_constants import USER_PROFILE_FIELDS
 from master_server.enums.user_enums import UserRoleEnum
 from master_server.utils.auth import AuthUtil
+from master_server.utils.validators import is_fixed_length_alphanumeric, is_word
 
 
 class User(Base, TimeStampMixin, table=True):
@@ -40,7 +43,8 @@ class User(Base, TimeStampMixin, table=True):
 
         referral_code (str): The referral code of the user.
 
-        token (str): Random token for magic link verification that will be generated every log in.
+        token (str): Legacy random token, magic links use hashed LoginToken rows instead. Kept
+        for existing clients of UserService.find_by_token, it never logs a user in.
 
         api_key (str): api_key for the user.
 
@@ -50,9 +54,14 @@ class User(Base, TimeStampMixin, table=True):
 
     """
 
-    token: str = Field(nullable=False, default_factory=AuthUtil().generate_login_token)
+    token: str = Field(
+        index=True,
+        unique=True,
+        nullable=False,
+        default_factory=AuthUtil().generate_login_token,
+    )
     referral_code: str = Field(
-        nullable=False, default_factory=AuthUtil().generate_referral_code
+        index=True, nullable=False, default_factory=AuthUtil().generate_referral_code
     )
     email: str = Field(index=True, unique=True, nullable=False)
     is_verified: bool = Field(default=False)
@@ -69,15 +78,23 @@ class User(Base, TimeStampMixin, table=True):
     date_of_birth: Optional[datetime] = Field(default=None)
     address: Optional[dict] = Field(default=None, sa_column=Column(JSON))
     phone: Optional[dict] = Field(default=None, sa_column=Column(JSON))
-    api_key: Optional[str] = Field(default_factory=AuthUtil().generate_api_key)
+    api_key: Optional[str] = Field(
+        index=True, unique=True, default_factory=AuthUtil().generate_api_key
+    )
     # used_referral_code: Optional[str] = Field(default=None)
 
+    def missing_profile_field(self) -> Optional[str]:
+        """
+        Return the first required profile field that is not provided, None when the profile is complete.
+        """
+        for field in USER_PROFILE_FIELDS:
+            if getattr(self, field) is None:
+                return field
+        return None
+
     @field_validator("referral_code")
     def validate_referral_code(cls, value):
-        if value and (
-            len(value) != 5
-            or not all(c in string.ascii_letters + string.digits for c in value)
-        ):
+        if value and not is_fixed_length_alphanumeric(value, 5):
             raise ValueError(
                 "referral_code must be 5 characters long and consist of alphanumeric characters"
             )
@@ -85,10 +102,7 @@ class User(Base, TimeStampMixin, table=True):
 
     @field_validator("token")
     def validate_token(cls, value):
-        if value and (
-            len(value) != 20
-            or not all(c in string.ascii_letters + string.digits for c in value)
-        ):
+        if value and not is_fixed_length_alphanumeric(value, 20):
             raise ValueError(
                 "token must be 20 characters long and consist of alphanumeric characters"
             )
@@ -106,9 +120,7 @@ class User(Base, TimeStampMixin, table=True):
     def validate_username(cls, value):
         if value and len(value) > 30:
             raise ValueError("Username must not exceed 30 characters")
-        if value and not all(
-            c in string.ascii_letters + string.digits + "_" for c in value
-        ):
+        if value and not is_word(value):
             raise ValueError(
                 "Username can only contain alphanumeric characters and underscores"
             )
@@ -143,3 +155,39 @@ class User(Base, TimeStampMixin, table=True):
         if value and len(value) != 30:
             raise ValueError("api_key must be 30 characters long")
         return value
+
+
+# Usernames are unique regardless of case, lookups must use lower(username) to hit it
+Index("ix_user_username_lower", func.lower(User.username), unique=True)
+
+# Keyset pagination of the admin user listing, newest first, optionally by role
+Index("ix_user_created_at_id", User.created_at, User.id)
+Index("ix_user_role_created_at_id", User.role, User.created_at, User.id)
+
+
+# SQL counterpart of User.missing_profile_field, so the flag can be selected with the
+# authorization columns. JSON columns store None as a JSON null rather than NULL.
+user_profile_complete = and_(
+    *(
+        (
+            func.coalesce(cast(getattr(User, field), String), "null") != "null"
+            if isinstance(getattr(User, field).type, JSON)
+            else getattr(User, field).is_not(None)
+        )
+        for field in USER_PROFILE_FIELDS
+    )
+).label("profile_complete")
+
+
+# Drop cached users once their change commits, with the previous email on email change
+@event.listens_for(User, "after_update")
+def user_cache_after_update(mapper, connection, target):
+    state = inspect(target)
+    user_cache.invalidate_on_commit(
+        state.session, target.email, *state.attrs.email.history.deleted
+    )
+
+
+@event.listens_for(User, "after_delete")
+def user_cache_after_delete(mapper, connection, target):
+    user_cache.invalidate_on_commit(inspect(target).session, target.email)
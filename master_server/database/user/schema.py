@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, EmailStr, ConfigDict, field_validator
+from pydantic import BaseModel, EmailStr, ConfigDict, computed_field, field_validator
+from master_server.enums.user_enums import UserRoleEnum
+from master_server.utils.auth import get_gravatar_url
 
 
 class AddressSchema(BaseModel):
@@ -17,10 +19,12 @@ class PhoneSchema(BaseModel):
 
 
 class UserResponseSchema(BaseModel):
+    # Built straight from a User with model_validate, without an intermediate dict
+    model_config = ConfigDict(from_attributes=True)
+
     username: Optional[str]
     first_name: Optional[str]
     last_name: Optional[str]
-    profile_url: Optional[str]
     date_of_birth: Optional[datetime]
     address: Optional[AddressSchema]
     phone: Optional[PhoneSchema]
@@ -28,6 +32,66 @@ class UserResponseSchema(BaseModel):
     referral_code: Optional[str]
     api_key: Optional[str]
 
+    @computed_field
+    @property
+    def profile_url(self) -> Optional[str]:
+        if self.email is None:
+            return None
+        return get_gravatar_url(self.email)
+
+
+class UserAuthSchema(BaseModel):
+    """
+    Columns needed to authorize a request, loaded instead of the full user row
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    banned: bool
+    role: UserRoleEnum
+    is_verified: bool
+    profile_complete: bool
+
+
+class BulkImportReject(BaseModel):
+    row: int
+    email: Optional[str] = None
+    reason: str
+
+
+class BulkImportResult(BaseModel):
+    inserted: int = 0
+    rejected: list[BulkImportReject] = []
+
+
+class UserListFilter(BaseModel):
+    role: Optional[UserRoleEnum] = None
+    banned: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class UserListItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    username: Optional[str]
+    role: UserRoleEnum
+    banned: bool
+    is_verified: bool
+    balance: int
+    created_at: datetime
+    last_login_on: datetime
+
+
+class UserListPage(BaseModel):
+    items: list[UserListItem]
+    next_cursor: Optional[str] = None
+
 
 class UserPatchSchema(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -1,12 +1,42 @@
+import base64
+import binascii
 import random
 import string
-from typing import Optional
-from sqlalchemy.exc import NoResultFound
+from collections.abc import AsyncIterable, AsyncIterator
+from datetime import datetime
+from typing import Optional, Union
+from sqlalchemy import exists, func, or_, tuple_, update
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from sqlmodel import select
-from .model import User
-from .exception import UsernameAlreadyTaken, EmailAlreadyTaken
+from .model import User, user_profile_complete
+from .cache import user_cache
+from .schema import (
+    BulkImportReject,
+    BulkImportResult,
+    UserAuthSchema,
+    UserListFilter,
+    UserListItem,
+    UserListPage,
+    UserResponseSchema,
+)
+from .exception import (
+    UsernameAlreadyTaken,
+    EmailAlreadyTaken,
+    InvalidCursor,
+    raise_conflict_error,
+)
+from master_server.constants.user_constants import (
+    BULK_IMPORT_FIELDS,
+    MAX_BIND_PARAMETERS,
+    USER_EXPORT_EXCLUDE,
+    USER_PROFILE_FIELDS,
+)
 from master_server.utils.auth import AuthUtil
+from ..base.model import validate_fields, validate_rows
 from ..base.service import BaseService
+from ..unit_of_work import write_scope
 
 
 class UserService(BaseService):
@@ -33,16 +63,12 @@ class UserService(BaseService):
             EmailAlreadyTaken: When user.email is already taken.
 
         """
-        is_username_exist = await self.is_username_exist(username=user.username)
+        await self.check_conflicts(username=user.username, email=user.email)
 
-        if is_username_exist == True:
-            raise UsernameAlreadyTaken(user.username)
-
-        is_email_exist = await self.is_email_exist(email=user.email)
-        if is_email_exist == True:
-            raise EmailAlreadyTaken(user.email)
-
-        await user.save(self.db_session)
+        try:
+            await user.save(self.db_session)
+        except IntegrityError as ex:
+            raise_conflict_error(ex, username=user.username, email=user.email)
 
         return user
 
@@ -65,20 +91,464 @@ class UserService(BaseService):
             EmailAlreadyTaken: When user.email is already taken.
 
         """
-        if "username" in kwargs:
-            is_username_exist = await self.is_username_exist(
-                username=kwargs["username"]
+        await self.check_conflicts(
+            username=kwargs.get("username"),
+            email=kwargs.get("email"),
+            exclude_user_id=user.id,
+        )
+
+        try:
+            await user.update(self.db_session, **kwargs)
+        except IntegrityError as ex:
+            raise_conflict_error(
+                ex, username=kwargs.get("username"), email=kwargs.get("email")
             )
-            if is_username_exist == True:
-                raise UsernameAlreadyTaken(kwargs["username"])
+        return user
 
-        if "email" in kwargs:
-            is_email_exist = await self.is_email_exist(email=kwargs["email"])
-            if is_email_exist == True:
-                raise EmailAlreadyTaken(kwargs["email"])
+    async def patch_user(
+        self, user: UserAuthSchema, **kwargs
+    ) -> Optional[UserResponseSchema]:
+        """
+        Update user fields in a single UPDATE ... RETURNING statement, without loading
+        the user row first.
 
-        await user.update(self.db_session, **kwargs)
-        return user
+        Parameters:
+
+            user (UserAuthSchema): Authorized user to update.
+
+        Returns:
+
+            Optional[UserResponseSchema]: Updated profile, None when the user does not exist.
+
+        Raises:
+
+            UsernameAlreadyTaken: When username is already taken.
+
+            EmailAlreadyTaken: When email is already taken.
+
+            ValidationError: When a value is invalid.
+        """
+        validate_fields(User, kwargs)
+        await self.check_conflicts(
+            username=kwargs.get("username"),
+            email=kwargs.get("email"),
+            exclude_user_id=user.id,
+        )
+
+        statement = (
+            update(User)
+            .where(User.id == user.id)
+            .values(**kwargs, updated_at=datetime.now())
+            .returning(
+                *[getattr(User, name) for name in UserResponseSchema.model_fields]
+            )
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            async with write_scope(self.db_session):
+                row = (await self.db_session.exec(statement)).first()
+                # The statement bypasses the ORM update events
+                user_cache.invalidate_on_commit(
+                    self.db_session, user.email, kwargs.get("email")
+                )
+        except IntegrityError as ex:
+            raise_conflict_error(
+                ex, username=kwargs.get("username"), email=kwargs.get("email")
+            )
+
+        if row is None:
+            return None
+        return UserResponseSchema.model_validate(row)
+
+    async def upsert_login(self, email: str, ip: str) -> Optional[int]:
+        """
+        Create the user or record a new login, in a single INSERT ... ON CONFLICT statement.
+
+        Banned users are left unchanged. The caller commits, so the login can be written
+        in the same transaction as the magic link email.
+
+        Parameters:
+
+            email (str): Email address of the user.
+
+            ip (str): IP address of the client.
+
+        Returns:
+
+            Optional[int]: Id of the user, None when the user is banned.
+        """
+        now = datetime.now()
+        user = User.model_validate(
+            {
+                "email": email,
+                "created_with_ip": ip,
+                "last_login_with_ip": ip,
+                "last_login_on": now,
+            }
+        )
+
+        statement = self.insert(User).values(**user.model_dump(exclude={"id"}))
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={
+                "last_login_with_ip": statement.excluded.last_login_with_ip,
+                "last_login_on": statement.excluded.last_login_on,
+                "updated_at": now,
+            },
+            where=User.banned.is_(False),
+        ).returning(User.id)
+
+        result = await self.db_session.exec(statement)
+        user_id = result.scalar_one_or_none()
+
+        # The statement bypasses the ORM update events
+        user_cache.invalidate_on_commit(self.db_session, email)
+        return user_id
+
+    async def verify_user(self, user_id: int) -> Optional[str]:
+        """
+        Mark a user as verified, in a single UPDATE statement. The caller commits.
+
+        Parameters:
+
+            user_id (int): Id of the user.
+
+        Returns:
+
+            Optional[str]: Email of the user, None when the user does not exist.
+        """
+        statement = (
+            update(User)
+            .where(User.id == user_id)
+            .values(is_verified=True, updated_at=datetime.now())
+            .returning(User.email)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db_session.exec(statement)
+        email = result.scalar_one_or_none()
+
+        # The statement bypasses the ORM update events
+        user_cache.invalidate_on_commit(self.db_session, email)
+        return email
+
+    async def bulk_add_users(
+        self,
+        rows: AsyncIterable[Union[dict, Exception]],
+        batch_size: int = 1000,
+    ) -> BulkImportResult:
+        """
+        Add users in batches, skipping users that already exist.
+
+        Rows are validated with the User field validators one batch at a time and inserted with
+        one multi-row INSERT ... ON CONFLICT DO NOTHING per batch, each batch is committed
+        unless the session is in a unit of work.
+
+        Parameters:
+
+            rows (AsyncIterable[Union[dict, Exception]]): User fields per row, exceptions are reported as rejects.
+
+            batch_size (int): Number of rows per INSERT, capped so a batch fits in the bind parameter limit.
+
+        Returns:
+
+            BulkImportResult: Number of inserted users and the rejected rows.
+        """
+        # Every row of the INSERT sends all the user columns but id
+        batch_size = min(
+            batch_size, MAX_BIND_PARAMETERS // (len(User.__table__.columns) - 1)
+        )
+        result = BulkImportResult()
+        batch: list[tuple[int, dict]] = []
+        chunk: list[tuple[int, Union[dict, Exception]]] = []
+        seen_emails: set[str] = set()
+        seen_usernames: set[str] = set()
+        row_number = 0
+
+        async def add_chunk():
+            nonlocal batch
+
+            for row_number, values in self._validate_import_rows(chunk):
+                if isinstance(values, BulkImportReject):
+                    result.rejected.append(values)
+                    continue
+
+                username = values["username"].lower() if values["username"] else None
+                if values["email"] in seen_emails or username in seen_usernames:
+                    result.rejected.append(
+                        BulkImportReject(
+                            row=row_number,
+                            email=values["email"],
+                            reason="Duplicate email or username in import",
+                        )
+                    )
+                    continue
+
+                seen_emails.add(values["email"])
+                if username:
+                    seen_usernames.add(username)
+
+                batch.append((row_number, values))
+                if len(batch) >= batch_size:
+                    await self._insert_batch(batch, result)
+                    batch = []
+
+            chunk.clear()
+
+        async for row in rows:
+            row_number += 1
+            chunk.append((row_number, row))
+            if len(chunk) >= batch_size:
+                await add_chunk()
+
+        await add_chunk()
+        if batch:
+            await self._insert_batch(batch, result)
+
+        return result
+
+    def _validate_import_rows(
+        self, chunk: list[tuple[int, Union[dict, Exception]]]
+    ) -> list[tuple[int, Union[dict, BulkImportReject]]]:
+        """
+        Validate a chunk of import rows in a single call, keeping the row order.
+
+        Parameters:
+
+            chunk (list[tuple[int, Union[dict, Exception]]]): Row numbers and rows.
+
+        Returns:
+
+            list[tuple[int, Union[dict, BulkImportReject]]]: Column values of valid rows, rejects otherwise.
+        """
+        candidates = [
+            {key: row[key] for key in BULK_IMPORT_FIELDS if key in row}
+            for _, row in chunk
+            if not isinstance(row, Exception)
+        ]
+        validated = iter(validate_rows(User, candidates, exclude={"id"}))
+
+        results = []
+        for row_number, row in chunk:
+            if isinstance(row, Exception):
+                results.append(
+                    (row_number, BulkImportReject(row=row_number, reason=str(row)))
+                )
+                continue
+
+            values = next(validated)
+            if isinstance(values, list):
+                error = values[0]
+                location = ".".join(str(part) for part in error["loc"])
+                values = BulkImportReject(
+                    row=row_number,
+                    email=row.get("email"),
+                    reason=f"{location}: {error['msg']}",
+                )
+
+            results.append((row_number, values))
+
+        return results
+
+    async def _insert_batch(
+        self, batch: list[tuple[int, dict]], result: BulkImportResult
+    ):
+        statement = (
+            self.insert(User)
+            .values([values for _, values in batch])
+            .on_conflict_do_nothing()
+            .returning(User.email)
+        )
+        async with write_scope(self.db_session):
+            inserted = await self.db_session.exec(statement)
+            inserted_emails = set(inserted.scalars().all())
+
+        result.inserted += len(inserted_emails)
+        for row_number, values in batch:
+            if values["email"] not in inserted_emails:
+                result.rejected.append(
+                    BulkImportReject(
+                        row=row_number,
+                        email=values["email"],
+                        reason="Conflicts with an existing user",
+                    )
+                )
+
+    async def stream_users(self, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Stream all users ordered by id, without secrets.
+
+        Users are read in pages using the last seen id as cursor, so every page is an
+        index range scan and rows are not kept in the session.
+
+        Parameters:
+
+            batch_size (int): Number of users per page.
+
+        Returns:
+
+            AsyncIterator[dict]: User columns per user.
+        """
+        columns = [
+            column
+            for column in User.__table__.columns
+            if column.name not in USER_EXPORT_EXCLUDE
+        ]
+        last_id = 0
+
+        while True:
+            statement = (
+                select(*columns)
+                .where(User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            result = await self.db_session.exec(statement)
+            rows = result.mappings().all()
+
+            for row in rows:
+                yield dict(row)
+
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
+    async def list_users(
+        self,
+        filters: UserListFilter,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> UserListPage:
+        """
+        List users, newest first, one page at a time.
+
+        Pages are selected with a (created_at, id) keyset instead of OFFSET, so deep
+        pages are as fast as the first one. Only the listed columns are selected.
+
+        Parameters:
+
+            filters (UserListFilter): Conditions the users must match.
+
+            limit (int): Maximum number of users in the page.
+
+            cursor (Optional[str]): next_cursor of the previous page.
+
+        Returns:
+
+            UserListPage: The users and the cursor of the next page, if any.
+
+        Raises:
+
+            InvalidCursor: When the cursor was not returned by list_users.
+        """
+        columns = [User.__table__.c[name] for name in UserListItem.model_fields]
+        statement = select(*columns)
+
+        if filters.role is not None:
+            statement = statement.where(User.role == filters.role)
+        if filters.banned is not None:
+            statement = statement.where(User.banned == filters.banned)
+        if filters.is_verified is not None:
+            statement = statement.where(User.is_verified == filters.is_verified)
+        if filters.created_after is not None:
+            statement = statement.where(User.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            statement = statement.where(User.created_at < filters.created_before)
+        if cursor is not None:
+            created_at, user_id = decode_user_cursor(cursor)
+            statement = statement.where(
+                tuple_(User.created_at, User.id) < tuple_(created_at, user_id)
+            )
+
+        # Fetch one extra row to know whether there is a next page
+        statement = statement.order_by(User.created_at.desc(), User.id.desc()).limit(
+            limit + 1
+        )
+        result = await self.db_session.exec(statement)
+        rows = result.all()
+
+        items = [UserListItem.model_validate(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_user_cursor(items[-1].created_at, items[-1].id)
+
+        return UserListPage(items=items, next_cursor=next_cursor)
+
+    async def iter_users(
+        self,
+        filters: UserListFilter,
+        batch_size: int = 1000,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[UserListItem]:
+        """
+        Iterate over all users matching filters, newest first, fetched page by page.
+
+        Parameters:
+
+            filters (UserListFilter): Conditions the users must match.
+
+            batch_size (int): Number of users per page.
+
+            cursor (Optional[str]): Start after this cursor.
+
+        Returns:
+
+            AsyncIterator[UserListItem]: The matching users.
+        """
+        while True:
+            page = await self.list_users(filters, limit=batch_size, cursor=cursor)
+            for item in page.items:
+                yield item
+
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    async def check_conflicts(
+        self,
+        username: Optional[str],
+        email: Optional[str],
+        exclude_user_id: Optional[int] = None,
+    ) -> None:
+        """
+        Check username and email uniqueness with a single query.
+
+        Parameters:
+
+            username (Optional[str]): Username to check, skipped when empty.
+
+            email (Optional[str]): Email to check, skipped when empty.
+
+            exclude_user_id (Optional[int]): Id of the user being updated, its own row is not a conflict.
+
+        Raises:
+
+            UsernameAlreadyTaken: When username is already taken.
+
+            EmailAlreadyTaken: When email is already taken.
+        """
+        conditions = []
+        if username:
+            conditions.append(func.lower(User.username) == username.lower())
+        if email:
+            conditions.append(User.email == email)
+
+        if not conditions:
+            return
+
+        statement = select(User.username, User.email).where(or_(*conditions))
+        if exclude_user_id is not None:
+            statement = statement.where(User.id != exclude_user_id)
+
+        result = await self.db_session.exec(statement.limit(2))
+        rows = result.all()
+
+        if username and any(
+            taken and taken.lower() == username.lower() for taken, _ in rows
+        ):
+            raise UsernameAlreadyTaken(username)
+
+        if email and any(taken == email for _, taken in rows):
+            raise EmailAlreadyTaken(email)
 
     async def find_by_api_key(self, api_key: str) -> Optional[User]:
         """
@@ -103,7 +573,9 @@ class UserService(BaseService):
 
     async def find_by_token(self, token: str) -> Optional[User]:
         """
-        Retrieve a user by their token.
+        Retrieve a user by their legacy token.
+
+        Magic link logins no longer use User.token, see LoginTokenService.consume.
 
         Parameters:
 
@@ -124,18 +596,18 @@ class UserService(BaseService):
 
     async def find_by_username(self, username: str) -> Optional[User]:
         """
-        Retrieve a user by their email address.
+        Retrieve a user by their username, ignoring case.
 
         Parameters:
 
-            email (str): The email address of the user to retrieve.
+            username (str): The username of the user to retrieve.
 
         Returns:
 
             Optional[User]: The User object if found, otherwise None.
 
         """
-        statement = select(User).where(User.username == username)
+        statement = select(User).where(func.lower(User.username) == username.lower())
 
         try:
             result = await self.db_session.exec(statement)
@@ -143,7 +615,9 @@ class UserService(BaseService):
         except NoResultFound:
             return None
 
-    async def find_by_email(self, email: str) -> Optional[User]:
+    async def find_by_email(
+        self, email: str, use_cache: bool = False
+    ) -> Optional[User]:
         """
         Retrieve a user by their email address.
 
@@ -151,19 +625,103 @@ class UserService(BaseService):
 
             email (str): The email address of the user to retrieve.
 
+            use_cache (bool): Serve the user from the user cache when possible.
+
         Returns:
 
             Optional[User]: The User object if found, otherwise None.
 
         """
+        if use_cache:
+            user = self._load_cached_user(email)
+            if user is not None:
+                return user
+
         statement = select(User).where(User.email == email)
 
         try:
             result = await self.db_session.exec(statement)
-            return result.one()
+            user = result.one()
         except NoResultFound:
             return None
 
+        if use_cache:
+            user_cache.set(email, user.model_dump())
+        return user
+
+    async def find_auth_user(
+        self, email: str, use_cache: bool = False
+    ) -> Optional[UserAuthSchema]:
+        """
+        Retrieve only the columns needed to authorize a user, by email address.
+
+        Parameters:
+
+            email (str): The email address of the user to retrieve.
+
+            use_cache (bool): Serve the user from the user cache when possible.
+
+        Returns:
+
+            Optional[UserAuthSchema]: The authorization columns if found, otherwise None.
+        """
+        if use_cache:
+            values = user_cache.get(email)
+            if values is not None:
+                return UserAuthSchema(
+                    **values,
+                    profile_complete=all(
+                        values[field] is not None for field in USER_PROFILE_FIELDS
+                    ),
+                )
+
+        statement = select(
+            User.id,
+            User.email,
+            User.banned,
+            User.role,
+            User.is_verified,
+            user_profile_complete,
+        ).where(User.email == email)
+
+        result = await self.db_session.exec(statement)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return UserAuthSchema.model_validate(row)
+
+    async def ban_user(self, user: User) -> User:
+        """
+        Ban user. The user is dropped from the user cache, so it is rejected on its next request.
+
+        Parameters:
+
+            user (User): User model to ban.
+
+        Returns:
+
+            User: Updated user model after save.
+        """
+        await user.update(self.db_session, banned=True)
+        return user
+
+    def _load_cached_user(self, email: str) -> Optional[User]:
+        values = user_cache.get(email)
+        if values is None:
+            return None
+
+        # Reuse the instance when the session already holds this user
+        key = identity_key(User, values["id"])
+        user = self.db_session.identity_map.get(key)
+        if user is not None:
+            return user
+
+        # Attach as a loaded row, so later updates only write changed columns
+        user = User(**values)
+        make_transient_to_detached(user)
+        self.db_session.add(user)
+        return user
+
     async def is_username_exist(self, username: Optional[str]) -> bool:
         """
         Return if username is already taken.
@@ -179,10 +737,11 @@ class UserService(BaseService):
         if not username:
             return False
 
-        user = await self.find_by_username(username)
-        if not user:
-            return False
-        return True
+        statement = select(
+            exists().where(func.lower(User.username) == username.lower())
+        )
+        result = await self.db_session.exec(statement)
+        return result.one()
 
     async def is_email_exist(self, email: Optional[str]) -> bool:
         """
@@ -199,7 +758,19 @@ class UserService(BaseService):
         if not email:
             return False
 
-        user = await self.find_by_email(email)
-        if not user:
-            return False
-        return True
+        statement = select(exists().where(User.email == email))
+        result = await self.db_session.exec(statement)
+        return result.one()
+
+
+def encode_user_cursor(created_at: datetime, user_id: int) -> str:
+    value = f"{created_at.isoformat()}|{user_id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_user_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
@@ -0,0 +1,12 @@
+class InsufficientBalance(Exception):
+    def __init__(self, user_id: int = 0, amount: int = 0):
+        self.message = f"""
+        User {user_id} does not have enough balance for {amount}.
+        """
+
+
+class WalletNotFound(Exception):
+    def __init__(self, user_id: int = 0):
+        self.message = f"""
+        User {user_id} does not exist.
+        """
@@ -0,0 +1,32 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field
+from ..base.model import Base
+
+
+class BalanceLedger(Base, table=True):
+    """
+    Append-only record of a change to a user's wallet balance.
+
+    Attributes:
+
+        user_id (int): The user whose balance changed.
+
+        delta (int): The amount added to the balance, negative for debits.
+
+        balance_after (int): The balance right after the change.
+
+        reason (str): Why the balance changed, e.g. "top_up" or "usage".
+
+        reference (Optional[str]): External reference such as a payment or request id.
+
+        created_at (datetime): When the change was applied.
+
+    """
+
+    user_id: int = Field(foreign_key="user.id", index=True, nullable=False)
+    delta: int = Field(nullable=False)
+    balance_after: int = Field(nullable=False)
+    reason: str = Field(nullable=False)
+    reference: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
@@ -0,0 +1,14 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class BalanceChange(BaseModel):
+    user_id: int
+    amount: int
+    reason: str
+    reference: Optional[str] = None
+
+
+class BatchDebitResult(BaseModel):
+    balances: dict[int, int] = {}
+    rejected: list[int] = []
@@ -0,0 +1,247 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import exists, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlmodel import select
+from .model import BalanceLedger
+from .schema import BalanceChange, BatchDebitResult
+from .exception import InsufficientBalance, WalletNotFound
+from ..base.service import BaseService
+from ..unit_of_work import write_scope
+from ..user.model import User
+from ..user.cache import user_cache
+
+
+class WalletService(BaseService):
+    """
+    Wallet Service
+
+    Balances are changed with a single conditional UPDATE in the database, so
+    concurrent top-ups and charges never overwrite each other and a balance can
+    not go negative. Every change is recorded in the balance ledger in the same
+    transaction. Changes are committed immediately, or by the owner of the session's
+    unit of work.
+    """
+
+    async def credit(
+        self, user_id: int, amount: int, reason: str, reference: Optional[str] = None
+    ) -> int:
+        """
+        Add to a user's balance.
+
+        Parameters:
+
+            user_id (int): The user to credit.
+
+            amount (int): Positive amount to add.
+
+            reason (str): Why the balance changed.
+
+            reference (Optional[str]): External reference of the change.
+
+        Returns:
+
+            int: The new balance.
+
+        Raises:
+
+            WalletNotFound: When the user does not exist.
+        """
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+
+        return await self.apply(user_id, amount, reason, reference)
+
+    async def debit(
+        self, user_id: int, amount: int, reason: str, reference: Optional[str] = None
+    ) -> int:
+        """
+        Subtract from a user's balance.
+
+        Parameters:
+
+            user_id (int): The user to charge.
+
+            amount (int): Positive amount to subtract.
+
+            reason (str): Why the balance changed.
+
+            reference (Optional[str]): External reference of the change.
+
+        Returns:
+
+            int: The new balance.
+
+        Raises:
+
+            InsufficientBalance: When the balance is lower than amount.
+
+            WalletNotFound: When the user does not exist.
+        """
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+
+        return await self.apply(user_id, -amount, reason, reference)
+
+    async def apply(
+        self, user_id: int, delta: int, reason: str, reference: Optional[str] = None
+    ) -> int:
+        """
+        Add delta to a user's balance and record it in the ledger.
+
+        Parameters:
+
+            user_id (int): The user whose balance changes.
+
+            delta (int): Amount to add, negative for debits.
+
+            reason (str): Why the balance changed.
+
+            reference (Optional[str]): External reference of the change.
+
+        Returns:
+
+            int: The new balance.
+
+        Raises:
+
+            InsufficientBalance: When the balance would become negative.
+
+            WalletNotFound: When the user does not exist.
+        """
+        async with write_scope(self.db_session):
+            row = await self._update_balance(user_id, delta)
+            if row is None:
+                await self._raise_rejected(user_id, -delta)
+
+            balance, email = row
+
+            self.db_session.add(
+                BalanceLedger(
+                    user_id=user_id,
+                    delta=delta,
+                    balance_after=balance,
+                    reason=reason,
+                    reference=reference,
+                )
+            )
+            user_cache.invalidate_on_commit(self.db_session, email)
+
+        return balance
+
+    async def debit_batch(self, charges: list[BalanceChange]) -> BatchDebitResult:
+        """
+        Apply many usage charges in a single transaction.
+
+        Charges are summed per user, so each user's balance is updated once however
+        many charges the batch holds. When a user's total exceeds their balance, none
+        of that user's charges are applied.
+
+        Parameters:
+
+            charges (list[BalanceChange]): Charges with positive amounts.
+
+        Returns:
+
+            BatchDebitResult: New balances of the charged users and rejected user ids.
+        """
+        charges_by_user: dict[int, list[BalanceChange]] = defaultdict(list)
+        for charge in charges:
+            if charge.amount <= 0:
+                raise ValueError("Amount must be positive")
+            charges_by_user[charge.user_id].append(charge)
+
+        result = BatchDebitResult()
+        emails = []
+
+        # Lock rows in a consistent order so concurrent batches can not deadlock
+        async with write_scope(self.db_session):
+            for user_id in sorted(charges_by_user):
+                user_charges = charges_by_user[user_id]
+                total = sum(charge.amount for charge in user_charges)
+
+                row = await self._update_balance(user_id, -total)
+                if row is None:
+                    result.rejected.append(user_id)
+                    continue
+
+                balance, email = row
+                emails.append(email)
+
+                running = balance + total
+                for charge in user_charges:
+                    running -= charge.amount
+                    self.db_session.add(
+                        BalanceLedger(
+                            user_id=user_id,
+                            delta=-charge.amount,
+                            balance_after=running,
+                            reason=charge.reason,
+                            reference=charge.reference,
+                        )
+                    )
+                result.balances[user_id] = balance
+
+            user_cache.invalidate_on_commit(self.db_session, *emails)
+
+        return result
+
+    async def get_ledger(self, user_id: int) -> list[BalanceLedger]:
+        """
+        Get the balance changes of a user, oldest first.
+
+        Parameters:
+
+            user_id (int): The user to get the ledger for.
+
+        Returns:
+
+            list[BalanceLedger]: The user's ledger entries.
+        """
+        statement = (
+            select(BalanceLedger)
+            .where(BalanceLedger.user_id == user_id)
+            .order_by(BalanceLedger.id)
+        )
+        result = await self.db_session.exec(statement)
+        return list(result.all())
+
+    async def _update_balance(
+        self, user_id: int, delta: int
+    ) -> Optional[tuple[int, str]]:
+        """
+        Atomically add delta to the balance unless it would become negative.
+
+        Returns:
+
+            Optional[tuple[int, str]]: The new balance and the user's email, None
+            when no row was updated.
+        """
+        statement = (
+            update(User)
+            .where(User.id == user_id, User.balance + delta >= 0)
+            .values(balance=User.balance + delta, updated_at=datetime.now())
+            .returning(User.balance, User.email)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await self.db_session.exec(statement)).first()
+        if row is None:
+            return None
+
+        # The UPDATE bypasses the ORM, keep an already loaded user in sync. Callers
+        # invalidate the user cache on commit.
+        user = self.db_session.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            set_committed_value(user, "balance", row.balance)
+
+        return row.balance, row.email
+
+    async def _raise_rejected(self, user_id: int, amount: int):
+        # The rejected UPDATE changed nothing, the caller's transaction stays usable
+        statement = select(exists().where(User.id == user_id))
+        if not (await self.db_session.exec(statement)).one():
+            raise WalletNotFound(user_id)
+
+        raise InsufficientBalance(user_id, amount)
@@ -1,9 +1,12 @@
+import secrets
 from fastapi import Depends, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import APIKeyHeader, HTTPBearer, HTTPAuthorizationCredentials
 from ..database.config import get_session, AsyncSession
 from ..database.user.model import User
+from ..database.user.schema import UserAuthSchema
 from ..database.user.service import UserService
 from ..utils.auth import AuthUtil
+from ..config import get_settings
 from ..exceptions.http import AuthFailedHTTPException, NotFoundHTTPException
 
 
@@ -17,18 +20,36 @@ class CustomBearer(HTTPBearer):
 
 oauth2_scheme = CustomBearer()
 
+auth_util = AuthUtil()
+
+admin_key_scheme = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
+
+def get_token_email(token: str) -> str:
+    """
+    Return the email of a valid bearer token.
+    """
+    email = auth_util.verify_jwt_token(token)
+    if email is None:
+        raise AuthFailedHTTPException
+    return email
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db_session: AsyncSession = Depends(get_session)
 ) -> User:
     """
     Authenticate user from bearer token and return user if it is authorized and not banned.
+
+    Loads the full user row, including the address and phone JSON columns, for handlers
+    returning the profile. Handlers that only need to authorize the user, like PATCH /user,
+    depend on get_current_auth_user instead.
     """
-    email = AuthUtil().verify_jwt_token(token)
-    if email is None:
-        raise AuthFailedHTTPException
+    email = get_token_email(token)
 
-    user = await UserService(db_session=db_session).find_by_email(email=email)
+    user = await UserService(db_session=db_session).find_by_email(
+        email=email, use_cache=True
+    )
 
     if not user:
         raise NotFoundHTTPException("User not found")
@@ -45,8 +66,54 @@ async def get_current_active_user(
     """
     Check if all required user details are provided
     """
-    for field, value in current_user.model_dump().items():
-        if value is None:
-            raise AuthFailedHTTPException(msg=f"{field} not provided")
+    field = current_user.missing_profile_field()
+    if field is not None:
+        raise AuthFailedHTTPException(msg=f"{field} not provided")
 
     return current_user
+
+
+async def get_current_auth_user(
+    token: str = Depends(oauth2_scheme), db_session: AsyncSession = Depends(get_session)
+) -> UserAuthSchema:
+    """
+    Authenticate user from bearer token, loading only the columns needed for authorization.
+    """
+    email = get_token_email(token)
+
+    user = await UserService(db_session=db_session).find_auth_user(
+        email=email, use_cache=True
+    )
+
+    if not user:
+        raise NotFoundHTTPException("User not found")
+
+    if user.banned:
+        raise AuthFailedHTTPException(msg="Banned user")
+
+    return user
+
+
+async def get_current_active_auth_user(
+    current_user: UserAuthSchema = Depends(get_current_auth_user),
+) -> UserAuthSchema:
+    """
+    Check if all required user details are provided, without loading the full user row
+    """
+    if not current_user.profile_complete:
+        raise AuthFailedHTTPException(msg="Profile not complete")
+
+    return current_user
+
+
+async def verify_admin_key(admin_key: str = Depends(admin_key_scheme)):
+    """
+    Authenticate admin requests with the X-Admin-Key header.
+    """
+    expected_key = get_settings().ADMIN_API_KEY
+    if (
+        not expected_key
+        or not admin_key
+        or not secrets.compare_digest(admin_key, expected_key)
+    ):
+        raise AuthFailedHTTPException(msg="Invalid admin key")
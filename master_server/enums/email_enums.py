@@ -0,0 +1,8 @@
+from enum import Enum as PyEnum
+
+
+class EmailStatusEnum(PyEnum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
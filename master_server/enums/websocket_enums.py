@@ -0,0 +1,11 @@
+from enum import Enum as PyEnum
+
+
+class SlowConsumerPolicyEnum(PyEnum):
+    DROP_OLDEST = "DROP_OLDEST"
+    DROP_NEWEST = "DROP_NEWEST"
+    DISCONNECT = "DISCONNECT"
+
+
+class FrameTypeEnum(PyEnum):
+    AUDIO = 1
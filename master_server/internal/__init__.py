@@ -0,0 +1,2 @@
+from .admin import router as admin_router
+from .metrics import router as metrics_router
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from ..database.config import (
+    get_autocommit_session,
+    get_session,
+    async_session,
+    AsyncSession,
+)
+from ..database.user.exception import InvalidCursor
+from ..database.user.schema import BulkImportResult, UserListFilter, UserListPage
+from ..database.user.service import UserService, decode_user_cursor
+from ..dependencies.auth import verify_admin_key
+from ..enums.user_enums import UserRoleEnum
+from ..exceptions.http import BadRequestHTTPException
+from ..utils.bulk import iter_csv, iter_ndjson
+from ..utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_admin_key)],
+    responses={404: {"error": "Not found"}},
+)
+
+
+@router.post("/users/import", response_model=BulkImportResult)
+async def import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Body format"),
+    batch_size: int = Query(1000, ge=1, le=1000),
+    db_session: AsyncSession = Depends(get_autocommit_session),
+):
+    """
+    Import users from the request body, streamed as NDJSON or CSV with a header line.
+
+    Every batch is committed as soon as it is inserted, instead of once per request.
+
+    Returns:
+
+        inserted (int): Number of users added
+
+        rejected (list): Row number, email and reason of every row that was not added
+    """
+    parser = iter_csv if format == "csv" else iter_ndjson
+    result = await UserService(db_session=db_session).bulk_add_users(
+        parser(request.stream()), batch_size=batch_size
+    )
+
+    logger.info(
+        f"Imported {result.inserted} users, rejected {len(result.rejected)} rows"
+    )
+    return result
+
+
+@router.get("/users/export")
+async def export_users(batch_size: int = Query(1000, ge=1, le=10000)):
+    """
+    Export all users as NDJSON, streamed page by page.
+    """
+
+    async def export():
+        async with async_session() as db_session:
+            async for user in UserService(db_session=db_session).stream_users(
+                batch_size=batch_size
+            ):
+                yield to_json(user) + b"\n"
+
+    return StreamingResponse(export(), media_type="application/x-ndjson")
+
+
+@router.get("/users", response_model=UserListPage)
+async def list_users(
+    role: Optional[UserRoleEnum] = None,
+    banned: Optional[bool] = None,
+    is_verified: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    format: Literal["json", "ndjson"] = Query("json", description="Response format"),
+    db_session: AsyncSession = Depends(get_session),
+):
+    """
+    List users, newest first.
+
+    As JSON, returns a page of at most limit users and the cursor of the next page.
+    As NDJSON, streams every matching user after cursor, fetched limit users at a time.
+    """
+    filters = UserListFilter(
+        role=role,
+        banned=banned,
+        is_verified=is_verified,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
+    try:
+        if cursor is not None:
+            decode_user_cursor(cursor)
+    except InvalidCursor as e:
+        raise BadRequestHTTPException(msg=e.message)
+
+    if format == "ndjson":
+
+        async def stream():
+            async with async_session() as stream_session:
+                async for user in UserService(db_session=stream_session).iter_users(
+                    filters, batch_size=limit, cursor=cursor
+                ):
+                    yield user.__pydantic_serializer__.to_json(user) + b"\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return await UserService(db_session=db_session).list_users(
+        filters, limit=limit, cursor=cursor
+    )
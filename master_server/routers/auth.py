@@ -1,13 +1,18 @@
-from datetime import datetime
 from fastapi import APIRouter, Query, Depends, Request
 from ..database.config import get_session, AsyncSession
 from ..database.user.service import UserService
-from ..database.user.model import User
+from ..database.email.service import EmailOutboxService
+from ..database.login_token.service import LoginTokenService
 from ..utils.logging import AppLogger
 from ..utils.auth import AuthUtil
+from ..config import get_settings
 from ..schemas.auth import SendMagicLinkRequest, VerifyMagicLinkResponse
 from ..dependencies.common import get_client_ip
-from ..config import get_settings
+from ..constants.email_constants import (
+    MAGIC_LINK_KEY,
+    MAGIC_LINK_SUBJECT,
+    MAGIC_LINK_HTML_CONTENT,
+)
 from ..exceptions.http import NotFoundHTTPException, AuthFailedHTTPException
 
 logger = AppLogger().get_logger()
@@ -27,53 +32,52 @@ async def send_magic_link(
     """
     Send magic link and add user to the table.
 
+    The magic link email is written to the outbox in the same transaction as the
+    user's login token and delivered by the email worker.
+
     Parameters:
 
         email (str): email address that will receive magic link
 
     Returns:
 
-        bool: True if the magic link is sent to the email address
+        bool: True if the magic link is queued for the email address
 
     Raises:
 
         AuthFailedHTTPException: If user is already banned. In this case, verification email won't be sent.
     """
-    settings = get_settings()
-    user_service = UserService(db_session=db_session)
     auth_util = AuthUtil()
     login_token = auth_util.generate_login_token()
 
-    user = await user_service.find_by_email(email=model.email)
+    user_id = await UserService(db_session=db_session).upsert_login(
+        email=model.email, ip=client_ip
+    )
+
+    if user_id is None:
+        raise AuthFailedHTTPException(msg="Banned user")
 
-    if user is None:
-        user = await user_service.add_user(
-            User(
-                email=model.email,
+    LoginTokenService(db_session=db_session).issue(
+        user_id=user_id,
+        token=login_token,
+        ttl_seconds=get_settings().LOGIN_TOKEN_TTL_SECONDS,
+    )
+
+    EmailOutboxService(db_session=db_session).enqueue(
+        recipient=model.email,
+        subject=MAGIC_LINK_SUBJECT,
+        html_content=MAGIC_LINK_HTML_CONTENT,
+        substitutions={
+            MAGIC_LINK_KEY: auth_util.build_magic_link(
+                base_url=request.base_url,
+                url="auth/verify-magic-link",
                 token=login_token,
-                created_with_ip=client_ip,
-                last_login_with_ip=client_ip,
-                last_login_on=datetime.now(),
             )
-        )
-    else:
-        if user.banned:
-            raise AuthFailedHTTPException(msg="Banned user")
-
-        user = await user_service.update_user(
-            user=user,
-            token=login_token,
-            last_login_with_ip=client_ip,
-            last_login_on=datetime.now(),
-        )
-
-    return AuthUtil().send_magic_link(
-        base_url=request.base_url,
-        url="auth/verify-magic-link",
-        email=model.email,
-        token=login_token,
+        },
     )
 
+    return True
+
 
 @router.get("/verify-magic-link", response_model=VerifyMagicLinkResponse)
 async def verify_magic_link(
@@ -95,15 +99,14 @@ async def verify_magic_link(
 
     Raises:
 
-        NotFoundHTTPException: token is not found.
+        NotFoundHTTPException: token is not found, expired or already used.
     """
 
-    user_service = UserService(db_session=db_session)
-    user = await user_service.find_by_token(token=token)
-    if not user:
+    user_id = await LoginTokenService(db_session=db_session).consume(token=token)
+    if user_id is None:
         raise NotFoundHTTPException(msg="token not found")
 
-    user = await user_service.update_user(user, is_verified=True)
+    email = await UserService(db_session=db_session).verify_user(user_id)
 
-    jwt_token = AuthUtil().create_jwt_token(email=user.email)
-    return VerifyMagicLinkResponse(token=jwt_token, user_id=user.id)
+    jwt_token = AuthUtil().create_jwt_token(email=email)
+    return VerifyMagicLinkResponse(token=jwt_token, user_id=user_id)
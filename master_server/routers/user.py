@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends
 from ..database.config import get_session, AsyncSession
 from ..database.user.model import User
-from ..database.user.schema import UserResponseSchema, UserPatchSchema
+from ..database.user.schema import (
+    UserAuthSchema,
+    UserResponseSchema,
+    UserPatchSchema,
+)
 from ..database.user.service import UserService
 from ..database.user.exception import UsernameAlreadyTaken, EmailAlreadyTaken
-from ..dependencies.auth import get_current_user, get_current_active_user
-from ..exceptions.http import BadRequestHTTPException
+from ..dependencies.auth import get_current_user, get_current_auth_user
+from ..exceptions.http import BadRequestHTTPException, NotFoundHTTPException
 from ..utils.logging import AppLogger
-from ..utils.auth import AuthUtil
+from ..utils.response import ModelResponse
 
 
 logger = AppLogger().get_logger()
@@ -23,33 +27,32 @@ async def get_user(user: User = Depends(get_current_user)):
     return logged in user information
     """
 
-    return UserResponseSchema(
-        **user.model_dump(), profile_url=AuthUtil().get_user_gravatar_url(user.email)
-    )
+    return ModelResponse(UserResponseSchema.model_validate(user))
 
 
 @router.patch("", response_model=UserResponseSchema)
 async def patch_user(
     model: UserPatchSchema,
-    user: User = Depends(get_current_user),
+    user: UserAuthSchema = Depends(get_current_auth_user),
     db_session: AsyncSession = Depends(get_session),
 ):
     """
-    Patch user
+    Patch user, the user is only authorized and updated without loading its row
     """
     user_service = UserService(db_session=db_session)
 
     try:
-        new_user = await user_service.update_user(
+        new_user = await user_service.patch_user(
             user=user, **(model.model_dump(exclude_none=True))
         )
-        return UserResponseSchema(
-            **new_user.model_dump(),
-            profile_url=AuthUtil().get_user_gravatar_url(new_user.email),
-        )
     except UsernameAlreadyTaken as e:
         logger.error(f"error in /user [PATCH]: {e.message}")
         raise BadRequestHTTPException(msg="Username is already taken")
     except EmailAlreadyTaken as e:
         logger.error(f"error in /user [PATCH]: {e.message}")
         raise BadRequestHTTPException(msg="Email is already taken")
+
+    if new_user is None:
+        raise NotFoundHTTPException("User not found")
+
+    return ModelResponse(new_user)
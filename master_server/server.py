@@ -1,53 +1,114 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import Optional
 from .routers import auth_router, user_router
-from .config import get_settings
-from .config import Environment
+from .internal import admin_router, metrics_router
+from .config import Environment, Settings, get_settings
+from .database.config import async_session, engine
+from .utils.email import create_email_worker
+from .utils.login_token import create_login_token_purger
+from .utils.metrics import MetricsMiddleware, instrument_engine
+from .utils.pubsub import pubsub
+from .utils.query_inspector import QueryInspectorMiddleware
+from .websockets.test import transcription_websocket
 
 
 # Context manager that will run before the server starts and after the server stops
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    email_worker = None
+    if get_settings().EMAIL_WORKER_ENABLED:
+        email_worker = create_email_worker(async_session)
+        email_worker.start()
+
+    login_token_purger = None
+    if get_settings().LOGIN_TOKEN_PURGE_ENABLED:
+        login_token_purger = create_login_token_purger(async_session)
+        login_token_purger.start()
+
     # Important to yield after running things before the server starts
     yield
 
+    if email_worker is not None:
+        await email_worker.stop()
+
+    if login_token_purger is not None:
+        await login_token_purger.stop()
+
+    # Send pending websocket broadcasts and release the LISTEN connection
+    await pubsub.close()
+
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Create the FastAPI app, encoding responses with orjson.
+
+    Parameters:
+
+        app_settings (Optional[Settings]): Settings to build the app with, defaults to get_settings().
+
+    Returns:
+
+        FastAPI: The app with its middlewares and routes.
+    """
+    app_settings = app_settings or get_settings()
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+    # Add the CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=app_settings.ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Set production settings
+    if app_settings.ENVIRONMENT == Environment.PRODUCTION.value:
+        app.openapi_url = None
+        app.docs_url = None
+        app.redoc_url = None
+        app.debug = False
+
+    # Set development settings
+    elif app_settings.ENVIRONMENT == Environment.DEVELOPMENT.value:
+        app.debug = True
 
-# Create the FastAPI app
-app = FastAPI()
+    # Metrics are hidden in production like the docs, unless enabled explicitly
+    metrics_enabled = app_settings.METRICS_ENABLED
+    if metrics_enabled is None:
+        metrics_enabled = app_settings.ENVIRONMENT != Environment.PRODUCTION.value
 
-# Get the settings
-app_settings = get_settings()
+    if metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        instrument_engine(engine)
 
-# Add the CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=app_settings.ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    if app_settings.QUERY_INSPECTOR_ENABLED:
+        app.add_middleware(
+            QueryInspectorMiddleware,
+            max_queries=app_settings.QUERY_BUDGET_MAX_QUERIES,
+            max_db_seconds=app_settings.QUERY_BUDGET_MAX_DB_SECONDS,
+        )
 
-# Set production settings
-if app_settings.ENVIRONMENT == Environment.PRODUCTION.value:
-    app.openapi_url = None
-    app.docs_url = None
-    app.redoc_url = None
-    app.debug = False
+    # Route handlers
 
-# Set development settings
-elif app_settings.ENVIRONMENT == Environment.DEVELOPMENT.value:
-    app.debug = True
+    # Index route
+    @app.get("/")
+    async def index():
+        return {"message": "Master Server API"}
 
+    app.include_router(auth_router)
+    app.include_router(user_router)
+    app.include_router(admin_router)
 
-# Route handlers
+    if metrics_enabled:
+        app.include_router(metrics_router)
 
+    app.add_api_websocket_route("/ws/transcription", transcription_websocket)
 
-# Index route
-@app.get("/")
-async def index():
-    return {"message": "Master Server API"}
+    return app
 
 
-app.include_router(auth_router)
-app.include_router(user_router)
+app = create_app()
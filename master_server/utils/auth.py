@@ -2,17 +2,50 @@ import string
 import random
 import hashlib
 from typing import Optional
-from jose import JWTError, jwt
+from jose import JWTError
 from datetime import datetime, timedelta
+from functools import lru_cache
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from urllib.parse import urlencode
 from .logging import AppLogger
+from .jwt_backend import get_jwt_backend, verified_token_cache
 from ..config import get_settings, Environment
+from ..constants.email_constants import (
+    MAGIC_LINK_KEY,
+    MAGIC_LINK_SUBJECT,
+    MAGIC_LINK_HTML_CONTENT,
+)
+from ..constants.user_constants import GRAVATAR_BASE_URL, GRAVATAR_HASH_CACHE_SIZE
 
 logger = AppLogger().get_logger()
 
 
+@lru_cache(maxsize=GRAVATAR_HASH_CACHE_SIZE)
+def get_gravatar_hash(email: str) -> str:
+    return hashlib.md5(email.lower().encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=32)
+def get_gravatar_query(default_url: str, size: int) -> str:
+    return urlencode({"d": default_url, "s": str(size)})
+
+
+def hash_login_token(token: str) -> str:
+    """
+    Hash a login token for storage, tokens are random so no salt is needed
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_gravatar_url(email: str, default_url: str = "identicon", size: int = 40) -> str:
+    """
+    Get a gravatar url, the email hash and query string are cached
+    """
+    email_hash = get_gravatar_hash(email)
+    return f"{GRAVATAR_BASE_URL}{email_hash}?{get_gravatar_query(default_url, size)}"
+
+
 class AuthUtil:
     """
     Utilities for authentication
@@ -20,7 +53,7 @@ class AuthUtil:
 
     def __init__(self):
         self.settings = get_settings()
-        pass
+        self.jwt_backend = get_jwt_backend()
 
     def __generate_random_string__(self, length: int) -> str:
         characters = string.ascii_letters + string.digits
@@ -52,16 +85,15 @@ class AuthUtil:
             "exp": datetime.now()
             + timedelta(minutes=self.settings.JWT_EXPIRATION_MINUTES),
         }
-        return jwt.encode(
-            to_encode,
-            self.settings.JWT_SECRET_KEY,
-            algorithm=self.settings.JWT_ALGORITHM,
-        )
+        return self.jwt_backend.encode(to_encode)
 
     def verify_jwt_token(self, token: str) -> Optional[str]:
         """
         Verify a JWT token and extract the email.
 
+        Verified tokens are cached until they expire, so a token reused by a client
+        is only verified once.
+
         Parameters:
 
             token (str): The JWT token to verify.
@@ -70,15 +102,38 @@ class AuthUtil:
 
             [str]: The email extracted from the token if valid, None otherwise.
         """
-        try:
-            payload = jwt.decode(
-                token,
-                self.settings.JWT_SECRET_KEY,
-                algorithms=[self.settings.JWT_ALGORITHM],
-            )
-            return payload.get("sub")
-        except JWTError:
-            return None
+        payload = verified_token_cache.get(token)
+        if payload is None:
+            try:
+                payload = self.jwt_backend.decode(token)
+            except JWTError:
+                return None
+            verified_token_cache.set(token, payload)
+
+        return payload.get("sub")
+
+    def build_magic_link(
+        self, url: str, token: str, base_url: Optional[str] = None
+    ) -> str:
+        """
+        Build the magic link url for a login token.
+
+        Parameters:
+
+            url (str): The URL for the magic link.
+
+            token (str): The login token to include in the magic link.
+
+            base_url (str): Base url of the magic link. In PRODUCTION, it will use env URL_PREFIX.
+
+        Returns:
+
+            str: The magic link.
+        """
+        if self.settings.ENVIRONMENT == Environment.PRODUCTION.value:
+            base_url = self.settings.URL_PREFIX
+
+        return f"{base_url}{url}?token={token}"
 
     def send_magic_link(
         self, url: str, email: str, token: str, base_url: Optional[str] = None
@@ -101,15 +156,12 @@ class AuthUtil:
             bool: True if the magic link was sent successfully, False otherwise.
 
         """
-        if self.settings.ENVIRONMENT == Environment.PRODUCTION.value:
-            base_url = self.settings.URL_PREFIX
-
-        link = f"{base_url}{url}?token={token}"
+        link = self.build_magic_link(url=url, token=token, base_url=base_url)
         message = Mail(
             from_email=self.settings.SENDGRID_FROM_EMAIL,
             to_emails=email,
-            subject="Your Magic Link Login",
-            html_content=f"Click <a href='{link}'>here</a> to log in.",
+            subject=MAGIC_LINK_SUBJECT,
+            html_content=MAGIC_LINK_HTML_CONTENT.replace(MAGIC_LINK_KEY, link),
         )
         try:
             sg = SendGridAPIClient(self.settings.SENDGRID_API_KEY)
@@ -146,14 +198,4 @@ class AuthUtil:
             str: The user's gravatar URL
 
         """
-        # Encode the email to lowercase and then to bytes
-        email_encoded = email.lower().encode("utf-8")
-
-        # Generate the MD5 hash of the email
-        email_hash = hashlib.md5(email_encoded).hexdigest()
-
-        # Construct the URL with encoded query parameters
-        query_params = urlencode({"d": default_url, "s": str(size)})
-        gravatar_url = f"https://www.gravatar.com/avatar/{email_hash}?{query_params}"
-
-        return gravatar_url
+        return get_gravatar_url(email, default_url=default_url, size=size)
@@ -0,0 +1,149 @@
+import asyncio
+import csv
+import io
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import BinaryIO, Union
+
+# Columns holding JSON objects when importing CSV
+CSV_JSON_COLUMNS = ("address", "phone")
+
+
+class InvalidRow(Exception):
+    """
+    A row that could not be parsed, reported as a reject instead of aborting the import
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Union[str, InvalidRow]]:
+    """
+    Split a stream of byte chunks into decoded lines, without reading it all in memory.
+    Lines that are not valid UTF-8 are returned as invalid rows.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield decode_line(line)
+
+    if buffer:
+        yield decode_line(buffer)
+
+
+def decode_line(line: bytes) -> Union[str, InvalidRow]:
+    # UTF-8 never uses the newline byte inside a multi-byte character, so every line
+    # can be decoded on its own
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return InvalidRow(f"Invalid UTF-8: {e}")
+
+
+async def iter_ndjson(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Union[dict, InvalidRow]]:
+    """
+    Parse newline delimited JSON objects. Blank lines are skipped.
+    """
+    async for line in iter_lines(chunks):
+        if isinstance(line, InvalidRow):
+            yield line
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield InvalidRow(f"Invalid JSON: {e}")
+            continue
+
+        if isinstance(row, dict):
+            yield row
+        else:
+            yield InvalidRow("Row must be a JSON object")
+
+
+async def iter_csv_records(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Union[list[str], InvalidRow]]:
+    """
+    Parse CSV records, quoted fields may span several lines. Blank lines are skipped.
+    """
+    lines: list[str] = []
+    quotes = 0
+    async for line in iter_lines(chunks):
+        if isinstance(line, InvalidRow):
+            lines, quotes = [], 0
+            yield line
+            continue
+
+        # An odd number of quotes means a quoted field continues on the next line
+        lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+
+        record = "\n".join(lines)
+        lines, quotes = [], 0
+        if record.strip():
+            yield next(csv.reader(io.StringIO(record)))
+
+    if lines:
+        yield InvalidRow("Unterminated quoted field")
+
+
+async def iter_csv(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Union[dict, InvalidRow]]:
+    """
+    Parse CSV rows with a header line. Empty values are read as missing.
+    """
+    records = iter_csv_records(chunks)
+
+    try:
+        header = await anext(records)
+    except StopAsyncIteration:
+        return
+
+    if isinstance(header, InvalidRow):
+        yield header
+        return
+
+    async for values in records:
+        if isinstance(values, InvalidRow):
+            yield values
+            continue
+
+        if len(values) != len(header):
+            yield InvalidRow(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+
+        row = {key: value for key, value in zip(header, values) if value != ""}
+        try:
+            for column in CSV_JSON_COLUMNS:
+                if column in row:
+                    row[column] = json.loads(row[column])
+        except ValueError as e:
+            yield InvalidRow(f"Invalid JSON in {column}: {e}")
+            continue
+
+        yield row
+
+
+async def iter_file_chunks(
+    file: BinaryIO, chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """
+    Adapt a binary file object to an async stream of chunks, read off the event loop
+    """
+    while chunk := await asyncio.to_thread(file.read, chunk_size):
+        yield chunk
@@ -1,20 +1,307 @@
-from typing import List
+import asyncio
+import base64
+import json
+from contextlib import nullcontext
+from typing import Iterable, Optional, Union
 from fastapi import WebSocket
+from .logging import AppLogger
+from .pubsub import PubSubBackend
+from master_server.enums.websocket_enums import SlowConsumerPolicyEnum
+
+logger = AppLogger().get_logger()
+
+# Close code sent to clients disconnected for not keeping up
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def encode_message(message: Union[str, bytes, dict, list]) -> dict:
+    """
+    Build the ASGI send event for a message once, so it can be shared by every recipient
+    """
+    if isinstance(message, bytes):
+        return {"type": "websocket.send", "bytes": message}
+    if not isinstance(message, str):
+        message = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    return {"type": "websocket.send", "text": message}
+
+
+def encode_envelope(event: dict, topic: Optional[str]) -> str:
+    """
+    Serialize an encoded message and its topic for the pub/sub backend
+    """
+    if "bytes" in event:
+        envelope = {"topic": topic, "bytes": base64.b64encode(event["bytes"]).decode()}
+    else:
+        envelope = {"topic": topic, "text": event["text"]}
+    return json.dumps(envelope, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_envelope(payload: str) -> tuple[dict, Optional[str]]:
+    envelope = json.loads(payload)
+    if "bytes" in envelope:
+        return encode_message(base64.b64decode(envelope["bytes"])), envelope["topic"]
+    return encode_message(envelope["text"]), envelope["topic"]
+
+
+class Connection:
+    """
+    An accepted websocket with its own send queue, drained by a sender task.
+
+    Attributes:
+
+        websocket (WebSocket): The client websocket.
+
+        queue (asyncio.Queue): Encoded messages waiting to be sent.
+
+        topics (set[str]): Topics the connection is subscribed to.
+
+        dropped (int): Number of messages dropped because the queue was full.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.topics: set[str] = set()
+        self.dropped = 0
+        self.sender: Optional[asyncio.Task] = None
+
 
 class ConnectionManager:
     """
-    Websockt connection manager
+    Websocket connection manager.
+
+    Broadcasting only enqueues the message on each connection, so a slow client
+    never delays the others. Each connection is drained by its own sender task, and
+    a shared semaphore bounds how many sends are in flight at once.
+
+    With a pub/sub backend, broadcasts are published on a channel and delivered to
+    the connections of every worker subscribed to it, including this one.
+
+    Attributes:
+
+        max_queue_size (int): Maximum number of queued messages per connection.
+
+        policy (SlowConsumerPolicyEnum): What to do when a connection's queue is full.
+
+        max_concurrent_sends (Optional[int]): Maximum number of sends in flight across
+        all connections, unbounded when None.
+
+        pubsub (Optional[PubSubBackend]): Backend delivering broadcasts to every worker,
+        broadcasts only reach this worker's connections when None.
+
+        channel (str): The pub/sub channel of this manager.
     """
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        policy: SlowConsumerPolicyEnum = SlowConsumerPolicyEnum.DROP_OLDEST,
+        max_concurrent_sends: Optional[int] = 1000,
+        pubsub: Optional[PubSubBackend] = None,
+        channel: str = "websocket",
+    ):
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.pubsub = pubsub
+        self.channel = channel
+        self.send_semaphore = (
+            asyncio.Semaphore(max_concurrent_sends) if max_concurrent_sends else None
+        )
+        self.connections: dict[WebSocket, Connection] = {}
+        self.topics: dict[str, set[Connection]] = {}
+        self._closing: set[asyncio.Task] = set()
+        self._subscribed = False
+
+    @property
+    def active_connections(self) -> list[WebSocket]:
+        return list(self.connections)
+
+    async def start(self):
+        """
+        Subscribe to broadcasts from other workers, called on the first connect
+        """
+        if self.pubsub is not None and not self._subscribed:
+            self._subscribed = True
+            await self.pubsub.subscribe(self.channel, self._on_published)
+
+    async def connect(self, websocket: WebSocket, topics: Iterable[str] = ()):
+        await self.start()
         await websocket.accept()
-        self.active_connections.append(websocket)
+
+        connection = Connection(websocket, self.max_queue_size)
+        connection.sender = asyncio.create_task(self._send_loop(connection))
+        self.connections[websocket] = connection
+
+        for topic in topics:
+            self.subscribe(websocket, topic)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+
+        for topic in connection.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.topics[topic]
+
+        # Release pending messages so drain() does not wait on them
+        while not connection.queue.empty():
+            connection.queue.get_nowait()
+            connection.queue.task_done()
+
+        if connection.sender is not None and connection.sender is not _current_task():
+            connection.sender.cancel()
+
+    def subscribe(self, websocket: WebSocket, topic: str):
+        connection = self.connections[websocket]
+        connection.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str):
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+
+        connection.topics.discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection)
+            if not subscribers:
+                del self.topics[topic]
+
+    async def send(self, websocket: WebSocket, message: Union[str, bytes, dict, list]):
+        """
+        Queue a message for a single connection
+        """
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, encode_message(message))
+
+    async def broadcast(
+        self,
+        message: Union[str, bytes, dict, list],
+        topic: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """
+        Queue a message for every connection, or only for the subscribers of a topic.
+
+        Parameters:
+
+            message (Union[str, bytes, dict, list]): Text, binary or JSON message.
+            It is encoded once and shared by every recipient.
+
+            topic (Optional[str]): Only send to subscribers of this topic.
+
+            key (Optional[str]): With a pub/sub backend, replaces a message with the
+            same key that has not been published yet.
+
+        Returns:
+
+            int: Number of connections the message was queued for, 0 when it is
+            published through the pub/sub backend.
+        """
+        event = encode_message(message)
+
+        if self.pubsub is not None:
+            await self.start()
+            await self.pubsub.publish(
+                self.channel, encode_envelope(event, topic), key=key
+            )
+            return 0
+
+        return self._broadcast_local(event, topic)
+
+    async def drain(self, websocket: Optional[WebSocket] = None):
+        """
+        Wait until every queued message has been sent, or only those of websocket
+        """
+        if websocket is not None:
+            connections = [self.connections[websocket]]
+        else:
+            connections = list(self.connections.values())
+
+        await asyncio.gather(*(connection.queue.join() for connection in connections))
+
+    async def close(self):
+        """
+        Disconnect every connection and stop their sender tasks
+        """
+        senders = [connection.sender for connection in self.connections.values()]
+        for websocket in list(self.connections):
+            self.disconnect(websocket)
+        await asyncio.gather(*senders, *self._closing, return_exceptions=True)
+
+    def _broadcast_local(self, event: dict, topic: Optional[str]) -> int:
+        if topic is None:
+            connections = list(self.connections.values())
+        else:
+            connections = list(self.topics.get(topic, ()))
+
+        for connection in connections:
+            self._enqueue(connection, event)
+
+        return len(connections)
+
+    def _on_published(self, messages: list[str]):
+        for payload in messages:
+            event, topic = decode_envelope(payload)
+            self._broadcast_local(event, topic)
+
+    def _enqueue(self, connection: Connection, event: dict):
+        try:
+            connection.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            connection.dropped += 1
+
+        if self.policy == SlowConsumerPolicyEnum.DROP_OLDEST:
+            connection.queue.get_nowait()
+            connection.queue.task_done()
+            connection.queue.put_nowait(event)
+
+        elif self.policy == SlowConsumerPolicyEnum.DISCONNECT:
+            logger.warning("Disconnecting slow websocket consumer")
+            self.disconnect(connection.websocket)
+
+            # Close in the background, the client is too slow to wait on
+            task = asyncio.create_task(
+                self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE)
+            )
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def _send_loop(self, connection: Connection):
+        queue = connection.queue
+        semaphore = self.send_semaphore or nullcontext()
+
+        while True:
+            event = await queue.get()
+            try:
+                async with semaphore:
+                    await connection.websocket.send(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Exception in ConnectionManager: {e}")
+                self.disconnect(connection.websocket)
+                return
+            finally:
+                queue.task_done()
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception as e:
+            logger.error(f"Exception in ConnectionManager: {e}")
+
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
\ No newline at end of file
+def _current_task() -> Optional[asyncio.Task]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
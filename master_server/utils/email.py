@@ -0,0 +1,252 @@
+import asyncio
+from itertools import groupby
+from typing import Optional
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from .logging import AppLogger
+from ..config import get_settings
+from ..database.email.model import EmailOutbox
+from ..database.email.service import EmailOutboxService
+
+logger = AppLogger().get_logger()
+
+# SendGrid accepts up to 1000 personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+
+class EmailDeliveryError(Exception):
+    def __init__(self, message: str = ""):
+        self.message = message
+        super().__init__(message)
+
+
+class EmailTransport:
+    """
+    Delivers a batch of outbox emails sharing the same subject and content
+    """
+
+    async def send(self, messages: list[EmailOutbox]):
+        """
+        Deliver the emails.
+
+        Parameters:
+
+            messages (list[EmailOutbox]): Emails with the same subject and html_content.
+
+        Raises:
+
+            EmailDeliveryError: If the emails could not be delivered.
+        """
+        raise NotImplementedError
+
+
+class SendGridTransport(EmailTransport):
+    """
+    Sends each batch as a single SendGrid request with one personalization per recipient
+    """
+
+    def __init__(self, api_key: str, from_email: str):
+        self.client = SendGridAPIClient(api_key)
+        self.from_email = from_email
+
+    def build_mail(self, messages: list[EmailOutbox]) -> Mail:
+        mail = Mail(
+            from_email=self.from_email,
+            subject=messages[0].subject,
+            html_content=messages[0].html_content,
+        )
+        for message in messages:
+            personalization = Personalization()
+            personalization.add_to(To(message.recipient))
+            for key, value in (message.substitutions or {}).items():
+                personalization.add_substitution(Substitution(key, value))
+            mail.add_personalization(personalization)
+
+        return mail
+
+    async def send(self, messages: list[EmailOutbox]):
+        mail = self.build_mail(messages)
+
+        # The SendGrid client is blocking, keep it off the event loop
+        response = await asyncio.to_thread(self.client.send, mail)
+        if response.status_code != 202:
+            raise EmailDeliveryError(
+                f"SendGrid responded with {response.status_code}: {response.body}"
+            )
+
+
+class InMemoryEmailTransport(EmailTransport):
+    """
+    Keeps sent emails in memory, used by tests
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.batches: list[list[EmailOutbox]] = []
+        self.fail_times = fail_times
+
+    @property
+    def sent(self) -> list[EmailOutbox]:
+        return [message for batch in self.batches for message in batch]
+
+    async def send(self, messages: list[EmailOutbox]):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise EmailDeliveryError("Simulated delivery failure")
+
+        self.batches.append(list(messages))
+
+
+class EmailOutboxWorker:
+    """
+    Background worker delivering emails from the outbox.
+
+    Attributes:
+
+        session_factory (async_sessionmaker): Factory for the worker's database sessions.
+
+        transport (EmailTransport): Transport used to deliver emails.
+
+        concurrency (int): Maximum number of batches delivered at the same time.
+
+        batch_size (int): Maximum number of emails claimed per poll.
+
+        max_attempts (int): Emails are marked as FAILED after this many attempts.
+
+        backoff_seconds (float): Delay before the first retry, doubled on each attempt.
+
+        poll_interval (float): Delay between polls when the outbox is empty.
+
+        lease_seconds (float): How long claimed emails are hidden from other workers.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        transport: EmailTransport,
+        concurrency: int = 4,
+        batch_size: int = 100,
+        max_attempts: int = 5,
+        backoff_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def group_batches(messages: list[EmailOutbox]) -> list[list[EmailOutbox]]:
+        """
+        Group emails sharing the same subject and content into transport batches
+        """
+
+        def key(message: EmailOutbox):
+            return message.subject, message.html_content
+
+        batches = []
+        for _, group in groupby(sorted(messages, key=key), key=key):
+            group = list(group)
+            for start in range(0, len(group), MAX_PERSONALIZATIONS):
+                batches.append(group[start : start + MAX_PERSONALIZATIONS])
+        return batches
+
+    async def run_once(self) -> int:
+        """
+        Claim due emails and deliver them.
+
+        Returns:
+
+            int: Number of claimed emails.
+        """
+        async with self.session_factory() as session:
+            service = EmailOutboxService(db_session=session)
+            messages = await service.claim_due(
+                limit=self.batch_size, lease_seconds=self.lease_seconds
+            )
+            if not messages:
+                return 0
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def deliver(batch: list[EmailOutbox]) -> Optional[str]:
+                async with semaphore:
+                    try:
+                        await self.transport.send(batch)
+                        return None
+                    except Exception as e:
+                        logger.error(f"Exception in EmailOutboxWorker: {e}")
+                        return str(e)
+
+            batches = self.group_batches(messages)
+            errors = await asyncio.gather(*(deliver(batch) for batch in batches))
+
+            sent = []
+            for batch, error in zip(batches, errors):
+                if error is None:
+                    sent.extend(batch)
+                else:
+                    await service.mark_failed(
+                        batch,
+                        error=error,
+                        max_attempts=self.max_attempts,
+                        backoff_seconds=self.backoff_seconds,
+                    )
+
+            if sent:
+                await service.mark_sent(sent)
+
+            return len(messages)
+
+    async def run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Exception in EmailOutboxWorker: {e}")
+                claimed = 0
+
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def create_email_worker(session_factory: async_sessionmaker) -> EmailOutboxWorker:
+    """
+    Create the outbox worker configured from settings, delivering through SendGrid
+    """
+    settings = get_settings()
+    return EmailOutboxWorker(
+        session_factory=session_factory,
+        transport=SendGridTransport(
+            api_key=settings.SENDGRID_API_KEY,
+            from_email=settings.SENDGRID_FROM_EMAIL,
+        ),
+        concurrency=settings.EMAIL_WORKER_CONCURRENCY,
+        batch_size=settings.EMAIL_WORKER_BATCH_SIZE,
+        max_attempts=settings.EMAIL_WORKER_MAX_ATTEMPTS,
+        backoff_seconds=settings.EMAIL_WORKER_BACKOFF_SECONDS,
+        poll_interval=settings.EMAIL_WORKER_POLL_INTERVAL,
+    )
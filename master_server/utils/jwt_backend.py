@@ -0,0 +1,117 @@
+import time
+import hashlib
+from functools import lru_cache
+from typing import Optional
+from jose import JWTError, jwk, jwt
+from .cache import LRUCacheBackend
+from ..config import get_settings
+
+
+class JWTBackend:
+    """
+    Encodes and verifies JWT tokens with a fixed key and algorithm
+    """
+
+    def encode(self, claims: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        """
+        Verify the token signature and expiry and return its claims.
+
+        Raises:
+
+            JWTError: If the token is invalid or expired.
+        """
+        raise NotImplementedError
+
+
+class JoseJWTBackend(JWTBackend):
+    """
+    python-jose backend, the verification key is constructed once
+    """
+
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.key = jwk.construct(secret_key, algorithm)
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        return jwt.decode(token, self.key, algorithms=[self.algorithm])
+
+
+class PyJWTBackend(JWTBackend):
+    """
+    PyJWT backend, requires the optional `pyjwt` package
+    """
+
+    def __init__(self, secret_key: str, algorithm: str):
+        import jwt as pyjwt
+
+        self.pyjwt = pyjwt
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return self.pyjwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self.pyjwt.decode(
+                token, self.secret_key, algorithms=[self.algorithm]
+            )
+        except self.pyjwt.PyJWTError as e:
+            raise JWTError(str(e)) from e
+
+
+JWT_BACKENDS = {
+    "jose": JoseJWTBackend,
+    "pyjwt": PyJWTBackend,
+}
+
+
+@lru_cache
+def get_jwt_backend() -> JWTBackend:
+    settings = get_settings()
+    backend = JWT_BACKENDS[settings.JWT_BACKEND]
+    return backend(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+
+
+class VerifiedTokenCache:
+    """
+    Claims of verified tokens, keyed by token hash and evicted at the token's expiry.
+
+    Tokens without an exp claim are never cached.
+
+    Attributes:
+
+        backend (LRUCacheBackend): Bounded storage of the verified claims.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.backend = LRUCacheBackend(max_size=max_size)
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        return self.backend.get(self.token_key(token))
+
+    def set(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+
+        ttl_seconds = exp - time.time()
+        if ttl_seconds > 0:
+            self.backend.set(self.token_key(token), claims, ttl_seconds=ttl_seconds)
+
+    def clear(self):
+        self.backend.clear()
+
+
+verified_token_cache = VerifiedTokenCache(max_size=get_settings().JWT_CACHE_MAX_SIZE)
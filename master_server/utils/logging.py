@@ -1,5 +1,9 @@
+import json
 import logging
+import queue
 import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 from rich.console import Console
 from rich.logging import RichHandler
@@ -24,6 +28,94 @@ class RichConsoleHandler(RichHandler):
         )
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single line JSON objects
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "process": record.process,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room in a full queue instead of failing to stop
+        self.queue.put(self._sentinel)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread that formats and writes them, so logging
+    never blocks the event loop on formatting or I/O.
+
+    The formatter set on this handler is used by the background handler.
+
+    Examples:
+        In a logging config file:
+
+        ```ini
+        [handler_stream]
+        class = master_server.utils.logging.AsyncQueueHandler
+        args = (sys.stdout,)
+        formatter = json
+        ```
+
+    Attributes:
+
+        target (logging.Handler): Handler writing the records in the background thread.
+
+        dropped (int): Records dropped because the queue was full.
+    """
+
+    def __init__(self, stream=None, max_size: int = 10000):
+        super().__init__(queue.Queue(maxsize=max_size))
+        self.target = logging.StreamHandler(stream)
+        self.listener = _QueueListener(
+            self.queue, self.target, respect_handler_level=False
+        )
+        self.listener.start()
+        self.dropped = 0
+        self._closed = False
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments, formatting happens in the background thread.
+        # Arguments are merged now since they may be mutated after the call returns.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Drop the record rather than block the caller when output can't keep up
+            self.dropped += 1
+
+    def close(self):
+        # Called by logging.shutdown at exit, writes the queued records first
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+            self.target.close()
+        super().close()
+
+
 class ElapsedTimeLogger:
     """
     Context manager to log elapsed time for code execution.
@@ -48,8 +140,8 @@ class ElapsedTimeLogger:
 
     def __enter__(self):
         self._logger.info(self.message)
-        self.start = time.time()
+        self.start = time.perf_counter()
 
     def __exit__(self, *args):
-        elapsed_time = time.time() - self.start
+        elapsed_time = time.perf_counter() - self.start
         self._logger.info(f"Finished {self.message} in {elapsed_time} seconds")
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from .logging import AppLogger
+from ..config import get_settings
+from ..database.email.service import EmailOutboxService
+from ..database.login_token.service import LoginTokenService
+
+logger = AppLogger().get_logger()
+
+
+class LoginTokenPurger:
+    """
+    Background job deleting expired and used login tokens, so token lookups stay small index hits.
+
+    Sent and failed outbox emails are deleted as well once email_retention_seconds
+    passed, they are the other place magic links were written to.
+
+    Attributes:
+
+        session_factory (async_sessionmaker): Factory for the job's database sessions.
+
+        interval (float): Delay between purges.
+
+        batch_size (int): Maximum number of rows deleted per statement.
+
+        email_retention_seconds (float): How long sent and failed emails are kept.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        interval: float = 300.0,
+        batch_size: int = 1000,
+        email_retention_seconds: float = 86400.0,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.email_retention_seconds = email_retention_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """
+        Purge expired and used tokens, and sent and failed emails.
+
+        Returns:
+
+            int: Number of deleted tokens and emails.
+        """
+        async with self.session_factory() as session:
+            deleted = await LoginTokenService(db_session=session).purge(
+                batch_size=self.batch_size
+            )
+            deleted += await EmailOutboxService(db_session=session).purge(
+                older_than=datetime.now()
+                - timedelta(seconds=self.email_retention_seconds),
+                batch_size=self.batch_size,
+            )
+            return deleted
+
+    async def run(self):
+        while True:
+            try:
+                deleted = await self.run_once()
+                if deleted:
+                    logger.info(f"Purged {deleted} login tokens and emails")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Exception in LoginTokenPurger: {e}")
+
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def create_login_token_purger(session_factory: async_sessionmaker) -> LoginTokenPurger:
+    """
+    Create the login token purge job configured from settings
+    """
+    settings = get_settings()
+    return LoginTokenPurger(
+        session_factory=session_factory,
+        interval=settings.LOGIN_TOKEN_PURGE_INTERVAL,
+        batch_size=settings.LOGIN_TOKEN_PURGE_BATCH_SIZE,
+        email_retention_seconds=settings.EMAIL_OUTBOX_RETENTION_SECONDS,
+    )
@@ -0,0 +1,261 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncEngine
+from ..database.pool import pool_metrics
+from .query_timing import time_queries
+
+# Prometheus default buckets, in seconds
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+
+# Route label of requests that did not match any route, keeps label cardinality bounded
+UNMATCHED_ROUTE = "<unmatched>"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus format
+
+    Attributes:
+
+        buckets (tuple[float, ...]): Upper bounds of the buckets, +Inf is implicit.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+
+class RequestMetrics:
+    """
+    Database usage of the request being handled, filled in by the engine hooks
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.statuses: dict[int, int] = {}
+        self.latency = Histogram()
+        self.response_bytes = 0
+        self.db_queries = 0
+        self.db_time = Histogram()
+
+
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar(
+    "current_request", default=None
+)
+
+
+class MetricsRegistry:
+    """
+    Per route request statistics, rendered in the Prometheus text format
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def reset(self):
+        self.routes = {}
+
+    def observe_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        response_bytes: int,
+        request: RequestMetrics,
+    ):
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics()
+
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        metrics.latency.observe(seconds)
+        metrics.response_bytes += response_bytes
+        metrics.db_queries += request.queries
+        metrics.db_time.observe(request.db_seconds)
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name: str, kind: str, description: str):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name: str, labels: str, values: Histogram):
+            for bound, count in values.cumulative_counts():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {values.sum}")
+            lines.append(f"{name}_count{{{labels}}} {values.count}")
+
+        routes = sorted(self.routes.items())
+
+        header("http_requests_total", "counter", "Number of HTTP requests.")
+        for (method, route), metrics in routes:
+            for status, count in sorted(metrics.statuses.items()):
+                labels = format_labels(method=method, route=route, status=str(status))
+                lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        header(
+            "http_request_duration_seconds",
+            "histogram",
+            "Time spent handling HTTP requests.",
+        )
+        for (method, route), metrics in routes:
+            labels = format_labels(method=method, route=route)
+            histogram("http_request_duration_seconds", labels, metrics.latency)
+
+        header(
+            "http_response_size_bytes_total",
+            "counter",
+            "Bytes sent in HTTP response bodies.",
+        )
+        for (method, route), metrics in routes:
+            labels = format_labels(method=method, route=route)
+            lines.append(
+                f"http_response_size_bytes_total{{{labels}}} {metrics.response_bytes}"
+            )
+
+        header("db_queries_total", "counter", "Database queries run by HTTP requests.")
+        for (method, route), metrics in routes:
+            labels = format_labels(method=method, route=route)
+            lines.append(f"db_queries_total{{{labels}}} {metrics.db_queries}")
+
+        header(
+            "db_request_duration_seconds",
+            "histogram",
+            "Time spent in database queries per HTTP request.",
+        )
+        for (method, route), metrics in routes:
+            labels = format_labels(method=method, route=route)
+            histogram("db_request_duration_seconds", labels, metrics.db_time)
+
+        pool = pool_metrics.snapshot()
+        header("db_pool_checkouts_total", "counter", "Connection pool checkouts.")
+        lines.append(f"db_pool_checkouts_total {pool['checkouts']}")
+        header(
+            "db_pool_timeouts_total", "counter", "Connection pool checkout timeouts."
+        )
+        lines.append(f"db_pool_timeouts_total {pool['timeouts']}")
+        header(
+            "db_pool_wait_seconds_total",
+            "counter",
+            "Time spent waiting for a pooled connection.",
+        )
+        lines.append(f"db_pool_wait_seconds_total {pool['wait_seconds_total']}")
+        header(
+            "db_pool_wait_seconds_max",
+            "gauge",
+            "Longest wait for a pooled connection.",
+        )
+        lines.append(f"db_pool_wait_seconds_max {pool['wait_seconds_max']}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def format_labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status, response size and database usage per route
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics()
+        token = current_request.set(request)
+        status = 500
+        response_bytes = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            self.registry.observe_request(
+                method=scope["method"],
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                status=status,
+                seconds=elapsed,
+                response_bytes=response_bytes,
+                request=request,
+            )
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Attribute the number and duration of queries to the current request
+    """
+    time_queries(engine.sync_engine, _observe_query)
+
+
+def _observe_query(statement: Optional[str], seconds: float):
+    request = current_request.get()
+    if request is not None:
+        request.queries += 1
+        request.db_seconds += seconds
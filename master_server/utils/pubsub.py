@@ -0,0 +1,338 @@
+import asyncio
+import asyncpg
+import json
+from collections import deque
+from collections.abc import Callable, Hashable
+from typing import Optional
+from sqlalchemy import make_url
+from .logging import AppLogger
+from ..config import get_settings
+
+logger = AppLogger().get_logger()
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7999
+
+Subscriber = Callable[[list[str]], None]
+
+
+class PubSubBackend:
+    """
+    Publishes messages to every process subscribed to a channel.
+
+    Published messages are buffered per channel and sent as a single batch after
+    flush_interval, or as soon as max_batch_size messages are pending. Messages
+    published with the same key while a batch is pending are coalesced, only the
+    latest one is sent.
+
+    Attributes:
+
+        flush_interval (float): How long messages are buffered before being sent.
+
+        max_batch_size (int): Number of pending messages that triggers a flush.
+    """
+
+    def __init__(self, flush_interval: float = 0.01, max_batch_size: int = 100):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.subscribers: dict[str, list[Subscriber]] = {}
+        self._pending: dict[str, dict[Hashable, str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    async def subscribe(self, channel: str, callback: Subscriber):
+        """
+        Call callback with each batch of messages published to channel
+        """
+        self.subscribers.setdefault(channel, []).append(callback)
+
+    async def publish(self, channel: str, message: str, key: Optional[Hashable] = None):
+        """
+        Buffer a message for the next batch.
+
+        Parameters:
+
+            channel (str): The channel to publish to.
+
+            message (str): The message.
+
+            key (Optional[Hashable]): Replaces a pending message published with the
+            same key.
+        """
+        pending = self._pending.setdefault(channel, {})
+        if key is None:
+            key = object()
+        else:
+            # Move the replaced message to the end to keep publish order
+            pending.pop(key, None)
+        pending[key] = message
+
+        if len(pending) >= self.max_batch_size:
+            await self.flush(channel)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self, channel: Optional[str] = None):
+        """
+        Send the pending messages of a channel, or of every channel
+        """
+        async with self._flush_lock:
+            channels = [channel] if channel is not None else list(self._pending)
+            for name in channels:
+                messages = list(self._pending.pop(name, {}).values())
+                if messages:
+                    await self.send_batch(name, messages)
+
+    async def send_batch(self, channel: str, messages: list[str]):
+        """
+        Deliver a batch of messages to the subscribers of channel in every process
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def dispatch(self, channel: str, messages: list[str]):
+        for callback in self.subscribers.get(channel, ()):
+            try:
+                callback(messages)
+            except Exception as e:
+                logger.error(f"Exception in PubSub subscriber: {e}")
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Exception in PubSub flush: {e}")
+
+
+class InMemoryPubSub(PubSubBackend):
+    """
+    Delivers messages within the current process, used by tests and single worker setups
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches: list[tuple[str, list[str]]] = []
+
+    async def send_batch(self, channel: str, messages: list[str]):
+        self.batches.append((channel, messages))
+        self.dispatch(channel, messages)
+
+
+class PostgresPubSub(PubSubBackend):
+    """
+    Delivers messages to every worker through PostgreSQL LISTEN/NOTIFY.
+
+    Each batch is sent as one NOTIFY holding a JSON array of messages, split when it
+    exceeds the payload limit. A message too large for a NOTIFY on its own is stored
+    in the pubsubpayload table and the NOTIFY only carries its id. Subscribers of the
+    publishing worker are called directly, its own notifications are ignored.
+
+    A lost LISTEN connection is restored in the background. Messages published by
+    other workers while it is down are not received.
+
+    Attributes:
+
+        database_url (str): SQLAlchemy URL of the PostgreSQL database.
+
+        payload_retention (float): Seconds stored payloads are kept for listeners.
+
+        reconnect_interval (float): Delay between reconnection attempts.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        *args,
+        payload_retention: float = 60.0,
+        reconnect_interval: float = 1.0,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.database_url = database_url
+        self.payload_retention = payload_retention
+        self.reconnect_interval = reconnect_interval
+        self._connection = None
+        self._connection_lock = asyncio.Lock()
+        self._query_lock = asyncio.Lock()
+        self._listening: set[str] = set()
+        self._received: deque[tuple[str, str]] = deque()
+        self._receiver: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def get_connection(self):
+        """
+        Get the connection used to listen and notify, reconnecting when it was lost
+        """
+        async with self._connection_lock:
+            if self._connection is None or self._connection.is_closed():
+                url = make_url(self.database_url).set(drivername="postgresql")
+                self._connection = await asyncpg.connect(
+                    url.render_as_string(hide_password=False)
+                )
+                self._connection.add_termination_listener(self._on_terminated)
+                self._listening = set()
+
+            for channel in self.subscribers:
+                if channel not in self._listening:
+                    await self._connection.add_listener(channel, self._on_notify)
+                    self._listening.add(channel)
+
+            return self._connection
+
+    async def subscribe(self, channel: str, callback: Subscriber):
+        await super().subscribe(channel, callback)
+        await self.get_connection()
+
+    async def send_batch(self, channel: str, messages: list[str]):
+        # Subscribers of this worker don't depend on the NOTIFY round trip
+        self.dispatch(channel, messages)
+
+        connection = await self.get_connection()
+        async with self._query_lock:
+            for payload in self.split_payloads(messages):
+                if len(payload.encode("utf-8")) > MAX_NOTIFY_PAYLOAD_BYTES:
+                    payload = await self._store_payload(connection, channel, payload)
+                await connection.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    @staticmethod
+    def split_payloads(messages: list[str]) -> list[str]:
+        """
+        Encode messages as JSON arrays that fit in a NOTIFY payload. A single message
+        exceeding the limit is returned alone, it is sent through the payload table.
+        """
+        payload = json.dumps(messages, separators=(",", ":"))
+        if (
+            len(messages) == 1
+            or len(payload.encode("utf-8")) <= MAX_NOTIFY_PAYLOAD_BYTES
+        ):
+            return [payload]
+
+        middle = len(messages) // 2
+        return PostgresPubSub.split_payloads(
+            messages[:middle]
+        ) + PostgresPubSub.split_payloads(messages[middle:])
+
+    async def close(self):
+        self._closed = True
+        for task in (self._reconnect_task, self._receiver):
+            if task is not None:
+                task.cancel()
+        await super().close()
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+        self._connection = None
+
+    async def _store_payload(self, connection, channel: str, payload: str) -> str:
+        """
+        Store a payload too large for a NOTIFY, returning the reference to send instead
+        """
+        payload_id = await connection.fetchval(
+            "INSERT INTO pubsubpayload (channel, payload, created_at) "
+            "VALUES ($1, $2, now()) RETURNING id",
+            channel,
+            payload,
+        )
+        await connection.execute(
+            "DELETE FROM pubsubpayload WHERE created_at < now() - make_interval(secs => $1)",
+            self.payload_retention,
+        )
+        return json.dumps({"id": payload_id})
+
+    async def _load_payload(self, payload_id: int) -> Optional[str]:
+        connection = await self.get_connection()
+        async with self._query_lock:
+            return await connection.fetchval(
+                "SELECT payload FROM pubsubpayload WHERE id = $1", payload_id
+            )
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        # Messages of this worker were dispatched when they were sent
+        if pid == connection.get_server_pid():
+            return
+
+        self._received.append((channel, payload))
+        if self._receiver is None:
+            self._receiver = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        """
+        Dispatch received notifications in order, reading stored payloads
+        """
+        try:
+            while self._received:
+                channel, payload = self._received.popleft()
+                try:
+                    messages = json.loads(payload)
+                    if isinstance(messages, dict):
+                        stored = await self._load_payload(messages["id"])
+                        if stored is None:
+                            logger.error(f"Stored payload {messages['id']} expired")
+                            continue
+                        messages = json.loads(stored)
+                except ValueError as e:
+                    logger.error(f"Invalid NOTIFY payload: {e}")
+                    continue
+                except Exception as e:
+                    logger.error(f"Exception in PubSub receive: {e}")
+                    continue
+
+                self.dispatch(channel, messages)
+        finally:
+            self._receiver = None
+
+    def _on_terminated(self, connection):
+        if self._closed or connection is not self._connection:
+            return
+
+        logger.error("PubSub connection lost, reconnecting")
+        if self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """
+        Restore the connection and its listeners, retrying until it succeeds
+        """
+        try:
+            while True:
+                try:
+                    await self.get_connection()
+                    return
+                except Exception as e:
+                    logger.error(f"Exception in PubSub reconnect: {e}")
+                    await asyncio.sleep(self.reconnect_interval)
+        finally:
+            self._reconnect_task = None
+
+
+def create_pubsub() -> PubSubBackend:
+    """
+    Create the pub/sub backend configured from settings
+    """
+    settings = get_settings()
+    options = {
+        "flush_interval": settings.PUBSUB_FLUSH_INTERVAL,
+        "max_batch_size": settings.PUBSUB_MAX_BATCH_SIZE,
+    }
+
+    if settings.PUBSUB_BACKEND == "postgres":
+        return PostgresPubSub(
+            settings.PG_DATABASE_URL,
+            payload_retention=settings.PUBSUB_PAYLOAD_RETENTION_SECONDS,
+            reconnect_interval=settings.PUBSUB_RECONNECT_INTERVAL,
+            **options,
+        )
+    if settings.PUBSUB_BACKEND == "memory":
+        return InMemoryPubSub(**options)
+
+    raise ValueError(f"Unknown pub/sub backend: {settings.PUBSUB_BACKEND}")
+
+
+pubsub = create_pubsub()
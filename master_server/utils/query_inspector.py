@@ -0,0 +1,165 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Union
+from sqlalchemy.engine import Engine
+from .logging import AppLogger
+from .query_timing import time_queries
+
+logger = AppLogger().get_logger()
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBERED_PLACEHOLDER = re.compile(r"\$\d+")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_REPEATED_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape, so repeated queries with different values group
+    together. Literals become ? and placeholder lists or VALUES rows of any length
+    become (...).
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBERED_PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    return _REPEATED_LIST.sub("(...)", statement)
+
+
+class QueryRecorder:
+    """
+    Statements executed while recording, with their duration
+
+    Attributes:
+
+        queries (list[tuple[str, float]]): Normalized statement and duration in seconds.
+    """
+
+    def __init__(self):
+        self.queries: list[tuple[str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def duration(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def record(self, statement: str, seconds: float):
+        self.queries.append((normalize_sql(statement), seconds))
+
+    def grouped(self) -> list[tuple[str, int, float]]:
+        """
+        Statements with their execution count and total duration, most repeated first.
+        A statement repeated many times in one request usually is an N+1 query.
+        """
+        groups: dict[str, list] = {}
+        for statement, seconds in self.queries:
+            group = groups.setdefault(statement, [0, 0.0])
+            group[0] += 1
+            group[1] += seconds
+
+        return sorted(
+            (
+                (statement, count, seconds)
+                for statement, (count, seconds) in groups.items()
+            ),
+            key=lambda group: (-group[1], -group[2]),
+        )
+
+    def report(self) -> str:
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f}ms"]
+        for statement, count, seconds in self.grouped():
+            lines.append(f"  {count}x {seconds * 1000:.1f}ms {statement}")
+        return "\n".join(lines)
+
+
+current_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar(
+    "current_recorder", default=None
+)
+
+
+def install_query_inspector(target: Union[Engine, type[Engine]] = Engine):
+    """
+    Record statements on target into the current recorder. Defaults to every engine.
+    """
+    time_queries(target, _record_query)
+
+
+def _record_query(statement: Optional[str], seconds: float):
+    recorder = current_recorder.get()
+    if recorder is not None:
+        recorder.record(statement or "", seconds)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """
+    Record the statements executed in the block
+    """
+    install_query_inspector()
+
+    recorder = QueryRecorder()
+    token = current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        current_recorder.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryRecorder]:
+    """
+    Fail when the block executes more than max_queries statements.
+
+    Examples:
+        ```python
+        with assert_max_queries(2):
+            await user_service.update_user(user, username="new")
+        ```
+    """
+    with record_queries() as recorder:
+        yield recorder
+
+    if recorder.count > max_queries:
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, got {recorder.report()}"
+        )
+
+
+class QueryInspectorMiddleware:
+    """
+    ASGI middleware logging requests that exceed a query count or database time budget,
+    with the statements they ran grouped by shape.
+
+    Attributes:
+
+        max_queries (int): Query count budget per request.
+
+        max_db_seconds (float): Database time budget per request.
+    """
+
+    def __init__(self, app, max_queries: int = 20, max_db_seconds: float = 0.5):
+        self.app = app
+        self.max_queries = max_queries
+        self.max_db_seconds = max_db_seconds
+        install_query_inspector()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with record_queries() as recorder:
+            await self.app(scope, receive, send)
+
+        if recorder.count > self.max_queries or recorder.duration > self.max_db_seconds:
+            logger.warning(
+                f"Query budget exceeded by {scope['method']} {scope['path']}: "
+                f"{recorder.report()}"
+            )
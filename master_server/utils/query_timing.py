@@ -0,0 +1,52 @@
+import time
+from collections.abc import Callable
+from typing import Optional, Union
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Called with the executed statement and its duration in seconds
+QueryObserver = Callable[[Optional[str], float], None]
+
+_timed: set[tuple] = set()
+
+
+def time_queries(target: Union[Engine, type[Engine]], observer: QueryObserver):
+    """
+    Call observer with every statement executed on target and its duration.
+
+    Statements failing in the database are reported as well, so their start time is
+    not left behind to skew the next duration. Each observer keeps its own start times
+    on the connection, observing the same target twice has no effect.
+
+    Parameters:
+
+        target (Union[Engine, type[Engine]]): Engine to time, or Engine for all of them.
+
+        observer (QueryObserver): Receives the statement and its duration in seconds.
+    """
+    if (target, observer) in _timed:
+        return
+    _timed.add((target, observer))
+
+    start_times_key = ("query_start_time", observer)
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault(start_times_key, []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get(start_times_key)
+        if start_times:
+            observer(statement, time.perf_counter() - start_times.pop())
+
+    def handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None:
+            after_cursor_execute(
+                connection, None, exception_context.statement, None, None, False
+            )
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    event.listen(target, "after_cursor_execute", after_cursor_execute)
+    event.listen(target, "handle_error", handle_error)
@@ -0,0 +1,19 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class ModelResponse(JSONResponse):
+    """
+    Serializes an already validated pydantic model straight to JSON bytes.
+
+    Returning it from a route skips FastAPI's response_model handling, which would
+    dump the model to a dict, validate it again and encode the dict. Keep the
+    response_model on the route for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return to_json(content)
@@ -11,6 +11,11 @@ class SingletonMeta(type):
     _lock: Lock = Lock()
 
     def __call__(cls, *args, **kwargs):
+        # Fast path without locking once the instance exists
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+
         with cls._lock:
             if cls not in cls._instances:
                 instance = super().__call__(*args, **kwargs)
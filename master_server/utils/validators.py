@@ -0,0 +1,25 @@
+import re
+
+# Character classes compiled once, values are matched without building strings
+WORD_PATTERN = re.compile(r"[A-Za-z0-9_]*")
+
+
+def is_alphanumeric(value: str) -> bool:
+    """
+    Return True if value only contains ASCII letters and digits.
+    """
+    return value.isascii() and value.isalnum()
+
+
+def is_word(value: str) -> bool:
+    """
+    Return True if value only contains ASCII letters, digits and underscores.
+    """
+    return WORD_PATTERN.fullmatch(value) is not None
+
+
+def is_fixed_length_alphanumeric(value: str, length: int) -> bool:
+    """
+    Return True if value has exactly length ASCII letters and digits, checking the length first.
+    """
+    return len(value) == length and is_alphanumeric(value)
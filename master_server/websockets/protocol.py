@@ -0,0 +1,162 @@
+import asyncio
+import json
+import struct
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from typing import NamedTuple, Union
+from fastapi import WebSocket
+from master_server.constants.websocket_constants import (
+    FRAME_HEADER_FORMAT,
+    FRAME_PROTOCOL_VERSION,
+    MAX_FRAME_PAYLOAD_BYTES,
+)
+from master_server.enums.websocket_enums import FrameTypeEnum
+
+FRAME_HEADER = struct.Struct(FRAME_HEADER_FORMAT)
+
+
+class FrameError(Exception):
+    def __init__(self, message: str = ""):
+        self.message = message
+        super().__init__(message)
+
+
+class Frame(NamedTuple):
+    """
+    A binary frame, the payload is a view on the received message without copying
+    """
+
+    type: FrameTypeEnum
+    sequence: int
+    payload: memoryview
+
+
+def encode_frame(frame_type: FrameTypeEnum, sequence: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(
+        FRAME_PROTOCOL_VERSION, frame_type.value, sequence, len(payload)
+    ) + bytes(payload)
+
+
+def parse_frames(data: bytes) -> Iterator[Frame]:
+    """
+    Parse the length-prefixed frames of a binary websocket message.
+
+    A message may hold several frames back to back, so small frames can be sent
+    together.
+
+    Parameters:
+
+        data (bytes): The binary websocket message.
+
+    Returns:
+
+        Iterator[Frame]: The frames of the message.
+
+    Raises:
+
+        FrameError: When a header is invalid or a payload is truncated.
+    """
+    view = memoryview(data)
+    offset = 0
+
+    while offset < len(view):
+        if len(view) - offset < FRAME_HEADER.size:
+            raise FrameError("Truncated frame header")
+
+        version, frame_type, sequence, length = FRAME_HEADER.unpack_from(view, offset)
+        if version != FRAME_PROTOCOL_VERSION:
+            raise FrameError(f"Unsupported protocol version {version}")
+        if length > MAX_FRAME_PAYLOAD_BYTES:
+            raise FrameError(f"Frame payload of {length} bytes is too large")
+
+        try:
+            frame_type = FrameTypeEnum(frame_type)
+        except ValueError:
+            raise FrameError(f"Unknown frame type {frame_type}")
+
+        start = offset + FRAME_HEADER.size
+        offset = start + length
+        if offset > len(view):
+            raise FrameError("Truncated frame payload")
+
+        yield Frame(frame_type, sequence, view[start:offset])
+
+
+async def iter_messages(websocket: WebSocket) -> AsyncIterator[Union[bytes, str]]:
+    """
+    Receive websocket messages until the client disconnects
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+        if message.get("bytes") is not None:
+            yield message["bytes"]
+        elif message.get("text") is not None:
+            yield message["text"]
+
+
+async def buffered(source: AsyncIterable, max_size: int) -> AsyncIterator:
+    """
+    Read ahead from source into a bounded buffer.
+
+    The source is consumed in a separate task while items are processed. It is not
+    read while the buffer is full, so a slow consumer pushes back on the producer.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+    done = object()
+
+    async def produce():
+        cancelled = False
+        try:
+            async for item in source:
+                await queue.put(item)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Once cancelled nobody reads the buffer, so the end marker could wait
+            # forever for room in it
+            if not cancelled:
+                await queue.put(done)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not done:
+            yield item
+    finally:
+        # The producer must not outlive the consumer, nor lose the source errors
+        producer.cancel()
+        await asyncio.wait([producer])
+        if not producer.cancelled():
+            producer.result()
+
+
+async def iter_frames(
+    messages: AsyncIterable[Union[bytes, str]],
+) -> AsyncIterator[Union[Frame, dict, FrameError]]:
+    """
+    Split binary messages into frames and parse text messages as JSON control messages.
+
+    Invalid messages are yielded as FrameError so the connection can report them and
+    keep going.
+    """
+    async for message in messages:
+        if isinstance(message, str):
+            try:
+                control = json.loads(message)
+            except ValueError:
+                yield FrameError("Invalid JSON message")
+                continue
+
+            if isinstance(control, dict):
+                yield control
+            else:
+                yield FrameError("Control message must be a JSON object")
+            continue
+
+        try:
+            for frame in parse_frames(message):
+                yield frame
+        except FrameError as e:
+            yield e
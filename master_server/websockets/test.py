@@ -1,25 +1,78 @@
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import aclosing
+from typing import Union
 from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+from master_server.constants.websocket_constants import MAX_BUFFERED_MESSAGES
+from master_server.enums.websocket_enums import FrameTypeEnum
 from master_server.utils.connection_manager import ConnectionManager
 from master_server.utils.logging import AppLogger
+from master_server.utils.pubsub import pubsub
+from master_server.websockets.protocol import (
+    Frame,
+    FrameError,
+    buffered,
+    iter_frames,
+    iter_messages,
+)
+
 
 class TestWebsocketConnectionManager(ConnectionManager):
     pass
 
-manager = TestWebsocketConnectionManager()
+
+manager = TestWebsocketConnectionManager(pubsub=pubsub)
 
 logger = AppLogger().get_logger()
 
+
+async def process_frames(
+    items: AsyncIterable[Union[Frame, dict, FrameError]],
+) -> AsyncIterator[dict]:
+    """
+    Handle audio frames and JSON control messages, yielding the responses.
+
+    Binary frames carry raw audio, JSON text messages are used for control:
+    {"type": "type1"} is answered with {"result": "type1"} and {"type": "end"}
+    acknowledges the whole stream and ends it.
+    """
+    frames = 0
+    received = 0
+
+    async for item in items:
+        if isinstance(item, Frame):
+            if item.type == FrameTypeEnum.AUDIO:
+                frames += 1
+                received += len(item.payload)
+                yield {"type": "ack", "sequence": item.sequence}
+
+        elif isinstance(item, FrameError):
+            yield {"type": "error", "message": item.message}
+
+        elif item.get("type") == "type1":
+            yield {"result": "type1"}
+
+        elif item.get("type") == "end":
+            yield {"type": "end", "frames": frames, "bytes": received}
+            return
+
+        else:
+            yield {"type": "error", "message": "Unknown message type"}
+
+
 async def transcription_websocket(websocket: WebSocket):
     await manager.connect(websocket)
 
     try:
-        while True:
-            data = await websocket.receive_json()
-            if data["type"] == "type1":
-                await websocket.send_json({
-                    'result': "type1"
-                })
-               
+        messages = buffered(iter_messages(websocket), MAX_BUFFERED_MESSAGES)
+        async with aclosing(messages):
+            async for response in process_frames(iter_frames(messages)):
+                await manager.send(websocket, response)
+
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await manager.drain(websocket)
+            await websocket.close()
     except Exception as e:
         logger.error(f"Error: {e}")
-        manager.disconnect(websocket)
\ No newline at end of file
+    finally:
+        manager.disconnect(websocket)
@@ -0,0 +1,51 @@
+"""new migration
+
+Revision ID: 2e185e56e331
+Revises: 82c7d30cbcd0
+Create Date: 2026-10-17 14:02:11.504187
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2e185e56e331"
+down_revision: Union[str, None] = "82c7d30cbcd0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build the indexes without locking the user table for writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_created_at_id",
+            "user",
+            ["created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_user_role_created_at_id",
+            "user",
+            ["role", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_role_created_at_id",
+            table_name="user",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_user_created_at_id", table_name="user", postgresql_concurrently=True
+        )
@@ -0,0 +1,130 @@
+"""new migration
+
+Revision ID: f13a11df15fb
+Revises: 0a9108af8616
+Create Date: 2026-10-17 09:12:44.318270
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f13a11df15fb"
+down_revision: Union[str, None] = "0a9108af8616"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Indexes built concurrently, a failed build leaves an INVALID index behind
+CONCURRENT_INDEXES = (
+    "ix_user_token",
+    "ix_user_api_key",
+    "ix_user_referral_code",
+    "ix_user_username_lower",
+)
+
+
+def check_username_duplicates() -> None:
+    # The previous constraint was case-sensitive, so "Bob" and "bob" may both exist
+    duplicates = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                'SELECT username FROM "user" WHERE lower(username) IN ('
+                'SELECT lower(username) FROM "user" WHERE username IS NOT NULL '
+                "GROUP BY lower(username) HAVING count(*) > 1"
+                ") ORDER BY lower(username), username"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Usernames differing only by case must be renamed before creating "
+            f"ix_user_username_lower: {', '.join(duplicates)}"
+        )
+
+
+def drop_invalid_indexes() -> None:
+    # Left behind by an interrupted or failed run of this migration
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    invalid = (
+        bind.execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+            ),
+            {"names": list(CONCURRENT_INDEXES)},
+        )
+        .scalars()
+        .all()
+    )
+    for name in invalid:
+        op.drop_index(name, table_name="user", postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    check_username_duplicates()
+
+    # Build the indexes without locking the user table for writes
+    with op.get_context().autocommit_block():
+        drop_invalid_indexes()
+        op.create_index(
+            op.f("ix_user_token"),
+            "user",
+            ["token"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            op.f("ix_user_api_key"),
+            "user",
+            ["api_key"],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            op.f("ix_user_referral_code"),
+            "user",
+            ["referral_code"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_user_username_lower",
+            "user",
+            [sa.text("lower(username)")],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_username_lower", table_name="user", postgresql_concurrently=True
+        )
+        op.drop_index(
+            op.f("ix_user_referral_code"),
+            table_name="user",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("ix_user_api_key"), table_name="user", postgresql_concurrently=True
+        )
+        op.drop_index(
+            op.f("ix_user_token"), table_name="user", postgresql_concurrently=True
+        )
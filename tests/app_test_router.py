@@ -1,7 +1,11 @@
 # test_router.py
 from fastapi import APIRouter, Depends
 from master_server.database.user.model import User
-from master_server.dependencies.auth import get_current_active_user
+from master_server.database.user.schema import UserAuthSchema
+from master_server.dependencies.auth import (
+    get_current_active_auth_user,
+    get_current_active_user,
+)
 
 app_test_router = APIRouter()
 
@@ -9,4 +13,10 @@ app_test_router = APIRouter()
 @app_test_router.get("/user/active-user")
 async def get_active_user(current_user: User = Depends(get_current_active_user)):
     return current_user
- 
\ No newline at end of file
+
+
+@app_test_router.get("/user/active-auth-user")
+async def get_active_auth_user(
+    current_user: UserAuthSchema = Depends(get_current_active_auth_user),
+):
+    return current_user
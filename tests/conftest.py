@@ -6,24 +6,78 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from master_server.server import app
 from master_server.database.user.model import User
-from master_server.dependencies.auth import get_current_user
+from master_server.enums.user_enums import UserRoleEnum
+from master_server.database.user.schema import UserAuthSchema
+from master_server.database.user.cache import user_cache
+from master_server.utils.auth import get_gravatar_hash
+from master_server.utils.jwt_backend import verified_token_cache
+from master_server.dependencies.auth import get_current_auth_user, get_current_user
+from master_server.utils.query_inspector import assert_max_queries
 from .app_test_router import app_test_router
 
 
-@pytest.fixture(name="session")
-async def session_fixture():
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run the tests marked as benchmark, they are skipped by default",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: wall-clock benchmark, only run with --benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+
+    skip_benchmark = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+@pytest.fixture(name="session_maker")
+async def session_maker_fixture():
     engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
 
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
-    async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest.fixture(name="session")
+async def session_fixture(session_maker):
+    async with session_maker() as session:
         yield session
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    user_cache.clear()
+    verified_token_cache.clear()
+    get_gravatar_hash.cache_clear()
+    yield
+    user_cache.clear()
+    verified_token_cache.clear()
+    get_gravatar_hash.cache_clear()
+
+
+@pytest.fixture(name="assert_max_queries")
+def assert_max_queries_fixture():
+    """
+    Lock in a query budget: `with assert_max_queries(2): ...`
+    """
+    return assert_max_queries
+
+
 @pytest.fixture(scope="module")
 def anyio_backend():
     return "asyncio"
@@ -43,8 +97,20 @@ async def mock_get_current_user():
     return User(id=1, email="example@test.com")
 
 
+async def mock_get_current_auth_user():
+    return UserAuthSchema(
+        id=1,
+        email="example@test.com",
+        banned=False,
+        role=UserRoleEnum.USER,
+        is_verified=True,
+        profile_complete=False,
+    )
+
+
 @pytest.fixture(scope="module")
 def override_dependencies():
     app.dependency_overrides[get_current_user] = mock_get_current_user
+    app.dependency_overrides[get_current_auth_user] = mock_get_current_auth_user
     yield
     app.dependency_overrides.clear()
@@ -2,6 +2,7 @@ import pytest
 from datetime import datetime
 from unittest.mock import patch
 from master_server.database.user.model import User
+from master_server.database.user.schema import UserAuthSchema
 from master_server.enums.user_enums import UserRoleEnum
 
 
@@ -109,3 +110,63 @@ async def test_get_active_user(test_client):
                 "/user/active-user", headers={"Authorization": "bearer 123456"}
             )
             assert response.status_code == 200
+
+
+def make_auth_user(**kwargs) -> UserAuthSchema:
+    values = dict(
+        id=1,
+        email="example@test.com",
+        banned=False,
+        role=UserRoleEnum.USER,
+        is_verified=True,
+        profile_complete=True,
+    )
+    return UserAuthSchema(**{**values, **kwargs})
+
+
+@pytest.mark.anyio
+async def test_get_active_auth_user(test_client):
+    with patch(
+        "master_server.utils.auth.AuthUtil.verify_jwt_token",
+        return_value="example@test.com",
+    ):
+        # case 1: user not found
+        with patch(
+            "master_server.database.user.service.UserService.find_auth_user",
+            return_value=None,
+        ):
+            response = await test_client.get(
+                "/user/active-auth-user", headers={"Authorization": "bearer 123456"}
+            )
+            assert response.status_code == 404
+
+        # case 2: banned user
+        with patch(
+            "master_server.database.user.service.UserService.find_auth_user",
+            return_value=make_auth_user(banned=True),
+        ):
+            response = await test_client.get(
+                "/user/active-auth-user", headers={"Authorization": "bearer 123456"}
+            )
+            assert response.status_code == 401
+
+        # case 3: profile not complete
+        with patch(
+            "master_server.database.user.service.UserService.find_auth_user",
+            return_value=make_auth_user(profile_complete=False),
+        ):
+            response = await test_client.get(
+                "/user/active-auth-user", headers={"Authorization": "bearer 123456"}
+            )
+            assert response.status_code == 401
+
+        # case 4: active user
+        with patch(
+            "master_server.database.user.service.UserService.find_auth_user",
+            return_value=make_auth_user(),
+        ):
+            response = await test_client.get(
+                "/user/active-auth-user", headers={"Authorization": "bearer 123456"}
+            )
+            assert response.status_code == 200
+            assert response.json()["email"] == "example@test.com"
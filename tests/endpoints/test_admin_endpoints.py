@@ -0,0 +1,164 @@
+import json
+import pytest
+from unittest.mock import patch
+from sqlmodel import select
+from master_server.config import get_settings
+from master_server.database.config import get_autocommit_session, get_session
+from master_server.database.unit_of_work import unit_of_work
+from master_server.database.user.model import User
+from master_server.server import app
+
+ADMIN_HEADERS = {"X-Admin-Key": "admin-secret"}
+
+
+@pytest.fixture(name="admin_session")
+def admin_session_fixture(session, session_maker):
+    async def get_test_session():
+        async with unit_of_work(session):
+            yield session
+
+    async def get_test_autocommit_session():
+        yield session
+
+    app.dependency_overrides[get_session] = get_test_session
+    app.dependency_overrides[get_autocommit_session] = get_test_autocommit_session
+    with (
+        patch.object(get_settings(), "ADMIN_API_KEY", "admin-secret"),
+        patch("master_server.internal.admin.async_session", session_maker),
+    ):
+        yield session
+    app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_autocommit_session, None)
+
+
+@pytest.mark.anyio
+async def test_admin_authentication(test_client, admin_session):
+    # case 1: admin key not provided
+    response = await test_client.get("/admin/users/export")
+    assert response.status_code == 401
+
+    # case 2: wrong admin key
+    response = await test_client.get(
+        "/admin/users/export", headers={"X-Admin-Key": "wrong"}
+    )
+    assert response.status_code == 401
+
+    # case 3: admin endpoints are disabled without a configured key
+    with patch.object(get_settings(), "ADMIN_API_KEY", None):
+        response = await test_client.get("/admin/users/export", headers=ADMIN_HEADERS)
+        assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_import_query_budget(test_client, admin_session, assert_max_queries):
+    body = "\n".join(json.dumps({"email": f"user{i}@example.com"}) for i in range(200))
+
+    # One INSERT per batch, regardless of the number of rows
+    with assert_max_queries(2):
+        response = await test_client.post(
+            "/admin/users/import?batch_size=100", headers=ADMIN_HEADERS, content=body
+        )
+    assert response.json()["inserted"] == 200
+
+
+@pytest.mark.anyio
+async def test_import_and_export_users(test_client, admin_session):
+    # case 1: NDJSON import
+    body = (
+        "\n".join(json.dumps({"email": f"user{i}@example.com"}) for i in range(3))
+        + '\n{"email": "invalid"}\n'
+    )
+    response = await test_client.post(
+        "/admin/users/import", headers=ADMIN_HEADERS, content=body
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 3
+    assert response.json()["rejected"][0]["row"] == 4
+
+    # case 2: CSV import
+    response = await test_client.post(
+        "/admin/users/import?format=csv",
+        headers=ADMIN_HEADERS,
+        content="email,username\nuser3@example.com,user3\nuser0@example.com,\n",
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert response.json()["rejected"][0]["reason"] == "Conflicts with an existing user"
+
+    result = await admin_session.exec(select(User))
+    assert len(result.all()) == 4
+
+    # case 3: NDJSON export
+    response = await test_client.get(
+        "/admin/users/export?batch_size=2", headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["email"] for user in users] == [
+        f"user{i}@example.com" for i in range(4)
+    ]
+    assert users[0]["role"] == "USER"
+
+
+@pytest.mark.anyio
+async def test_import_undecodable_rows(test_client, admin_session):
+    # Lines that are not UTF-8 are rejected instead of failing the import
+    body = (
+        b'{"email": "user0@example.com"}\n'
+        b'{"email": "\xff"}\n'
+        b'{"email": "user1@example.com"}\n'
+    )
+    response = await test_client.post(
+        "/admin/users/import", headers=ADMIN_HEADERS, content=body
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert response.json()["rejected"][0]["row"] == 2
+    assert response.json()["rejected"][0]["reason"].startswith("Invalid UTF-8")
+
+
+@pytest.mark.anyio
+async def test_list_users(test_client, admin_session):
+    for i in range(5):
+        admin_session.add(User(email=f"user{i}@example.com", is_verified=i < 3))
+    await admin_session.commit()
+
+    # case 1: JSON pages
+    response = await test_client.get(
+        "/admin/users?limit=2&is_verified=true", headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [user["email"] for user in page["items"]] == [
+        "user2@example.com",
+        "user1@example.com",
+    ]
+    assert "token" not in page["items"][0]
+
+    response = await test_client.get(
+        "/admin/users",
+        params={"limit": 2, "is_verified": True, "cursor": page["next_cursor"]},
+        headers=ADMIN_HEADERS,
+    )
+    assert [user["email"] for user in response.json()["items"]] == ["user0@example.com"]
+    assert response.json()["next_cursor"] is None
+
+    # case 2: NDJSON stream of every page
+    response = await test_client.get(
+        "/admin/users?format=ndjson&limit=2", headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    users = [json.loads(line) for line in response.text.splitlines()]
+    assert [user["email"] for user in users] == [
+        f"user{i}@example.com" for i in reversed(range(5))
+    ]
+
+    # case 3: invalid cursor
+    response = await test_client.get(
+        "/admin/users?cursor=invalid", headers=ADMIN_HEADERS
+    )
+    assert response.status_code == 400
@@ -1,15 +1,42 @@
 import pytest
+import time
 from unittest.mock import patch
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.config import get_session
+from master_server.database.email.model import EmailOutbox
+from master_server.database.unit_of_work import unit_of_work
+from master_server.database.login_token.model import LoginToken
+from master_server.database.login_token.service import LoginTokenService
 from master_server.database.user.model import User
+from master_server.server import app
+from master_server.utils.auth import hash_login_token
+
+
+@pytest.fixture(name="auth_session")
+def auth_session_fixture(session):
+    async def get_test_session():
+        async with unit_of_work(session):
+            yield session
+
+    with patch.dict(app.dependency_overrides, {get_session: get_test_session}):
+        yield session
+
+
+async def get_user(session: AsyncSession, email: str) -> User:
+    session.expire_all()
+    result = await session.exec(select(User).where(User.email == email))
+    return result.one()
+
+
+async def count_rows(session: AsyncSession, model) -> int:
+    result = await session.exec(select(func.count()).select_from(model))
+    return result.one()
 
 
 @pytest.mark.anyio
-@patch("master_server.database.user.service.UserService.update_user", return_value=True)
-@patch("master_server.database.user.service.UserService.add_user", return_value=True)
-@patch("master_server.utils.auth.AuthUtil.send_magic_link", return_value=True)
-async def test_send_magic_link(
-    mock_update_user, mock_add_user, mock_send_magic_link, test_client
-):
+async def test_send_magic_link(test_client, auth_session, assert_max_queries):
     async def make_request_and_assert(email, expected_status, expected_response):
         response = await test_client.post(
             "/auth/send-magic-link", json={"email": email}
@@ -18,61 +45,100 @@ async def test_send_magic_link(
         if expected_response:
             assert response.json() == expected_response
 
-    # case 1: when user is fresh new
-    with patch(
-        "master_server.database.user.service.UserService.find_by_email",
-        return_value=None,
+    # case 1: when user is fresh new, a single upsert, the token and the outbox insert
+    with (
+        patch(
+            "master_server.utils.auth.AuthUtil.generate_login_token",
+            return_value="a" * 20,
+        ),
+        assert_max_queries(3),
     ):
         await make_request_and_assert("example@test.com", 200, True)
 
-    # case 2: when user is already registered
-    with patch(
-        "master_server.database.user.service.UserService.find_by_email",
-        return_value=User(email="example@test.com"),
-    ):
+    user = await get_user(auth_session, "example@test.com")
+    assert user.is_verified is False
+    assert await count_rows(auth_session, EmailOutbox) == 1
+
+    # Only the hash of the token is stored
+    login_token = (await auth_session.exec(select(LoginToken))).one()
+    assert login_token.user_id == user.id
+    assert login_token.token_hash == hash_login_token("a" * 20)
+
+    # case 2: when user is already registered, a new token is issued
+    with assert_max_queries(3):
         await make_request_and_assert("example@test.com", 200, True)
 
-    # case 3: when user is banned
-    with patch(
-        "master_server.database.user.service.UserService.find_by_email",
-        return_value=User(banned=True, email="example@test.com"),
-    ):
-        await make_request_and_assert(
-            "example@test.com", 401, {"detail": "Banned user"}
-        )
+    assert await count_rows(auth_session, LoginToken) == 2
+    assert await count_rows(auth_session, EmailOutbox) == 2
+
+    # case 3: when user is banned, nothing is changed or sent
+    user.banned = True
+    await auth_session.commit()
+
+    await make_request_and_assert("example@test.com", 401, {"detail": "Banned user"})
+    assert await count_rows(auth_session, LoginToken) == 2
+    assert await count_rows(auth_session, EmailOutbox) == 2
 
     # case 4: input invalid email
-    with patch(
-        "master_server.database.user.service.UserService.find_by_email",
-        return_value=None,
-    ):
-        await make_request_and_assert("123", 422, None)
+    await make_request_and_assert("123", 422, None)
+
+
+@pytest.mark.benchmark
+@pytest.mark.anyio
+async def test_send_magic_link_benchmark(test_client, auth_session):
+    """
+    Latency of the login request path, run with --benchmark -s to see it.
+    """
+    timings = []
+    for i in range(200):
+        # Alternate between new and returning users
+        start = time.perf_counter()
+        response = await test_client.post(
+            "/auth/send-magic-link", json={"email": f"user{i // 2}@example.com"}
+        )
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"\nsend-magic-link: p50 {p50 * 1000:.2f}ms, p99 {p99 * 1000:.2f}ms")
 
 
 @pytest.mark.anyio
 @patch("master_server.utils.auth.AuthUtil.create_jwt_token", return_value="jwttoken")
-@patch(
-    "master_server.database.user.service.UserService.update_user",
-    return_value=User(id=1, email="example@test.com"),
-)
-async def test_verify_magic_link(mock_create_jwt_token, mock_update_user, test_client):
+async def test_verify_magic_link(
+    mock_create_jwt_token, test_client, auth_session, assert_max_queries
+):
     async def make_request_and_assert(token, expected_status, expected_response):
         response = await test_client.get(f"/auth/verify-magic-link?token={token}")
         assert response.status_code == expected_status
         assert response.json() == expected_response
 
+    user = User(email="example@test.com")
+    auth_session.add(user)
+    await auth_session.commit()
+    user_id = user.id
+
+    service = LoginTokenService(db_session=auth_session)
+    service.issue(user_id=user_id, token="a" * 20, ttl_seconds=60)
+    service.issue(user_id=user_id, token="b" * 20, ttl_seconds=-1)
+    await auth_session.commit()
+
     # case 1: when token is not found
-    with patch(
-        "master_server.database.user.service.UserService.find_by_token",
-        return_value=None,
-    ):
-        await make_request_and_assert("123456", 404, {"detail": "token not found"})
+    await make_request_and_assert("123456", 404, {"detail": "token not found"})
 
-    # case 2: when token is found
-    with patch(
-        "master_server.database.user.service.UserService.find_by_token",
-        return_value=User(id=1, email="example@test.com"),
-    ):
+    # case 2: when token is found, one UPDATE for the token and one for the user
+    with assert_max_queries(2):
         await make_request_and_assert(
-            "123456", 200, {"token": "jwttoken", "user_id": 1}
+            "a" * 20, 200, {"token": "jwttoken", "user_id": user_id}
         )
+
+    mock_create_jwt_token.assert_called_once_with(email="example@test.com")
+    assert (await get_user(auth_session, "example@test.com")).is_verified is True
+
+    # case 3: when token is already used
+    await make_request_and_assert("a" * 20, 404, {"detail": "token not found"})
+
+    # case 4: when token is expired
+    await make_request_and_assert("b" * 20, 404, {"detail": "token not found"})
@@ -1,6 +1,15 @@
+import json
+import time
 import pytest
+from datetime import datetime
 from unittest.mock import patch
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
 from master_server.database.user.model import User
+from master_server.database.user.schema import UserResponseSchema
+from master_server.dependencies.auth import get_current_user
+from master_server.utils.auth import AuthUtil
+from master_server.utils.response import ModelResponse
 from master_server.database.user.exception import (
     UsernameAlreadyTaken,
     EmailAlreadyTaken,
@@ -12,7 +21,7 @@ from master_server.server import app
 async def test_patch_user(test_client, override_dependencies):
     # case 1: username already taken
     with patch(
-        "master_server.database.user.service.UserService.update_user",
+        "master_server.database.user.service.UserService.patch_user",
         side_effect=UsernameAlreadyTaken,
     ):
         response = await test_client.patch(
@@ -24,7 +33,7 @@ async def test_patch_user(test_client, override_dependencies):
 
     # case 2: email already taken
     with patch(
-        "master_server.database.user.service.UserService.update_user",
+        "master_server.database.user.service.UserService.patch_user",
         side_effect=EmailAlreadyTaken,
     ):
         response = await test_client.patch(
@@ -36,8 +45,10 @@ async def test_patch_user(test_client, override_dependencies):
 
     # case 3: valid request
     with patch(
-        "master_server.database.user.service.UserService.update_user",
-        return_value=User(id=1, email="example@test.com"),
+        "master_server.database.user.service.UserService.patch_user",
+        return_value=UserResponseSchema.model_validate(
+            User(id=1, email="example@test.com")
+        ),
     ):
         response = await test_client.patch(
             "/user",
@@ -45,10 +56,11 @@ async def test_patch_user(test_client, override_dependencies):
             json={"email": "example@test.com"},
         )
         assert response.status_code == 200
+        assert response.json()["email"] == "example@test.com"
 
     # case 4: forbidden fields testing
     with patch(
-        "master_server.database.user.service.UserService.update_user",
+        "master_server.database.user.service.UserService.patch_user",
         return_value=User(id=1, email="example@test.com"),
     ):
         response = await test_client.patch(
@@ -57,3 +69,98 @@ async def test_patch_user(test_client, override_dependencies):
             json={"is_verified": True},
         )
         assert response.status_code == 422
+
+
+def make_profile_user() -> User:
+    return User(
+        id=1,
+        username="test_user",
+        first_name="Test",
+        last_name="User",
+        email="example@test.com",
+        date_of_birth=datetime(1990, 1, 1),
+        address={
+            "address": "123 Test St",
+            "city": "Test City",
+            "country": "Test Country",
+            "state": "Test State",
+            "zip_code": "12345",
+        },
+        phone={"country_code": "+1", "number": "1234567890"},
+    )
+
+
+@pytest.mark.anyio
+async def test_get_user(test_client):
+    user = make_profile_user()
+
+    async def get_profile_user():
+        return user
+
+    with patch.dict(app.dependency_overrides, {get_current_user: get_profile_user}):
+        response = await test_client.get(
+            "/user", headers={"Authorization": "bearer 123456"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "username": "test_user",
+        "first_name": "Test",
+        "last_name": "User",
+        "date_of_birth": "1990-01-01T00:00:00",
+        "address": user.address,
+        "phone": user.phone,
+        "email": "example@test.com",
+        "referral_code": user.referral_code,
+        "api_key": user.api_key,
+        "profile_url": AuthUtil().get_user_gravatar_url(user.email),
+    }
+
+
+def get_renderers(user: User):
+    route = next(route for route in app.routes if route.path == "/user")
+
+    # Previous path: dump the model, build the schema, let FastAPI validate it
+    # against response_model again and encode the resulting dict
+    async def legacy() -> bytes:
+        schema = UserResponseSchema(
+            **user.model_dump(),
+            profile_url=AuthUtil().get_user_gravatar_url(user.email),
+        )
+        content = await serialize_response(
+            field=route.response_field, response_content=schema, is_coroutine=True
+        )
+        return JSONResponse(content).body
+
+    async def current() -> bytes:
+        return ModelResponse(UserResponseSchema.model_validate(user)).body
+
+    return {"legacy": legacy, "current": current}
+
+
+@pytest.mark.anyio
+async def test_get_user_serialization():
+    renderers = get_renderers(make_profile_user())
+
+    assert json.loads(await renderers["legacy"]()) == json.loads(
+        await renderers["current"]()
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.anyio
+async def test_get_user_serialization_benchmark():
+    iterations = 2000
+
+    timings = {}
+    for name, render in get_renderers(make_profile_user()).items():
+        start = time.process_time()
+        for _ in range(iterations):
+            await render()
+        timings[name] = (time.process_time() - start) / iterations
+
+    print(
+        f"GET /user serialization: {timings['legacy'] * 1e6:.1f}us -> "
+        f"{timings['current'] * 1e6:.1f}us CPU per request"
+    )
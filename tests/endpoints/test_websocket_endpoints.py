@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+from master_server.enums.websocket_enums import FrameTypeEnum
+from master_server.server import app
+from master_server.websockets.protocol import encode_frame
+
+
+def test_transcription_websocket():
+    client = TestClient(app)
+
+    with client.websocket_connect("/ws/transcription") as websocket:
+        # case 1: JSON control message
+        websocket.send_json({"type": "type1"})
+        assert websocket.receive_json() == {"result": "type1"}
+
+        # case 2: binary audio frames, two in one message
+        websocket.send_bytes(
+            encode_frame(FrameTypeEnum.AUDIO, 1, b"\x00" * 320)
+            + encode_frame(FrameTypeEnum.AUDIO, 2, b"\x00" * 320)
+        )
+        assert websocket.receive_json() == {"type": "ack", "sequence": 1}
+        assert websocket.receive_json() == {"type": "ack", "sequence": 2}
+
+        # case 3: malformed frame
+        websocket.send_bytes(b"\x01")
+        assert websocket.receive_json()["type"] == "error"
+
+        # case 4: end of stream
+        websocket.send_json({"type": "end"})
+        assert websocket.receive_json() == {"type": "end", "frames": 2, "bytes": 640}
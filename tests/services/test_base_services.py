@@ -1,8 +1,13 @@
 import pytest
 import asyncio
+import time
 from datetime import datetime
-from sqlmodel import select
+from typing import Optional
+from pydantic import ValidationError, create_model, model_validator
+from sqlalchemy import update
+from sqlmodel import Field, SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.base.model import validate_fields, validate_rows
 from master_server.database.user.model import User
 
 
@@ -78,3 +83,186 @@ async def test_timestamp_mixin(session: AsyncSession):
     # Update again
     await model_instance.update(session, email="updated_again@test.com")
     assert model_instance.updated_at > updated_time
+
+
+@pytest.mark.anyio
+async def test_base_model_validates_changed_fields(session: AsyncSession):
+    # case 1: new instances validate the fields they were given
+    with pytest.raises(ValidationError):
+        await User(email="test@test.com", username="not valid").save(session)
+
+    user = User(email="test@test.com")
+    await user.save(session)
+    assert user.changed_fields() == {}
+
+    # case 2: updated fields are validated
+    with pytest.raises(ValidationError):
+        await user.update(session, balance=-1)
+
+    # case 3: fields that are not changed are not validated
+    await session.exec(
+        update(User).where(User.id == user.id).values(username="legacy name")
+    )
+    await session.commit()
+    await session.refresh(user)
+
+    await user.update(session, first_name="Jane")
+    assert user.first_name == "Jane"
+
+    # case 4: save validates the fields changed since the instance was loaded
+    user.last_name = "x" * 51
+    assert user.changed_fields() == {"last_name": "x" * 51}
+    with pytest.raises(ValidationError):
+        await user.save(session)
+
+
+def test_validate_fields():
+    # case 1: field validators run for the given fields only
+    validate_fields(User, {"token": "a" * 20})
+    with pytest.raises(ValidationError):
+        validate_fields(User, {"token": "short"})
+
+    # case 2: field types are checked
+    with pytest.raises(ValidationError):
+        validate_fields(User, {"email": None})
+
+
+def test_validate_fields_constraints():
+    model = create_model(
+        "Constrained",
+        __base__=SQLModel,
+        name=(str, Field(default="name", max_length=5)),
+        count=(int, Field(default=0, ge=0)),
+    )
+
+    validate_fields(model, {"name": "abc", "count": 1})
+    with pytest.raises(ValidationError):
+        validate_fields(model, {"name": "too long"})
+    with pytest.raises(ValidationError):
+        validate_fields(model, {"count": -1})
+
+
+class Period(SQLModel):
+    start: int = 0
+    end: int = 0
+
+    @model_validator(mode="after")
+    def check_order(self):
+        if self.end < self.start:
+            raise ValueError("end must not be before start")
+        return self
+
+
+def test_validate_fields_model_validators():
+    period = Period(start=5, end=10)
+
+    # The model validator sees the other fields of the instance
+    validate_fields(Period, {"end": 7}, period)
+    with pytest.raises(ValidationError):
+        validate_fields(Period, {"end": 1}, period)
+
+
+@pytest.mark.benchmark
+def test_validate_fields_benchmark():
+    """
+    Updating one field costs the same regardless of the number of columns, while
+    validating the full dump grows with it. Prints the timings, run with
+    --benchmark -s to see them.
+    """
+    repeat = 2000
+    for columns in (10, 200):
+        model = create_model(
+            f"Wide{columns}",
+            __base__=SQLModel,
+            **{f"column_{i}": (Optional[str], "value") for i in range(columns)},
+        )
+        instance = model()
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            validate_fields(model, {"column_0": "new value"})
+        changed = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            instance.model_validate(
+                instance.model_copy(update={"column_0": "new value"}).model_dump()
+            )
+        full = (time.perf_counter() - start) / repeat
+
+        print(
+            f"\n{columns} columns: changed fields {changed * 1e6:.1f}us, "
+            f"full model {full * 1e6:.1f}us"
+        )
+
+
+def test_validate_rows():
+    rows = [
+        {"email": "user0@example.com", "username": "user_0"},
+        {"email": None},
+        {"email": "user2@example.com", "referral_code": "abc"},
+        {"email": "user3@example.com"},
+    ]
+
+    result = validate_rows(User, rows, exclude={"id"})
+
+    # case 1: valid rows are returned with defaults, in order
+    assert result[0]["email"] == "user0@example.com"
+    assert result[0]["username"] == "user_0"
+    assert len(result[0]["token"]) == 20
+    assert "id" not in result[0]
+    assert result[3]["email"] == "user3@example.com"
+
+    # case 2: invalid rows are returned as their errors
+    assert [error["loc"] for error in result[1]] == [("email",)]
+    assert [error["loc"] for error in result[2]] == [("referral_code",)]
+
+    # case 3: nothing to validate
+    assert validate_rows(User, []) == []
+
+
+def test_validate_rows_matches_model():
+    rows = [
+        {"email": f"user{i}@example.com", "username": f"User_{i}"} for i in range(50)
+    ]
+
+    result = validate_rows(User, rows, exclude={"id"})
+
+    # Same values as validating each row with the model, besides the random defaults
+    for row, values in zip(rows, result):
+        expected = User.model_validate(row).model_dump(exclude={"id"})
+        assert values.keys() == expected.keys()
+        assert values["email"] == expected["email"]
+        assert values["username"] == expected["username"]
+
+
+@pytest.mark.benchmark
+def test_validate_rows_benchmark():
+    """
+    Validating an import chunk in one call is faster than validating each row with
+    the model. Prints the throughput, run with --benchmark -s to see them.
+    """
+    rows = [
+        {
+            "email": f"user{i}@example.com",
+            "username": f"User_{i}",
+            "referral_code": f"{i % 100000:05d}",
+        }
+        for i in range(20000)
+    ]
+
+    start = time.perf_counter()
+    for row in rows:
+        User.model_validate(row).model_dump(exclude={"id"})
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = validate_rows(User, rows, exclude={"id"})
+    batch = time.perf_counter() - start
+
+    print(
+        f"\nper row: {len(rows) / per_row:,.0f} rows/s, "
+        f"batch: {len(rows) / batch:,.0f} rows/s"
+    )
+
+    assert all(isinstance(values, dict) for values in result)
@@ -0,0 +1,86 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.login_token.model import LoginToken
+from master_server.database.login_token.service import LoginTokenService
+from master_server.database.user.model import User
+
+
+@pytest.fixture(name="login_token_service")
+def login_token_service_fixture(session):
+    return LoginTokenService(db_session=session)
+
+
+async def add_user(session: AsyncSession) -> int:
+    user = User(email="user@example.com")
+    session.add(user)
+    await session.commit()
+    return user.id
+
+
+async def count_tokens(session: AsyncSession) -> int:
+    result = await session.exec(select(func.count()).select_from(LoginToken))
+    return result.one()
+
+
+@pytest.mark.anyio
+async def test_consume(login_token_service: LoginTokenService, session: AsyncSession):
+    user_id = await add_user(session)
+    login_token_service.issue(user_id, token="a" * 20, ttl_seconds=60)
+    login_token_service.issue(user_id, token="b" * 20, ttl_seconds=60)
+    login_token_service.issue(user_id, token="c" * 20, ttl_seconds=-1)
+    await session.commit()
+
+    # case 1: valid token
+    assert await login_token_service.consume("a" * 20) == user_id
+    await session.commit()
+
+    # case 2: a token can only be used once
+    assert await login_token_service.consume("a" * 20) is None
+
+    # case 3: other tokens of the user are still valid
+    assert await login_token_service.consume("b" * 20) == user_id
+
+    # case 4: expired token
+    assert await login_token_service.consume("c" * 20) is None
+
+    # case 5: unknown token
+    assert await login_token_service.consume("d" * 20) is None
+
+
+@pytest.mark.anyio
+async def test_purge(login_token_service: LoginTokenService, session: AsyncSession):
+    user_id = await add_user(session)
+    for i in range(5):
+        login_token_service.issue(user_id, token=f"expired{i}", ttl_seconds=-1)
+    login_token_service.issue(user_id, token="used", ttl_seconds=60)
+    login_token_service.issue(user_id, token="valid", ttl_seconds=60)
+    await session.commit()
+
+    assert await login_token_service.consume("used") == user_id
+    await session.commit()
+
+    # Expired and used tokens are deleted in batches
+    assert await login_token_service.purge(batch_size=2) == 6
+    assert await count_tokens(session) == 1
+    assert await login_token_service.consume("valid") == user_id
+
+    # Nothing left to purge
+    await session.commit()
+    assert await login_token_service.purge(batch_size=2) == 1
+    assert await login_token_service.purge(batch_size=2) == 0
+
+
+@pytest.mark.anyio
+async def test_issue(login_token_service: LoginTokenService, session: AsyncSession):
+    user_id = await add_user(session)
+
+    before = datetime.now()
+    login_token = login_token_service.issue(user_id, token="a" * 20, ttl_seconds=60)
+    await session.commit()
+
+    assert login_token.token_hash != "a" * 20
+    assert login_token.used_at is None
+    assert login_token.expires_at >= before + timedelta(seconds=60)
@@ -0,0 +1,172 @@
+import pytest
+import time
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.user.model import User
+from master_server.database.user.schema import UserListFilter, UserListItem
+from master_server.database.user.service import UserService, encode_user_cursor
+
+SEED_ROWS = 2000
+
+
+async def seed_users(session: AsyncSession, count: int):
+    rows = [
+        User(
+            username=f"User_{i}",
+            email=f"user{i}@example.com",
+            api_key=f"{i:030d}",
+            token=f"{i:020d}",
+            referral_code=f"{i % 100000:05d}",
+        ).model_dump(exclude={"id"})
+        for i in range(count)
+    ]
+    await session.exec(insert(User), params=rows)
+    await session.commit()
+
+
+async def explain(session: AsyncSession, statement: str, parameters) -> str:
+    connection = await session.connection()
+
+    if connection.dialect.name == "postgresql":
+        result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return "\n".join(row[0] for row in result)
+
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    return "\n".join(row[-1] for row in result)
+
+
+def assert_index_scan(plan: str, index_name: str):
+    assert index_name in plan, plan
+    assert "Seq Scan" not in plan, plan
+    assert "SCAN user" not in plan, plan
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "finder, value, index_name",
+    [
+        ("find_by_token", f"{42:020d}", "ix_user_token"),
+        ("find_by_api_key", f"{42:030d}", "ix_user_api_key"),
+        ("find_by_username", "USER_42", "ix_user_username_lower"),
+        ("find_by_email", "user42@example.com", "ix_user_email"),
+    ],
+)
+async def test_user_finders_use_index(
+    session: AsyncSession, finder: str, value: str, index_name: str
+):
+    await seed_users(session, SEED_ROWS)
+
+    sync_engine = session.bind.sync_engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        user = await getattr(UserService(db_session=session), finder)(value)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert user is not None
+    assert user.email == "user42@example.com"
+
+    statement, parameters = captured[-1]
+    plan = await explain(session, statement, parameters)
+    assert_index_scan(plan, index_name)
+
+
+@pytest.mark.anyio
+async def test_username_is_unique_regardless_of_case(session: AsyncSession):
+    await seed_users(session, 1)
+
+    session.add(User(username="USER_0", email="other@example.com"))
+    with pytest.raises(IntegrityError):
+        await session.commit()
+
+
+@pytest.mark.anyio
+async def test_list_users_uses_index(session: AsyncSession):
+    await seed_users(session, SEED_ROWS)
+
+    sync_engine = session.bind.sync_engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        page = await UserService(db_session=session).list_users(
+            UserListFilter(), limit=10
+        )
+        await UserService(db_session=session).list_users(
+            UserListFilter(), limit=10, cursor=page.next_cursor
+        )
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    # Rows are read in index order, without sorting the table
+    for statement, parameters in captured:
+        plan = await explain(session, statement, parameters)
+        assert "ix_user_created_at_id" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
+        assert "Sort" not in plan, plan
+
+
+@pytest.mark.benchmark
+@pytest.mark.anyio
+async def test_list_users_deep_page_benchmark(session: AsyncSession):
+    """
+    Keyset pages cost the same at any depth, while OFFSET pages get slower the deeper
+    they are. Prints the timings, run with --benchmark -s to see them.
+    """
+    rows = 20000
+    limit = 100
+    await seed_users(session, rows)
+
+    service = UserService(db_session=session)
+
+    # Cursor and offset of the last page
+    result = await session.exec(
+        select(User.created_at, User.id)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .offset(rows - limit - 1)
+        .limit(1)
+    )
+    deep_cursor = encode_user_cursor(*result.one())
+
+    async def timed(coroutine_factory, repeat: int = 20) -> float:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await coroutine_factory()
+        return (time.perf_counter() - start) / repeat
+
+    # The same page selected with OFFSET, for comparison
+    async def offset_page(offset: int):
+        columns = [User.__table__.c[name] for name in UserListItem.model_fields]
+        result = await session.exec(
+            select(*columns)
+            .order_by(User.created_at.desc(), User.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        [UserListItem.model_validate(row) for row in result.all()]
+
+    keyset_first = await timed(lambda: service.list_users(UserListFilter(), limit))
+    keyset_deep = await timed(
+        lambda: service.list_users(UserListFilter(), limit, cursor=deep_cursor)
+    )
+    offset_first = await timed(lambda: offset_page(0))
+    offset_deep = await timed(lambda: offset_page(rows - limit))
+
+    print(
+        f"\nkeyset: first page {keyset_first * 1000:.2f}ms, "
+        f"last page {keyset_deep * 1000:.2f}ms"
+        f"\noffset: first page {offset_first * 1000:.2f}ms, "
+        f"last page {offset_deep * 1000:.2f}ms"
+    )
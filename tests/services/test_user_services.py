@@ -1,12 +1,21 @@
 import pytest
+from datetime import datetime, timedelta
 from pydantic import ValidationError
 from unittest.mock import patch
+from sqlalchemy import event
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from master_server.database.user.model import User
 from master_server.database.user.service import UserService
+from master_server.database.user.cache import user_cache
+from master_server.database.unit_of_work import unit_of_work
+from master_server.database.user.schema import UserListFilter
+from master_server.enums.user_enums import UserRoleEnum
+from master_server.utils.bulk import InvalidRow
+from master_server.utils.query_inspector import record_queries
 from master_server.database.user.exception import (
     EmailAlreadyTaken,
+    InvalidCursor,
     UsernameAlreadyTaken,
 )
 
@@ -22,49 +31,52 @@ async def test_add_user(user_service: UserService, session: AsyncSession):
     user = User(username="testuser", email="testuser@example.com")
 
     # case 1: valid user add
-    with patch.object(
-        user_service, "is_username_exist", return_value=False
-    ), patch.object(user_service, "is_email_exist", return_value=False):
-        # Add the user
-        added_user = await user_service.add_user(user)
-
-        # Verify the user was added
-        assert added_user.id is not None  # ID should be set by the database
-        assert added_user.username == "testuser"
-        assert added_user.email == "testuser@example.com"
-
-        # Verify the user was actually committed to the database
-        statement = select(User).where(User.id == added_user.id)
-        results = await session.exec(statement)
-        db_user = results.one()
-
-        assert db_user.id == added_user.id
-        assert db_user.username == "testuser"
-        assert db_user.email == "testuser@example.com"
-
-    # case 2: username already exist
-    with patch.object(
-        user_service, "is_username_exist", return_value=True
-    ), patch.object(user_service, "is_email_exist", return_value=False):
-        with pytest.raises(UsernameAlreadyTaken):
-            await user_service.add_user(user)
+    added_user = await user_service.add_user(user)
+
+    # Verify the user was added
+    assert added_user.id is not None  # ID should be set by the database
+    assert added_user.username == "testuser"
+    assert added_user.email == "testuser@example.com"
+
+    # Verify the user was actually committed to the database
+    statement = select(User).where(User.id == added_user.id)
+    results = await session.exec(statement)
+    db_user = results.one()
+
+    assert db_user.id == added_user.id
+    assert db_user.username == "testuser"
+    assert db_user.email == "testuser@example.com"
+
+    # case 2: username already exist, regardless of case
+    with pytest.raises(UsernameAlreadyTaken):
+        await user_service.add_user(
+            User(username="TestUser", email="another@example.com")
+        )
 
     # case 3: email already exist
-    with patch.object(
-        user_service, "is_username_exist", return_value=False
-    ), patch.object(user_service, "is_email_exist", return_value=True):
+    with pytest.raises(EmailAlreadyTaken):
+        await user_service.add_user(
+            User(username="another", email="testuser@example.com")
+        )
+
+    # case 4: email taken between the check and the insert
+    with patch.object(user_service, "check_conflicts", return_value=None):
         with pytest.raises(EmailAlreadyTaken):
-            await user_service.add_user(user)
+            await user_service.add_user(
+                User(username="another", email="testuser@example.com")
+            )
 
 
 # Test for update_user method
 @pytest.mark.anyio
 async def test_update_user(user_service: UserService, session: AsyncSession):
-    # Create a new user
+    # Create a new user and another one holding the conflicting values
     user = User(username="testuser", email="testuser@example.com")
+    other_user = User(username="otheruser", email="otheruser@example.com")
 
-    # Save the user to the database
+    # Save the users to the database
     session.add(user)
+    session.add(other_user)
     await session.commit()
     await session.refresh(user)
 
@@ -72,40 +84,114 @@ async def test_update_user(user_service: UserService, session: AsyncSession):
     updated_email = "updateduser@example.com"
 
     # case 1: valid user update
-    with patch.object(
-        user_service, "is_username_exist", return_value=False
-    ), patch.object(user_service, "is_email_exist", return_value=False):
-        updated_user = await user_service.update_user(
-            user, username=updated_username, email=updated_email
-        )
+    updated_user = await user_service.update_user(
+        user, username=updated_username, email=updated_email
+    )
 
-        assert updated_user.username == updated_username
-        assert updated_user.email == updated_email
+    assert updated_user.username == updated_username
+    assert updated_user.email == updated_email
 
     # case 2: username already exist
-    with patch.object(
-        user_service, "is_username_exist", return_value=True
-    ), patch.object(user_service, "is_email_exist", return_value=False):
-        with pytest.raises(UsernameAlreadyTaken):
-            await user_service.update_user(
-                user, username=updated_username, email=updated_email
-            )
+    with pytest.raises(UsernameAlreadyTaken):
+        await user_service.update_user(user, username="otheruser")
 
     # case 3: email already exist
-    with patch.object(
-        user_service, "is_username_exist", return_value=False
-    ), patch.object(user_service, "is_email_exist", return_value=True):
-        with pytest.raises(EmailAlreadyTaken):
-            await user_service.update_user(
-                user, username=updated_username, email=updated_email
-            )
+    with pytest.raises(EmailAlreadyTaken):
+        await user_service.update_user(user, email="otheruser@example.com")
 
     # case 4: invalid model update
-    with patch.object(
-        user_service, "is_username_exist", return_value=False
-    ), patch.object(user_service, "is_email_exist", return_value=False):
-        with pytest.raises(ValueError):
-            await user_service.update_user(user, api_key="not 30 length")
+    with pytest.raises(ValueError):
+        await user_service.update_user(user, api_key="not 30 length")
+
+    # case 5: user's own username and email are not a conflict
+    updated_user = await user_service.update_user(
+        user, username=updated_username, email=updated_email
+    )
+    assert updated_user.username == updated_username
+
+
+@pytest.mark.anyio
+async def test_patch_user(
+    user_service: UserService, session: AsyncSession, assert_max_queries
+):
+    user = User(username="testuser", email="testuser@example.com")
+    other_user = User(username="otheruser", email="otheruser@example.com")
+    session.add(user)
+    session.add(other_user)
+    await session.commit()
+    await session.refresh(user)
+
+    auth_user = await user_service.find_auth_user(user.email, use_cache=True)
+    address = {
+        "address": "1 Main St",
+        "city": "City",
+        "country": "Country",
+        "state": "State",
+        "zip_code": "12345",
+    }
+
+    # case 1: conflict checks and a single UPDATE ... RETURNING, no SELECT of the row
+    with assert_max_queries(3):
+        profile = await user_service.patch_user(
+            auth_user, username="patcheduser", address=address
+        )
+    assert profile.username == "patcheduser"
+    assert profile.address.city == "City"
+    assert profile.email == "testuser@example.com"
+
+    await session.refresh(user)
+    assert user.username == "patcheduser"
+    assert user.address == address
+
+    # case 2: the cached user is dropped once the update is committed
+    user_cache.set(user.email, user.model_dump())
+    await user_service.patch_user(auth_user, first_name="Jane")
+    assert user_cache.get(user.email) is None
+
+    # case 3: conflicts and invalid values
+    with pytest.raises(UsernameAlreadyTaken):
+        await user_service.patch_user(auth_user, username="otheruser")
+    with pytest.raises(EmailAlreadyTaken):
+        await user_service.patch_user(auth_user, email="otheruser@example.com")
+    with pytest.raises(ValidationError):
+        await user_service.patch_user(auth_user, api_key="not 30 length")
+
+    # case 4: the user no longer exists
+    missing_user = auth_user.model_copy(update={"id": 0})
+    assert await user_service.patch_user(missing_user, first_name="Jane") is None
+
+
+# Test for check_conflicts method
+@pytest.mark.anyio
+async def test_check_conflicts(user_service: UserService, session: AsyncSession):
+    user = User(username="testuser", email="testuser@example.com")
+
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    # case 1: nothing to check
+    await user_service.check_conflicts(username=None, email=None)
+
+    # case 2: both are free
+    await user_service.check_conflicts(username="free", email="free@example.com")
+
+    # case 3: username is reported before email when both are taken
+    with pytest.raises(UsernameAlreadyTaken):
+        await user_service.check_conflicts(
+            username="TESTUSER", email="testuser@example.com"
+        )
+
+    # case 4: email taken
+    with pytest.raises(EmailAlreadyTaken):
+        await user_service.check_conflicts(
+            username="free", email="testuser@example.com"
+        )
+
+    # case 5: the user's own row is excluded
+    await user_service.check_conflicts(
+        username="testuser", email="testuser@example.com", exclude_user_id=user.id
+    )
 
 
 # Test for finding a user by api_key
@@ -188,3 +274,349 @@ async def test_is_email_exist(user_service: UserService, session: AsyncSession):
 
     result = await user_service.is_email_exist("non_existent_email@example.com")
     assert result is False
+
+
+@pytest.mark.anyio
+async def test_user_cache_invalidated_on_commit(session: AsyncSession):
+    user = User(email="cached@example.com")
+    session.add(user)
+    await session.commit()
+
+    # case 1: a row cached while the change is not committed yet is dropped on commit
+    async with unit_of_work(session):
+        await user.update(session, banned=True)
+        user_cache.set("cached@example.com", {"banned": False})
+        assert user_cache.get("cached@example.com") is not None
+
+    assert user_cache.get("cached@example.com") is None
+
+    # case 2: a rolled back change keeps the cached row
+    user_cache.set("cached@example.com", {"banned": True})
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(session):
+            await user.update(session, username="renamed")
+            raise RuntimeError
+
+    assert user_cache.get("cached@example.com") is not None
+
+
+# Test for finding a user by email through the user cache
+@pytest.mark.anyio
+async def test_find_by_email_cached(session_maker, session: AsyncSession):
+    user = User(username="testuser", email="testuser@example.com")
+
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_statement)
+
+    try:
+        # case 1: cache miss loads from the database
+        async with session_maker() as request_session:
+            result = await UserService(request_session).find_by_email(
+                "testuser@example.com", use_cache=True
+            )
+            assert result.id == user.id
+            assert len(statements) == 1
+
+        # case 2: cache hit skips the database and returns an attached user
+        async with session_maker() as request_session:
+            user_service = UserService(request_session)
+            result = await user_service.find_by_email(
+                "testuser@example.com", use_cache=True
+            )
+            assert result.id == user.id
+            assert result.username == "testuser"
+            assert len(statements) == 1
+
+            # same instance within a session
+            again = await user_service.find_by_email(
+                "testuser@example.com", use_cache=True
+            )
+            assert again is result
+
+            # case 3: banning through the cached user is written and invalidates it
+            await user_service.ban_user(result)
+            assert user_cache.get("testuser@example.com") is None
+
+        async with session_maker() as request_session:
+            result = await UserService(request_session).find_by_email(
+                "testuser@example.com", use_cache=True
+            )
+            assert result.banned is True
+
+            # case 4: email change invalidates the previous email
+            await result.update(request_session, email="changed@example.com")
+            assert user_cache.get("testuser@example.com") is None
+
+        async with session_maker() as request_session:
+            result = await UserService(request_session).find_by_email(
+                "testuser@example.com", use_cache=True
+            )
+            assert result is None
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count_statement)
+
+
+async def iter_rows(rows):
+    for row in rows:
+        yield row
+
+
+# Test for bulk_add_users method
+@pytest.mark.anyio
+async def test_bulk_add_users(user_service: UserService, session: AsyncSession):
+    session.add(User(username="existing", email="existing@example.com"))
+    await session.commit()
+
+    rows = [
+        {"email": f"user{i}@example.com", "username": f"user{i}"} for i in range(25)
+    ]
+    rows += [
+        {"email": "existing@example.com"},  # conflicts with the database
+        {"email": "new@example.com", "username": "EXISTING"},  # username conflict
+        {"email": "user0@example.com"},  # duplicate in the import
+        {"email": "invalid"},  # fails validation
+        {"email": "token@example.com", "token": "not a token"},  # ignored field
+        InvalidRow("Invalid JSON"),  # failed to parse
+    ]
+
+    result = await user_service.bulk_add_users(iter_rows(rows), batch_size=10)
+
+    assert result.inserted == 26
+    assert [(reject.row, reject.email) for reject in result.rejected] == [
+        (28, "user0@example.com"),
+        (29, "invalid"),
+        (31, None),
+        (26, "existing@example.com"),
+        (27, "new@example.com"),
+    ]
+    assert result.rejected[1].reason.startswith("email:")
+
+    statement = select(User).where(User.email == "user24@example.com")
+    user = (await session.exec(statement)).one()
+    assert user.username == "user24"
+    assert len(user.token) == 20
+
+
+@pytest.mark.anyio
+async def test_bulk_add_users_batch_size_cap(user_service: UserService):
+    rows = [{"email": f"user{i}@example.com"} for i in range(2000)]
+
+    # A batch of 2000 rows would exceed the bind parameter limit of one statement
+    with record_queries() as recorder:
+        result = await user_service.bulk_add_users(iter_rows(rows), batch_size=5000)
+
+    assert result.inserted == 2000
+    assert recorder.count == 2
+
+
+# Test for stream_users method
+@pytest.mark.anyio
+async def test_stream_users(user_service: UserService, session: AsyncSession):
+    for i in range(7):
+        session.add(User(email=f"user{i}@example.com"))
+    await session.commit()
+
+    users = [user async for user in user_service.stream_users(batch_size=3)]
+
+    assert [user["email"] for user in users] == [
+        f"user{i}@example.com" for i in range(7)
+    ]
+    assert "token" not in users[0]
+    assert "api_key" not in users[0]
+
+
+@pytest.mark.anyio
+async def test_upsert_login(user_service: UserService, session: AsyncSession):
+    # case 1: new user
+    user_id = await user_service.upsert_login("user@example.com", ip="192.0.2.1")
+    await session.commit()
+
+    user = await session.get(User, user_id)
+    assert user.created_with_ip == "192.0.2.1"
+    assert user.last_login_with_ip == "192.0.2.1"
+
+    # case 2: returning user, cached row is dropped
+    await user_service.find_by_email("user@example.com", use_cache=True)
+    assert user_cache.get("user@example.com") is not None
+
+    assert (
+        await user_service.upsert_login("user@example.com", ip="192.0.2.2") == user_id
+    )
+    await session.commit()
+    await session.refresh(user)
+
+    assert user.created_with_ip == "192.0.2.1"
+    assert user.last_login_with_ip == "192.0.2.2"
+    assert user_cache.get("user@example.com") is None
+
+    # case 3: banned user is left unchanged
+    user.banned = True
+    await session.commit()
+
+    assert await user_service.upsert_login("user@example.com", ip="192.0.2.3") is None
+    await session.commit()
+    await session.refresh(user)
+    assert user.last_login_with_ip == "192.0.2.2"
+
+    # case 4: invalid email
+    with pytest.raises(ValidationError):
+        await user_service.upsert_login("invalid", ip="")
+
+
+@pytest.mark.anyio
+async def test_verify_user(user_service: UserService, session: AsyncSession):
+    user = User(email="user@example.com")
+    session.add(user)
+    await session.commit()
+
+    assert await user_service.verify_user(user.id) == "user@example.com"
+    await session.commit()
+    await session.refresh(user)
+    assert user.is_verified is True
+
+    assert await user_service.verify_user(user.id + 1) is None
+
+
+@pytest.mark.anyio
+async def test_find_auth_user(user_service: UserService, session: AsyncSession):
+    session.add(User(email="incomplete@example.com", role=UserRoleEnum.RESELLER))
+    session.add(
+        User(
+            email="complete@example.com",
+            username="complete",
+            first_name="Jane",
+            last_name="Doe",
+            date_of_birth=datetime(1990, 1, 1),
+            address={"city": "Test City"},
+            phone={"number": "1234567890"},
+            banned=True,
+        )
+    )
+    await session.commit()
+
+    sync_engine = session.bind.sync_engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # case 1: only the authorization columns are selected
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        user = await user_service.find_auth_user("incomplete@example.com")
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert user.role == UserRoleEnum.RESELLER
+    assert user.banned is False
+    assert user.profile_complete is False
+    assert "user.token" not in statements[0]
+    assert "user.address," not in statements[0]
+
+    # case 2: profile complete flag, JSON columns included
+    user = await user_service.find_auth_user("complete@example.com")
+    assert user.banned is True
+    assert user.profile_complete is True
+
+    # case 3: served from the user cache, consistent with the query
+    await user_service.find_by_email("complete@example.com", use_cache=True)
+    with patch.object(session, "exec", side_effect=AssertionError("queried")):
+        cached = await user_service.find_auth_user(
+            "complete@example.com", use_cache=True
+        )
+    assert cached == user
+
+    # case 4: not found
+    assert await user_service.find_auth_user("missing@example.com") is None
+
+
+@pytest.mark.anyio
+async def test_list_users(user_service: UserService, session: AsyncSession):
+    # Users sharing a creation time are still ordered by id
+    created_at = datetime(2024, 1, 1)
+    for i in range(7):
+        session.add(
+            User(
+                email=f"user{i}@example.com",
+                role=UserRoleEnum.RESELLER if i % 2 else UserRoleEnum.USER,
+                banned=i == 6,
+                created_at=created_at + timedelta(days=i // 2),
+            )
+        )
+    await session.commit()
+
+    # case 1: pages are newest first and do not overlap
+    emails = []
+    cursor = None
+    while True:
+        page = await user_service.list_users(UserListFilter(), limit=3, cursor=cursor)
+        emails.extend(user.email for user in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    assert emails == [f"user{i}@example.com" for i in reversed(range(7))]
+
+    # case 2: the last page has no cursor, even when full
+    page = await user_service.list_users(UserListFilter(), limit=7)
+    assert len(page.items) == 7
+    assert page.next_cursor is None
+
+    # case 3: filters
+    page = await user_service.list_users(UserListFilter(role=UserRoleEnum.RESELLER))
+    assert [user.email for user in page.items] == [
+        "user5@example.com",
+        "user3@example.com",
+        "user1@example.com",
+    ]
+
+    page = await user_service.list_users(UserListFilter(banned=True))
+    assert [user.email for user in page.items] == ["user6@example.com"]
+
+    page = await user_service.list_users(
+        UserListFilter(
+            created_after=created_at + timedelta(days=1),
+            created_before=created_at + timedelta(days=3),
+        )
+    )
+    assert [user.email for user in page.items] == [
+        f"user{i}@example.com" for i in (5, 4, 3, 2)
+    ]
+
+    # case 4: iterate over every page
+    users = [user async for user in user_service.iter_users(UserListFilter(), 2)]
+    assert len(users) == 7
+
+    # case 5: invalid cursor
+    with pytest.raises(InvalidCursor):
+        await user_service.list_users(UserListFilter(), cursor="invalid")
+
+
+# Query budgets of the user service
+@pytest.mark.anyio
+async def test_user_service_query_budgets(
+    user_service: UserService, session: AsyncSession, assert_max_queries
+):
+    user = User(username="budgetuser", email="budget@example.com")
+
+    # Conflict check and INSERT
+    with assert_max_queries(2):
+        await user_service.add_user(user)
+
+    # Conflict check and UPDATE
+    with assert_max_queries(2):
+        await user_service.update_user(user, username="budgetuser2")
+
+    # Served from the cache after the first lookup
+    await user_service.find_by_email(user.email, use_cache=True)
+    with assert_max_queries(0):
+        await user_service.find_by_email(user.email, use_cache=True)
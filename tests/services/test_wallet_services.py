@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from master_server.database.user.model import User
+from master_server.database.user.cache import user_cache
+from master_server.database.wallet.model import BalanceLedger
+from master_server.database.wallet.schema import BalanceChange
+from master_server.database.wallet.service import WalletService
+from master_server.database.wallet.exception import InsufficientBalance, WalletNotFound
+
+
+@pytest.fixture(name="wallet_service")
+def wallet_service_fixture(session: AsyncSession):
+    return WalletService(db_session=session)
+
+
+@pytest.fixture(name="user")
+async def user_fixture(session: AsyncSession):
+    user = User(email="wallet@example.com", balance=100)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+# Test for credit and debit methods
+@pytest.mark.anyio
+async def test_credit_and_debit(
+    wallet_service: WalletService, session: AsyncSession, user: User
+):
+    user_id = user.id
+    user_cache.set(user.email, user.model_dump())
+
+    # case 1: credit
+    assert await wallet_service.credit(user.id, 50, "top_up", "payment-1") == 150
+    assert user.balance == 150
+    assert user_cache.get(user.email) is None
+
+    # case 2: debit
+    assert await wallet_service.debit(user.id, 30, "usage") == 120
+
+    # case 3: debit to exactly zero
+    assert await wallet_service.debit(user.id, 120, "usage") == 0
+
+    # case 4: insufficient balance
+    with pytest.raises(InsufficientBalance):
+        await wallet_service.debit(user_id, 1, "usage")
+
+    # case 5: unknown user
+    with pytest.raises(WalletNotFound):
+        await wallet_service.credit(user_id + 1, 1, "top_up")
+
+    # case 6: amounts must be positive
+    with pytest.raises(ValueError):
+        await wallet_service.debit(user_id, -1, "usage")
+
+    ledger = await wallet_service.get_ledger(user_id)
+    assert [(entry.delta, entry.balance_after) for entry in ledger] == [
+        (50, 150),
+        (-30, 120),
+        (-120, 0),
+    ]
+    assert ledger[0].reference == "payment-1"
+
+    await session.refresh(user)
+    assert user.balance == 0
+
+
+# Test for debit_batch method
+@pytest.mark.anyio
+async def test_debit_batch(wallet_service: WalletService, session: AsyncSession):
+    rich = User(email="rich@example.com", balance=100)
+    poor = User(email="poor@example.com", balance=5)
+    session.add_all([rich, poor])
+    await session.commit()
+
+    charges = [
+        BalanceChange(user_id=rich.id, amount=10, reason="usage", reference="r1"),
+        BalanceChange(user_id=poor.id, amount=3, reason="usage"),
+        BalanceChange(user_id=rich.id, amount=20, reason="usage", reference="r2"),
+        BalanceChange(user_id=poor.id, amount=3, reason="usage"),
+    ]
+    result = await wallet_service.debit_batch(charges)
+
+    # The poor user's charges exceed the balance together and are all rejected
+    assert result.balances == {rich.id: 70}
+    assert result.rejected == [poor.id]
+
+    ledger = await wallet_service.get_ledger(rich.id)
+    assert [(entry.delta, entry.balance_after) for entry in ledger] == [
+        (-10, 90),
+        (-20, 70),
+    ]
+    assert await wallet_service.get_ledger(poor.id) == []
+
+    await session.refresh(poor)
+    assert poor.balance == 5
+
+
+# Parallel debits from separate connections must not lose updates
+@pytest.mark.anyio
+async def test_concurrent_debits_are_exact(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'wallet.db'}",
+        connect_args={"timeout": 60},
+        pool_size=10,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    initial_balance, debits = 1500, 2000
+
+    async with session_maker() as session:
+        user = User(email="reseller@example.com", balance=initial_balance)
+        session.add(user)
+        await session.commit()
+        user_id = user.id
+
+    async def debit(i: int) -> bool:
+        async with session_maker() as session:
+            try:
+                await WalletService(db_session=session).debit(
+                    user_id, 1, "usage", reference=str(i)
+                )
+                return True
+            except InsufficientBalance:
+                return False
+
+    try:
+        results = await asyncio.gather(*(debit(i) for i in range(debits)))
+
+        async with session_maker() as session:
+            user = await session.get(User, user_id)
+            ledger = (
+                await session.exec(
+                    select(BalanceLedger).where(BalanceLedger.user_id == user_id)
+                )
+            ).all()
+    finally:
+        await engine.dispose()
+
+    assert sum(results) == initial_balance
+    assert user.balance == 0
+    assert len(ledger) == initial_balance
+    assert sorted(entry.balance_after for entry in ledger) == list(
+        range(initial_balance)
+    )
@@ -0,0 +1,49 @@
+import json
+import pytest
+from unittest.mock import patch
+from master_server.cli import export_users, import_users
+from master_server.database.user.service import UserService
+
+
+@pytest.mark.anyio
+async def test_import_and_export_users(session_maker, tmp_path, capsys):
+    source = tmp_path / "users.csv"
+    source.write_text(
+        'email,first_name\nuser0@example.com,"multi\nline"\nuser1@example.com,\n'
+    )
+    target = tmp_path / "users.ndjson"
+
+    with patch("master_server.cli.async_session", session_maker):
+        assert await import_users(str(source), "csv", batch_size=10) == 0
+        assert await export_users(str(target), batch_size=1) == 0
+
+    assert "Inserted 2 users, rejected 0 rows" in capsys.readouterr().out
+    users = [json.loads(line) for line in target.read_text().splitlines()]
+    assert [user["email"] for user in users] == [
+        "user0@example.com",
+        "user1@example.com",
+    ]
+    assert users[0]["first_name"] == "multi\nline"
+
+
+@pytest.mark.anyio
+async def test_export_users_closes_file_on_error(session_maker, tmp_path):
+    files = []
+
+    def tracking_open(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+
+    async def failing_stream(self, batch_size: int = 1000):
+        yield {"email": "user0@example.com"}
+        raise RuntimeError("Connection lost")
+
+    with (
+        patch("master_server.cli.async_session", session_maker),
+        patch("master_server.cli.open", tracking_open, create=True),
+        patch.object(UserService, "stream_users", failing_stream),
+    ):
+        with pytest.raises(RuntimeError):
+            await export_users(str(tmp_path / "users.ndjson"), batch_size=10)
+
+    assert files[0].closed
@@ -0,0 +1,179 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from master_server.database.migration import (
+    MIGRATION_LOCK_KEY,
+    get_alembic_config,
+    upgrade_connection,
+    upgrade_database,
+)
+
+
+async def stamp(database_url: str, revision: str):
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        )
+        await conn.execute(
+            text("INSERT INTO alembic_version VALUES (:revision)"),
+            {"revision": revision},
+        )
+    await engine.dispose()
+
+
+# The user table as of revision 0a9108af8616
+USER_TABLE_DDL = """
+CREATE TABLE "user" (
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL,
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    date_of_birth DATETIME,
+    address JSON,
+    phone JSON,
+    email VARCHAR NOT NULL,
+    created_with_ip VARCHAR NOT NULL,
+    last_login_on DATETIME NOT NULL,
+    last_login_with_ip VARCHAR NOT NULL,
+    banned BOOLEAN NOT NULL,
+    role VARCHAR(8) NOT NULL,
+    referral_code VARCHAR NOT NULL,
+    api_key VARCHAR,
+    is_verified BOOLEAN NOT NULL,
+    token VARCHAR NOT NULL
+)
+"""
+
+
+@pytest.mark.anyio
+async def test_upgrade_database_runs_migrations(tmp_path):
+    config = get_alembic_config()
+    head = ScriptDirectory.from_config(config).get_current_head()
+
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'stamped.db'}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(text(USER_TABLE_DDL))
+        await conn.execute(text('CREATE UNIQUE INDEX ix_user_email ON "user" (email)'))
+    await engine.dispose()
+    await stamp(database_url, "0a9108af8616")
+
+    # Migrations with autocommit blocks run on the startup connection
+    assert await upgrade_database(database_url, config) is True
+
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        version = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+        tables = await conn.run_sync(lambda c: inspect(c).get_table_names())
+        indexes = await conn.run_sync(
+            lambda c: {index["name"] for index in inspect(c).get_indexes("user")}
+        )
+    await engine.dispose()
+
+    assert version == head
+    assert {"emailoutbox", "balanceledger", "logintoken"} <= set(tables)
+    assert {"ix_user_token", "ix_user_created_at_id"} <= indexes
+
+    # Nothing left to apply
+    assert await upgrade_database(database_url, config) is False
+
+
+@pytest.mark.anyio
+async def test_upgrade_database_rejects_case_duplicate_usernames(tmp_path):
+    config = get_alembic_config()
+
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'duplicates.db'}"
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(text(USER_TABLE_DDL))
+        for user_id, username in enumerate(("Bob", "bob", "alice"), start=1):
+            await conn.execute(
+                text(
+                    'INSERT INTO "user" VALUES (0, 0, :id, :username, NULL, NULL, '
+                    "NULL, NULL, NULL, :email, '', 0, '', 0, 'USER', '', NULL, 0, :token)"
+                ),
+                {
+                    "id": user_id,
+                    "username": username,
+                    "email": f"user{user_id}@example.com",
+                    "token": f"token{user_id}",
+                },
+            )
+    await engine.dispose()
+    await stamp(database_url, "0a9108af8616")
+
+    # The conflicting usernames are listed, and no index is created
+    with pytest.raises(RuntimeError, match="Bob, bob"):
+        await upgrade_database(database_url, config)
+
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        version = await conn.scalar(text("SELECT version_num FROM alembic_version"))
+        indexes = await conn.run_sync(
+            lambda c: {index["name"] for index in inspect(c).get_indexes("user")}
+        )
+    await engine.dispose()
+
+    assert version == "0a9108af8616"
+    assert "ix_user_token" not in indexes
+
+
+@pytest.mark.anyio
+async def test_upgrade_database(tmp_path):
+    config = get_alembic_config()
+    head = ScriptDirectory.from_config(config).get_current_head()
+
+    # case 1: database behind head is upgraded in-process on the same connection
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'behind.db'}"
+    await stamp(database_url, "0a9108af8616")
+
+    with patch("master_server.database.migration.command.upgrade") as mock_upgrade:
+        assert await upgrade_database(database_url, config) is True
+
+        mock_upgrade.assert_called_once_with(config, "head")
+        assert config.attributes["connection"] is not None
+
+    # case 2: database at head skips alembic entirely
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'head.db'}"
+    await stamp(database_url, head)
+
+    with (
+        patch("master_server.database.migration.command.upgrade") as mock_upgrade,
+        patch(
+            "master_server.database.migration.upgrade_connection"
+        ) as mock_upgrade_connection,
+    ):
+        assert await upgrade_database(database_url, get_alembic_config()) is False
+
+        mock_upgrade.assert_not_called()
+        mock_upgrade_connection.assert_not_called()
+
+
+def test_upgrade_connection_releases_lock_after_failure():
+    connection = MagicMock()
+    connection.dialect.name = "postgresql"
+    config = get_alembic_config()
+
+    with (
+        patch("master_server.database.migration.get_current_heads", return_value=set()),
+        patch(
+            "master_server.database.migration.command.upgrade",
+            side_effect=RuntimeError("migration failed"),
+        ),
+        pytest.raises(RuntimeError, match="migration failed"),
+    ):
+        upgrade_connection(connection, config, {"head"})
+
+    # The failed transaction is rolled back before unlocking, keeping the real error
+    assert [name for name, *_ in connection.mock_calls][-2:] == [
+        "rollback",
+        "exec_driver_sql",
+    ]
+    connection.exec_driver_sql.assert_called_with(
+        f"SELECT pg_advisory_unlock({MIGRATION_LOCK_KEY})"
+    )
@@ -0,0 +1,199 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import patch
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.config import get_autocommit_session, get_session
+from master_server.database.unit_of_work import (
+    enable_sqlite_savepoints,
+    in_unit_of_work,
+    unit_of_work,
+    write_scope,
+)
+from master_server.database.user.model import User
+from master_server.database.wallet.exception import InsufficientBalance
+from master_server.database.wallet.service import WalletService
+
+
+@pytest.fixture(name="file_session_maker")
+async def file_session_maker_fixture(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'uow.db'}")
+    enable_sqlite_savepoints(engine)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest.fixture(name="commits")
+def commits_fixture(file_session_maker):
+    commits = []
+    sync_engine = file_session_maker.kw["bind"].sync_engine
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    event.listen(sync_engine, "commit", count_commit)
+    yield commits
+    event.remove(sync_engine, "commit", count_commit)
+
+
+async def get_emails(session_maker: async_sessionmaker) -> list[str]:
+    async with session_maker() as session:
+        result = await session.exec(select(User.email).order_by(User.id))
+        return result.all()
+
+
+@pytest.mark.anyio
+async def test_unit_of_work_commits_once(file_session_maker, commits):
+    # case 1: every Base write commits outside of a unit of work
+    async with file_session_maker() as session:
+        user = User(email="user0@example.com")
+        await user.save(session)
+        await user.update(session, username="user0")
+        await User(email="user1@example.com").save(session)
+
+    assert len(commits) == 3
+
+    # case 2: a single commit for the whole unit of work
+    commits.clear()
+    async with file_session_maker() as session:
+        async with unit_of_work(session):
+            assert in_unit_of_work(session)
+
+            user = User(email="user2@example.com")
+            await user.save(session)
+            await user.update(session, username="user2")
+            await User(email="user3@example.com").save(session)
+
+            assert commits == []
+
+        assert not in_unit_of_work(session)
+
+    assert len(commits) == 1
+    assert await get_emails(file_session_maker) == [
+        f"user{i}@example.com" for i in range(4)
+    ]
+
+
+@pytest.mark.anyio
+async def test_unit_of_work_savepoints(file_session_maker):
+    statements = []
+    sync_engine = file_session_maker.kw["bind"].sync_engine
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        async with file_session_maker() as session:
+            async with unit_of_work(session):
+                # case 1: Base writes flush without a savepoint
+                await User(email="user0@example.com").save(session)
+                assert not any("SAVEPOINT" in statement for statement in statements)
+
+                # case 2: a failed write in an opted-in savepoint only undoes itself
+                with pytest.raises(IntegrityError):
+                    async with write_scope(session, savepoint=True):
+                        session.add(User(email="user0@example.com"))
+
+                await User(email="user1@example.com").save(session)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert any("SAVEPOINT" in statement for statement in statements)
+    assert await get_emails(file_session_maker) == [
+        "user0@example.com",
+        "user1@example.com",
+    ]
+
+
+@pytest.mark.anyio
+async def test_services_in_unit_of_work(file_session_maker, commits):
+    async with file_session_maker() as session:
+        user = User(email="wallet@example.com", balance=10)
+        await user.save(session)
+
+    commits.clear()
+    async with file_session_maker() as session:
+        async with unit_of_work(session):
+            service = WalletService(db_session=session)
+            assert await service.credit(user.id, 5, "top_up") == 15
+
+            # A rejected debit leaves the unit of work usable
+            with pytest.raises(InsufficientBalance):
+                await service.debit(user.id, 100, "usage")
+
+            assert (await service.debit_batch([])).balances == {}
+            assert commits == []
+
+    assert len(commits) == 1
+    async with file_session_maker() as session:
+        assert (await session.get(User, user.id)).balance == 15
+        assert len(await WalletService(db_session=session).get_ledger(user.id)) == 1
+
+
+@pytest.mark.anyio
+async def test_unit_of_work_rollback(file_session_maker, commits):
+    async with file_session_maker() as session:
+        with pytest.raises(RuntimeError):
+            async with unit_of_work(session):
+                await User(email="user0@example.com").save(session)
+                raise RuntimeError
+
+    assert commits == []
+    assert await get_emails(file_session_maker) == []
+
+
+@pytest.mark.anyio
+async def test_request_commits(file_session_maker, commits):
+    app = FastAPI()
+
+    async def touch_user_twice(email: str, db_session: AsyncSession, fail: bool):
+        user = User(email=email)
+        await user.save(db_session)
+        await user.update(db_session, username=email.split("@")[0])
+        if fail:
+            raise HTTPException(status_code=400, detail="Failed")
+
+    @app.post("/users")
+    async def add_user(email: str, fail: bool = False, db_session=Depends(get_session)):
+        await touch_user_twice(email, db_session, fail)
+
+    @app.post("/autocommit/users")
+    async def add_user_autocommit(
+        email: str, fail: bool = False, db_session=Depends(get_autocommit_session)
+    ):
+        await touch_user_twice(email, db_session, fail)
+
+    with patch("master_server.database.config.async_session", file_session_maker):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            # case 1: one commit per request
+            response = await client.post("/users?email=user0@example.com")
+            assert response.status_code == 200
+            assert len(commits) == 1
+
+            # case 2: nothing is written when the endpoint raises
+            commits.clear()
+            response = await client.post("/users?email=user1@example.com&fail=true")
+            assert response.status_code == 400
+            assert commits == []
+
+            # case 3: opted out endpoints commit every write
+            response = await client.post("/autocommit/users?email=user2@example.com")
+            assert response.status_code == 200
+            assert len(commits) == 2
+
+    assert await get_emails(file_session_maker) == [
+        "user0@example.com",
+        "user2@example.com",
+    ]
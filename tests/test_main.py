@@ -0,0 +1,65 @@
+from unittest.mock import patch
+from main import get_log_config, get_server_options, run_server
+from master_server.config import get_settings
+
+
+def test_get_server_options():
+    settings = get_settings().model_copy(update={"ENVIRONMENT": "production"})
+
+    # case 1: development runs a single reloading worker
+    with patch.dict("os.environ", {"ENVIRONMENT": "development"}):
+        options = get_server_options()
+
+        assert options["reload"] is True
+        assert "workers" not in options
+
+    # case 2: production defaults to one worker per CPU
+    with (
+        patch.dict("os.environ", {"ENVIRONMENT": "production"}),
+        patch("main.get_settings", return_value=settings),
+        patch("os.cpu_count", return_value=2),
+    ):
+        options = get_server_options()
+
+        assert "reload" not in options
+        assert options["workers"] == 2
+        assert options["limit_max_requests"] == settings.SERVER_LIMIT_MAX_REQUESTS
+
+    with (
+        patch.dict("os.environ", {"ENVIRONMENT": "production"}),
+        patch("main.get_settings", return_value=settings),
+        patch("os.cpu_count", return_value=64),
+    ):
+        assert get_server_options()["workers"] == 64
+
+    # case 3: production with configured workers and recycling
+    production_settings = settings.model_copy(
+        update={"SERVER_WORKERS": 4, "SERVER_LIMIT_MAX_REQUESTS": 10000}
+    )
+    with (
+        patch.dict("os.environ", {"ENVIRONMENT": "production"}),
+        patch("main.get_settings", return_value=production_settings),
+    ):
+        options = get_server_options()
+
+        assert options["workers"] == 4
+        assert options["limit_max_requests"] == 10000
+
+
+def test_run_server():
+    with (
+        patch.dict("os.environ", {"ENVIRONMENT": "production"}),
+        patch("main.uvicorn.run") as mock_run,
+    ):
+        run_server()
+
+        mock_run.assert_called_once()
+        assert mock_run.call_args.kwargs["app"] == "master_server.server:app"
+
+
+def test_get_log_config():
+    with patch.dict("os.environ", {"ENVIRONMENT": "development"}):
+        assert get_log_config() == "./config.ini"
+
+    with patch.dict("os.environ", {"ENVIRONMENT": "production"}):
+        assert get_log_config() == "./config.production.ini"
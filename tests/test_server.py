@@ -1,5 +1,7 @@
 import pytest
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from master_server.config import get_settings
+from master_server.server import create_app
 
 
 @pytest.mark.anyio
@@ -7,3 +9,26 @@ async def test_index_route(test_client):
     response = await test_client.get("/")
     assert response.status_code == 200
     assert response.json() == {"message": "Master Server API"}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "environment, metrics_enabled, status_code",
+    [
+        ("production", None, 404),
+        ("development", None, 200),
+        ("production", True, 200),
+    ],
+)
+async def test_metrics_route(environment: str, metrics_enabled: bool, status_code: int):
+    settings = get_settings().model_copy(
+        update={"ENVIRONMENT": environment, "METRICS_ENABLED": metrics_enabled}
+    )
+    app = create_app(settings)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == status_code
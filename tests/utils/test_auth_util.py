@@ -1,10 +1,11 @@
 import string
 import pytest
 import hashlib
-from jose import JWTError
+from jose import JWTError, jwt
 from unittest.mock import patch, ANY, MagicMock
 from urllib.parse import urlencode
 from master_server.utils.auth import AuthUtil
+from master_server.utils.jwt_backend import PyJWTBackend, verified_token_cache
 from master_server.config import get_settings
 
 
@@ -40,7 +41,7 @@ def test_verify_jwt_token(auth_util: AuthUtil):
         assert extracted_email == email
         mock_decode.assert_called_once_with(
             token,
-            auth_util.settings.JWT_SECRET_KEY,
+            auth_util.jwt_backend.key,
             algorithms=[auth_util.settings.JWT_ALGORITHM],
         )
 
@@ -51,6 +52,43 @@ def test_verify_jwt_token(auth_util: AuthUtil):
         assert extracted_email is None
 
 
+# Test for verified JWT token cache
+def test_verify_jwt_token_cache(auth_util: AuthUtil):
+    email = "test@example.com"
+    token = auth_util.create_jwt_token(email)
+
+    # case 1: a reused token is verified once
+    with patch("jose.jwt.decode", wraps=jwt.decode) as mock_decode:
+        for _ in range(100):
+            assert auth_util.verify_jwt_token(token) == email
+
+        assert mock_decode.call_count == 1
+
+    # case 2: expired claims are not cached
+    with patch("jose.jwt.decode", return_value={"sub": email, "exp": 0}):
+        assert auth_util.verify_jwt_token("expired") == email
+    assert verified_token_cache.get("expired") is None
+
+    # case 3: invalid tokens are not cached
+    with patch("jose.jwt.decode", side_effect=JWTError) as mock_decode:
+        assert auth_util.verify_jwt_token("invalid_token") is None
+        assert auth_util.verify_jwt_token("invalid_token") is None
+        assert mock_decode.call_count == 2
+
+
+# Test for the optional PyJWT backend
+def test_pyjwt_backend():
+    pytest.importorskip("jwt")
+    settings = get_settings()
+    backend = PyJWTBackend(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM)
+
+    token = backend.encode({"sub": "test@example.com"})
+    assert backend.decode(token) == {"sub": "test@example.com"}
+
+    with pytest.raises(JWTError):
+        backend.decode("invalid_token")
+
+
 # Test for sending magic link
 def test_send_magic_link(auth_util: AuthUtil):
     # case 1: SendGridAPIClient.send success
@@ -116,9 +154,10 @@ def test_get_user_gravatar_url():
     def mocked_urlencode(query):
         return urlencode(query)
 
-    with patch("hashlib.md5") as mock_md5, patch(
-        "urllib.parse.urlencode", side_effect=mocked_urlencode
-    ) as mock_urlencode:
+    with (
+        patch("hashlib.md5") as mock_md5,
+        patch("urllib.parse.urlencode", side_effect=mocked_urlencode) as mock_urlencode,
+    ):
         mocked_md5_instance = mock_md5.return_value
         mocked_md5_instance.hexdigest.return_value = expected_email_hash
 
@@ -155,3 +194,25 @@ def test_get_user_gravatar_url():
             f"https://www.gravatar.com/avatar/{diff_email_hash}?{expected_query_params}"
         )
         assert gravatar_url == expected_url_diff
+
+
+# Gravatar hashes and query strings are computed once
+def test_get_user_gravatar_url_cached():
+    auth_util = AuthUtil()
+    email = "cached@example.com"
+    expected_url = auth_util.get_user_gravatar_url(email)
+
+    with (
+        patch("hashlib.md5") as mock_md5,
+        patch("master_server.utils.auth.urlencode") as mock_urlencode,
+    ):
+        # case 1: nothing is computed for a known email
+        assert auth_util.get_user_gravatar_url(email) == expected_url
+        mock_md5.assert_not_called()
+        mock_urlencode.assert_not_called()
+
+        # case 2: a new email is hashed once, the query string is reused
+        auth_util.get_user_gravatar_url("other@example.com")
+        auth_util.get_user_gravatar_url("other@example.com")
+        assert mock_md5.call_count == 1
+        mock_urlencode.assert_not_called()
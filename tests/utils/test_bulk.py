@@ -0,0 +1,87 @@
+import pytest
+from master_server.utils.bulk import InvalidRow, iter_csv, iter_ndjson
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(rows):
+    return [row async for row in rows]
+
+
+@pytest.mark.anyio
+async def test_iter_ndjson():
+    rows = await collect(
+        iter_ndjson(
+            stream(
+                b'{"email": "a@example.com"}\n{"email": ',
+                b'"b@example.com"}\r\n\n',
+                b'not json\n[1, 2]\n{"email": "\xff"}\n{"email": "c@example.com"}',
+            )
+        )
+    )
+
+    assert rows[0] == {"email": "a@example.com"}
+    assert rows[1] == {"email": "b@example.com"}
+    assert isinstance(rows[2], InvalidRow)
+    assert isinstance(rows[3], InvalidRow)
+    assert rows[4].message.startswith("Invalid UTF-8")
+    assert rows[5] == {"email": "c@example.com"}
+    assert len(rows) == 6
+
+
+@pytest.mark.anyio
+async def test_iter_csv():
+    rows = await collect(
+        iter_csv(
+            stream(
+                b"email,username,address\n",
+                b'a@example.com,alice,"{""city"": ""Test City""}"\n',
+                b"b@example.com,,\n",
+                b"c@example.com\n",
+                b"d@example.com,dave,{broken\n",
+            )
+        )
+    )
+
+    assert rows[0] == {
+        "email": "a@example.com",
+        "username": "alice",
+        "address": {"city": "Test City"},
+    }
+    assert rows[1] == {"email": "b@example.com"}
+    assert isinstance(rows[2], InvalidRow)
+    assert isinstance(rows[3], InvalidRow)
+    assert len(rows) == 4
+
+    # empty body
+    assert await collect(iter_csv(stream())) == []
+
+
+@pytest.mark.anyio
+async def test_iter_csv_quoted_lines():
+    rows = await collect(
+        iter_csv(
+            stream(
+                b"email,first_name\n",
+                b'a@example.com,"multi\r\n',
+                b'line ""name"""\n',
+                b"\xff@example.com,bob\n",
+                b"c@example.com,carol\n",
+                b'd@example.com,"unterminated\n',
+            )
+        )
+    )
+
+    # case 1: quoted fields spanning lines are read as one row
+    assert rows[0] == {"email": "a@example.com", "first_name": 'multi\nline "name"'}
+
+    # case 2: undecodable lines are rejected, the next rows are still read
+    assert rows[1].message.startswith("Invalid UTF-8")
+    assert rows[2] == {"email": "c@example.com", "first_name": "carol"}
+
+    # case 3: a quoted field left open at the end of the body
+    assert rows[3].message == "Unterminated quoted field"
+    assert len(rows) == 4
@@ -0,0 +1,40 @@
+from unittest.mock import patch
+from master_server.utils.cache import LRUCacheBackend
+
+
+def test_lru_cache_backend():
+    cache = LRUCacheBackend(max_size=2, ttl_seconds=30)
+
+    # case 1: set and get
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+
+    # case 2: least recently used entry is evicted
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+    # case 3: delete and clear
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_backend_ttl():
+    cache = LRUCacheBackend(ttl_seconds=30)
+
+    with patch("master_server.utils.cache.time.monotonic", return_value=100):
+        cache.set("a", 1)
+
+    with patch("master_server.utils.cache.time.monotonic", return_value=129):
+        assert cache.get("a") == 1
+
+    with patch("master_server.utils.cache.time.monotonic", return_value=130):
+        assert cache.get("a") is None
+        assert len(cache) == 0
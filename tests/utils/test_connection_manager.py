@@ -0,0 +1,245 @@
+import asyncio
+import time
+import pytest
+from master_server.enums.websocket_enums import SlowConsumerPolicyEnum
+from master_server.utils.connection_manager import (
+    SLOW_CONSUMER_CLOSE_CODE,
+    ConnectionManager,
+)
+from master_server.utils.pubsub import InMemoryPubSub
+
+
+class FakeWebSocket:
+    """
+    In-process websocket recording what is sent to it
+    """
+
+    def __init__(self, delay: float = 0, blocked: bool = False):
+        self.sent: list[dict] = []
+        self.delay = delay
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+        self.accepted = False
+        self.close_code = None
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send(self, message: dict):
+        await self.unblocked.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def connect_many(manager: ConnectionManager, count: int) -> list[FakeWebSocket]:
+    websockets = [FakeWebSocket() for _ in range(count)]
+    for websocket in websockets:
+        await manager.connect(websocket)
+    return websockets
+
+
+@pytest.mark.anyio
+async def test_broadcast_to_many_connections():
+    manager = ConnectionManager()
+    websockets = await connect_many(manager, 100)
+
+    assert await manager.broadcast({"type": "update", "value": 1}) == 100
+    await manager.drain()
+
+    # Encoded once and shared by every recipient
+    event = websockets[0].sent[0]
+    assert event == {"type": "websocket.send", "text": '{"type":"update","value":1}'}
+    assert all(websocket.sent == [event] for websocket in websockets)
+    assert all(websocket.sent[0] is event for websocket in websockets)
+
+    await manager.close()
+    assert manager.connections == {}
+
+
+@pytest.mark.benchmark
+@pytest.mark.anyio
+async def test_broadcast_benchmark():
+    manager = ConnectionManager()
+    await connect_many(manager, 10_000)
+
+    start = time.perf_counter()
+    await manager.broadcast({"type": "update", "value": 1})
+    await manager.drain()
+    elapsed = time.perf_counter() - start
+    print(f"Broadcast to 10000 connections in {elapsed * 1000:.1f}ms")
+
+    await manager.close()
+
+
+@pytest.mark.anyio
+async def test_slow_client_does_not_delay_others():
+    manager = ConnectionManager()
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    await manager.connect(slow)
+    await manager.connect(fast)
+
+    await manager.broadcast("hello")
+    await asyncio.wait_for(manager.connections[fast].queue.join(), timeout=1)
+
+    assert fast.sent == [{"type": "websocket.send", "text": "hello"}]
+    assert slow.sent == []
+
+    slow.unblocked.set()
+    await manager.drain()
+    assert slow.sent == fast.sent
+
+    await manager.close()
+
+
+@pytest.mark.anyio
+async def test_bounded_concurrency():
+    manager = ConnectionManager(max_concurrent_sends=5)
+    in_flight, max_in_flight = 0, 0
+
+    class TrackingWebSocket(FakeWebSocket):
+        async def send(self, message: dict):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+    for _ in range(50):
+        await manager.connect(TrackingWebSocket())
+
+    await manager.broadcast(b"\x00\x01")
+    await manager.drain()
+
+    assert max_in_flight == 5
+    await manager.close()
+
+
+@pytest.mark.anyio
+async def test_slow_consumer_policies():
+    # case 1: drop the oldest queued message
+    manager = ConnectionManager(max_queue_size=2)
+    websocket = FakeWebSocket(blocked=True)
+    await manager.connect(websocket)
+
+    for i in range(5):
+        await manager.broadcast(str(i))
+
+    assert manager.connections[websocket].dropped == 3
+    websocket.unblocked.set()
+    await manager.drain()
+    assert [message["text"] for message in websocket.sent] == ["3", "4"]
+    await manager.close()
+
+    # case 2: drop the new message
+    manager = ConnectionManager(
+        max_queue_size=2, policy=SlowConsumerPolicyEnum.DROP_NEWEST
+    )
+    websocket = FakeWebSocket(blocked=True)
+    await manager.connect(websocket)
+
+    for i in range(5):
+        await manager.broadcast(str(i))
+
+    assert manager.connections[websocket].dropped == 3
+    websocket.unblocked.set()
+    await manager.drain()
+    assert [message["text"] for message in websocket.sent] == ["0", "1"]
+    await manager.close()
+
+    # case 3: disconnect the slow consumer
+    manager = ConnectionManager(
+        max_queue_size=2, policy=SlowConsumerPolicyEnum.DISCONNECT
+    )
+    websocket = FakeWebSocket(blocked=True)
+    await manager.connect(websocket)
+
+    for i in range(5):
+        await manager.broadcast(str(i))
+
+    assert websocket not in manager.connections
+    await manager.close()
+    assert websocket.close_code == SLOW_CONSUMER_CLOSE_CODE
+
+
+@pytest.mark.anyio
+async def test_topics():
+    manager = ConnectionManager()
+    news, sports, both = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(news, topics=["news"])
+    await manager.connect(sports, topics=["sports"])
+    await manager.connect(both, topics=["news", "sports"])
+
+    assert await manager.broadcast("n", topic="news") == 2
+    assert await manager.broadcast("s", topic="sports") == 2
+    assert await manager.broadcast("x", topic="unknown") == 0
+
+    manager.unsubscribe(both, "sports")
+    assert await manager.broadcast("s2", topic="sports") == 1
+
+    await manager.send(news, "direct")
+    await manager.drain()
+
+    assert [message["text"] for message in news.sent] == ["n", "direct"]
+    assert [message["text"] for message in sports.sent] == ["s", "s2"]
+    assert [message["text"] for message in both.sent] == ["n", "s"]
+
+    # Disconnected connections are removed from their topics
+    manager.disconnect(sports)
+    manager.disconnect(sports)
+    assert "sports" not in manager.topics
+
+    await manager.close()
+
+
+@pytest.mark.anyio
+async def test_failed_send_disconnects():
+    manager = ConnectionManager()
+
+    class BrokenWebSocket(FakeWebSocket):
+        async def send(self, message: dict):
+            raise RuntimeError("Connection closed")
+
+    websocket = BrokenWebSocket()
+    await manager.connect(websocket)
+    await manager.broadcast("hello")
+    await manager.drain()
+    await asyncio.sleep(0)
+
+    assert manager.active_connections == []
+
+
+@pytest.mark.anyio
+async def test_broadcast_across_workers():
+    pubsub = InMemoryPubSub(flush_interval=0.01)
+    worker_1 = ConnectionManager(pubsub=pubsub)
+    worker_2 = ConnectionManager(pubsub=pubsub)
+
+    websocket_1, websocket_2 = FakeWebSocket(), FakeWebSocket()
+    news = FakeWebSocket()
+    await worker_1.connect(websocket_1)
+    await worker_2.connect(websocket_2)
+    await worker_2.connect(news, topics=["news"])
+
+    assert await worker_1.broadcast({"value": 1}) == 0
+    await worker_1.broadcast(b"\x00\xff", topic="news")
+    await worker_1.broadcast("state-1", key="state")
+    await worker_1.broadcast("state-2", key="state")
+
+    await asyncio.sleep(0.05)
+    await worker_1.drain()
+    await worker_2.drain()
+
+    # One NOTIFY-sized batch for all broadcasts, coalesced by key
+    assert len(pubsub.batches) == 1
+    texts = ['{"value":1}', "state-2"]
+    assert [message["text"] for message in websocket_1.sent] == texts
+    assert [message["text"] for message in websocket_2.sent] == texts
+    assert news.sent[1] == {"type": "websocket.send", "bytes": b"\x00\xff"}
+
+    await worker_1.close()
+    await worker_2.close()
@@ -0,0 +1,193 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.email.model import EmailOutbox
+from master_server.database.email.service import EmailOutboxService
+from master_server.enums.email_enums import EmailStatusEnum
+from master_server.utils.email import (
+    EmailDeliveryError,
+    EmailOutboxWorker,
+    InMemoryEmailTransport,
+    SendGridTransport,
+)
+
+
+async def enqueue_emails(session: AsyncSession, count: int, html_content="Hi -name-"):
+    service = EmailOutboxService(db_session=session)
+    for i in range(count):
+        service.enqueue(
+            recipient=f"user{i}@example.com",
+            subject="Subject",
+            html_content=html_content,
+            substitutions={"-name-": f"user{i}"},
+        )
+    await session.commit()
+
+
+async def get_emails(session: AsyncSession) -> list[EmailOutbox]:
+    session.expire_all()
+    result = await session.exec(select(EmailOutbox).order_by(EmailOutbox.id))
+    return result.all()
+
+
+@pytest.mark.anyio
+async def test_enqueue_is_written_by_caller_commit(session: AsyncSession):
+    service = EmailOutboxService(db_session=session)
+    service.enqueue(recipient="test@example.com", subject="s", html_content="c")
+
+    # case 1: rolled back with the surrounding transaction
+    await session.rollback()
+    assert await get_emails(session) == []
+
+    # case 2: written by the surrounding commit
+    service.enqueue(recipient="test@example.com", subject="s", html_content="c")
+    await session.commit()
+
+    emails = await get_emails(session)
+    assert len(emails) == 1
+    assert emails[0].status == EmailStatusEnum.PENDING
+
+
+@pytest.mark.anyio
+async def test_worker_batches_emails(session_maker, session: AsyncSession):
+    await enqueue_emails(session, 3)
+    await enqueue_emails(session, 1, html_content="Other -name-")
+
+    transport = InMemoryEmailTransport()
+    worker = EmailOutboxWorker(session_maker, transport, batch_size=10)
+
+    assert await worker.run_once() == 4
+    assert sorted(len(batch) for batch in transport.batches) == [1, 3]
+
+    emails = await get_emails(session)
+    assert all(email.status == EmailStatusEnum.SENT for email in emails)
+    assert all(email.sent_at is not None for email in emails)
+    # Substitutions may hold magic links, they are not kept once sent
+    assert all(email.substitutions is None for email in emails)
+
+    # Nothing left to deliver
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.anyio
+async def test_worker_retries_with_backoff(session_maker, session: AsyncSession):
+    await enqueue_emails(session, 1)
+
+    transport = InMemoryEmailTransport(fail_times=1)
+    worker = EmailOutboxWorker(
+        session_maker, transport, max_attempts=2, backoff_seconds=60
+    )
+
+    # case 1: failed delivery is rescheduled
+    before = datetime.now()
+    assert await worker.run_once() == 1
+
+    email = (await get_emails(session))[0]
+    assert email.status == EmailStatusEnum.PENDING
+    assert email.attempts == 1
+    assert email.substitutions == {"-name-": "user0"}
+    assert email.last_error == "Simulated delivery failure"
+    assert email.next_attempt_at >= before + timedelta(seconds=60)
+
+    # case 2: not claimed before the backoff expires
+    assert await worker.run_once() == 0
+
+    # case 3: delivered once due
+    email.next_attempt_at = datetime.now()
+    await session.commit()
+
+    assert await worker.run_once() == 1
+    email = (await get_emails(session))[0]
+    assert email.status == EmailStatusEnum.SENT
+    assert len(transport.sent) == 1
+
+
+@pytest.mark.anyio
+async def test_worker_gives_up_after_max_attempts(session_maker, session: AsyncSession):
+    await enqueue_emails(session, 1)
+
+    transport = InMemoryEmailTransport(fail_times=2)
+    worker = EmailOutboxWorker(
+        session_maker, transport, max_attempts=2, backoff_seconds=0
+    )
+
+    await worker.run_once()
+    await worker.run_once()
+
+    email = (await get_emails(session))[0]
+    assert email.status == EmailStatusEnum.FAILED
+    assert email.attempts == 2
+    assert email.substitutions is None
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.anyio
+async def test_worker_reclaims_expired_lease(session_maker, session: AsyncSession):
+    await enqueue_emails(session, 1)
+
+    # A worker claimed the email and died before reporting a result
+    service = EmailOutboxService(db_session=session)
+    await service.claim_due(limit=10, lease_seconds=0)
+
+    transport = InMemoryEmailTransport()
+    worker = EmailOutboxWorker(session_maker, transport)
+
+    assert await worker.run_once() == 1
+    assert len(transport.sent) == 1
+
+
+@pytest.mark.anyio
+async def test_purge_finished_emails(session: AsyncSession):
+    await enqueue_emails(session, 3)
+    emails = await get_emails(session)
+
+    service = EmailOutboxService(db_session=session)
+    await service.mark_sent(emails[:1])
+    await service.mark_failed(emails[1:2], "error", max_attempts=1, backoff_seconds=0)
+
+    # case 1: recently finished emails are kept
+    assert await service.purge(older_than=datetime.now() - timedelta(hours=1)) == 0
+
+    # case 2: sent and failed emails are deleted, pending ones are kept
+    assert await service.purge(older_than=datetime.now() + timedelta(seconds=1)) == 2
+    assert [email.status for email in await get_emails(session)] == [
+        EmailStatusEnum.PENDING
+    ]
+
+
+@pytest.mark.anyio
+async def test_sendgrid_transport():
+    messages = [
+        EmailOutbox(
+            recipient=f"user{i}@example.com",
+            subject="Subject",
+            html_content="Hi -name-",
+            substitutions={"-name-": f"user{i}"},
+        )
+        for i in range(2)
+    ]
+
+    with patch("master_server.utils.email.SendGridAPIClient") as mock_sendgrid:
+        transport = SendGridTransport(api_key="key", from_email="from@example.com")
+
+        # case 1: a single request with one personalization per recipient
+        mock_response = MagicMock()
+        mock_response.status_code = 202
+        mock_sendgrid.return_value.send.return_value = mock_response
+
+        await transport.send(messages)
+
+        mail = mock_sendgrid.return_value.send.call_args.args[0].get()
+        assert mock_sendgrid.return_value.send.call_count == 1
+        assert sorted(p["to"][0]["email"] for p in mail["personalizations"]) == [
+            "user0@example.com",
+            "user1@example.com",
+        ]
+        assert all("-name-" in p["substitutions"] for p in mail["personalizations"])
+
+        # case 2: rejected by SendGrid
+        mock_response.status_code = 400
+        with pytest.raises(EmailDeliveryError):
+            await transport.send(messages)
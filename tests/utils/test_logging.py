@@ -0,0 +1,141 @@
+import asyncio
+import io
+import json
+import logging
+import logging.config
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from master_server.utils.logging import AppLogger, AsyncQueueHandler, JsonFormatter
+from master_server.utils.singleton import SingletonMeta
+
+
+class GatedStream(io.StringIO):
+    """
+    Stream blocking every write until released, like a blocked pipe or slow terminal
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text: str) -> int:
+        # Release after a timeout, so writing on the event loop fails instead of hanging
+        if not self.release.wait(timeout=5):
+            self.release.set()
+        return super().write(text)
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_json_formatter():
+    logger = make_logger("test_json_formatter", logging.NullHandler())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logger.makeRecord(
+            logger.name,
+            logging.ERROR,
+            __file__,
+            1,
+            "Failed %s",
+            ("job",),
+            sys.exc_info(),
+        )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "test_json_formatter"
+    assert entry["message"] == "Failed job"
+    assert "ValueError: boom" in entry["exc_info"]
+    assert "\n" not in JsonFormatter().format(record)
+
+
+async def log_concurrently(logger: logging.Logger, tasks: int, calls: int):
+    async def request(task: int):
+        for call in range(calls):
+            logger.info("request %d call %d", task, call)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(request(task) for task in range(tasks)))
+
+
+@pytest.mark.anyio
+async def test_async_queue_handler_does_not_block():
+    tasks, calls = 20, 10
+
+    stream = GatedStream()
+    handler = AsyncQueueHandler(stream)
+    handler.setFormatter(JsonFormatter())
+
+    # Every log call returns while the stream is still blocked on the first write
+    await log_concurrently(make_logger("test_queued", handler), tasks, calls)
+    assert stream.getvalue() == ""
+
+    # Everything is written once the stream is released and the handler is closed
+    stream.release.set()
+    handler.close()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == tasks * calls
+    assert json.loads(lines[0])["message"] == "request 0 call 0"
+
+
+def test_async_queue_handler_drops_when_full():
+    writing, release = threading.Event(), threading.Event()
+
+    class BlockedStream(io.StringIO):
+        def write(self, text: str) -> int:
+            writing.set()
+            release.wait(timeout=5)
+            return super().write(text)
+
+    stream = BlockedStream()
+    handler = AsyncQueueHandler(stream, max_size=1)
+    logger = make_logger("test_drops", handler)
+
+    # The background thread is stuck writing the first record
+    logger.info("first")
+    assert writing.wait(timeout=5)
+
+    logger.info("second")
+    logger.info("dropped")
+    assert handler.dropped == 1
+
+    release.set()
+    handler.close()
+    assert stream.getvalue().splitlines() == ["first", "second"]
+
+
+def test_production_log_config():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+
+    try:
+        logging.config.fileConfig(
+            "./config.production.ini", disable_existing_loggers=False
+        )
+        handler = root.handlers[0]
+
+        assert isinstance(handler, AsyncQueueHandler)
+        assert isinstance(handler.target.formatter, JsonFormatter)
+    finally:
+        for handler in root.handlers:
+            handler.close()
+        root.handlers, root.level = handlers, level
+
+
+def test_singleton_fast_path():
+    logger = AppLogger()
+
+    # Existing instances are returned without taking the lock
+    with patch.object(SingletonMeta, "_lock", MagicMock()) as mock_lock:
+        assert AppLogger() is logger
+        mock_lock.__enter__.assert_not_called()
@@ -0,0 +1,52 @@
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.email.model import EmailOutbox
+from master_server.database.email.service import EmailOutboxService
+from master_server.database.login_token.model import LoginToken
+from master_server.database.login_token.service import LoginTokenService
+from master_server.database.user.model import User
+from master_server.utils.login_token import LoginTokenPurger
+
+
+@pytest.mark.anyio
+async def test_purger_deletes_expired_tokens(session_maker, session: AsyncSession):
+    user = User(email="user@example.com")
+    session.add(user)
+    await session.commit()
+
+    service = LoginTokenService(db_session=session)
+    service.issue(user.id, token="expired", ttl_seconds=-1)
+    service.issue(user.id, token="valid", ttl_seconds=60)
+    await session.commit()
+
+    purger = LoginTokenPurger(session_maker, batch_size=10)
+    assert await purger.run_once() == 1
+
+    session.expire_all()
+    result = await session.exec(select(LoginToken))
+    assert [token.expires_at > token.issued_at for token in result.all()] == [True]
+
+
+@pytest.mark.anyio
+async def test_purger_deletes_sent_emails(session_maker, session: AsyncSession):
+    service = EmailOutboxService(db_session=session)
+    message = service.enqueue(
+        recipient="user@example.com",
+        subject="Magic link",
+        html_content="-magic_link-",
+        substitutions={"-magic_link-": "http://test/?token=secret"},
+    )
+    await session.commit()
+    await service.mark_sent([message])
+
+    # case 1: kept for the retention period
+    purger = LoginTokenPurger(session_maker, email_retention_seconds=3600)
+    assert await purger.run_once() == 0
+
+    # case 2: deleted after it
+    purger = LoginTokenPurger(session_maker, email_retention_seconds=-1)
+    assert await purger.run_once() == 1
+
+    session.expire_all()
+    assert (await session.exec(select(EmailOutbox))).all() == []
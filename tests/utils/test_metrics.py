@@ -0,0 +1,98 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlmodel import select
+from master_server.database.user.model import User
+from master_server.internal.metrics import router as metrics_router
+from master_server.utils.metrics import (
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    format_labels,
+    instrument_engine,
+)
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(3.65)
+
+
+def test_format_labels():
+    assert format_labels(route='/a"b\\c\n') == 'route="/a\\"b\\\\c\\n"'
+
+
+@pytest.mark.anyio
+async def test_metrics_middleware(session_maker):
+    registry = MetricsRegistry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    instrument_engine(session_maker.kw["bind"])
+
+    async def get_session():
+        async with session_maker() as session:
+            yield session
+
+    @app.get("/users/{user_id}")
+    async def get_user(user_id: int, session=Depends(get_session)):
+        await session.exec(select(User).where(User.id == user_id))
+        await session.exec(select(User).where(User.id == user_id + 1))
+        raise HTTPException(status_code=404, detail="Not found")
+
+    @app.get("/ping")
+    async def ping():
+        return "pong"
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await client.get("/users/1")
+        await client.get("/users/2")
+        await client.get("/ping")
+        await client.get("/missing")
+
+    user_route = registry.routes[("GET", "/users/{user_id}")]
+    assert user_route.statuses == {404: 2}
+    assert user_route.db_queries == 4
+    assert user_route.db_time.count == 2
+    assert user_route.db_time.sum > 0
+
+    ping_route = registry.routes[("GET", "/ping")]
+    assert ping_route.statuses == {200: 1}
+    assert ping_route.response_bytes == len('"pong"')
+    assert ping_route.db_queries == 0
+
+    assert registry.routes[("GET", "<unmatched>")].statuses == {404: 1}
+
+    text = registry.render()
+    assert (
+        'http_requests_total{method="GET",route="/users/{user_id}",status="404"} 2'
+        in text
+    )
+    assert 'db_queries_total{method="GET",route="/users/{user_id}"} 4' in text
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/ping",le="+Inf"} 1'
+        in text
+    )
+    assert "# TYPE db_request_duration_seconds histogram" in text
+    assert "db_pool_checkouts_total" in text
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint():
+    app = FastAPI()
+    app.include_router(metrics_router)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_requests_total counter" in response.text
@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from master_server.database.user.model import User
+from master_server.utils.query_inspector import (
+    QueryInspectorMiddleware,
+    QueryRecorder,
+    normalize_sql,
+    record_queries,
+)
+
+
+def test_normalize_sql():
+    assert (
+        normalize_sql("SELECT *  FROM user\nWHERE id IN (?, ?, ?) AND name = 'it''s'")
+        == "SELECT * FROM user WHERE id IN (...) AND name = ?"
+    )
+    assert normalize_sql("SELECT * FROM user WHERE id = $1 LIMIT 10") == (
+        "SELECT * FROM user WHERE id = ? LIMIT ?"
+    )
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (...)"
+    )
+
+
+def test_query_recorder_groups_statements():
+    recorder = QueryRecorder()
+    recorder.record("SELECT * FROM user WHERE id = 1", 0.001)
+    recorder.record("SELECT * FROM address", 0.005)
+    recorder.record("SELECT * FROM user WHERE id = 2", 0.001)
+
+    assert recorder.count == 3
+    assert recorder.grouped() == [
+        ("SELECT * FROM user WHERE id = ?", 2, pytest.approx(0.002)),
+        ("SELECT * FROM address", 1, 0.005),
+    ]
+    assert "2x" in recorder.report()
+
+
+@pytest.mark.anyio
+async def test_assert_max_queries(session: AsyncSession, assert_max_queries):
+    # case 1: within budget
+    with assert_max_queries(2) as recorder:
+        await session.exec(select(User))
+        await session.exec(select(User).where(User.id == 1))
+    assert recorder.count == 2
+
+    # case 2: over budget, repeated statements are reported together
+    with pytest.raises(AssertionError, match="3 queries") as error:
+        with assert_max_queries(2):
+            for user_id in range(3):
+                await session.exec(select(User).where(User.id == user_id))
+    assert "3x" in str(error.value)
+
+    # Statements outside a recording block are not recorded
+    with record_queries() as recorder:
+        pass
+    await session.exec(select(User))
+    assert recorder.count == 0
+
+
+@pytest.mark.anyio
+async def test_record_failed_queries(session: AsyncSession):
+    with record_queries() as recorder:
+        with pytest.raises(OperationalError):
+            await session.exec(text("SELECT * FROM missing_table"))
+        await session.rollback()
+        await session.exec(select(User))
+
+    # The failed statement is recorded and leaves no start time behind
+    assert recorder.count == 2
+    assert "missing_table" in recorder.queries[0][0]
+
+    connection = await session.connection()
+    start_times = [
+        value
+        for key, value in connection.sync_connection.info.items()
+        if isinstance(key, tuple) and key[0] == "query_start_time"
+    ]
+    assert start_times and not any(start_times)
+
+
+@pytest.mark.anyio
+async def test_query_inspector_middleware(session: AsyncSession):
+    app = FastAPI()
+    app.add_middleware(QueryInspectorMiddleware, max_queries=2)
+
+    @app.get("/users")
+    async def list_users(count: int):
+        for user_id in range(count):
+            await session.exec(select(User).where(User.id == user_id))
+
+    with patch("master_server.utils.query_inspector.logger") as mock_logger:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            await client.get("/users?count=2")
+            mock_logger.warning.assert_not_called()
+
+            await client.get("/users?count=3")
+            message = mock_logger.warning.call_args.args[0]
+            assert "GET /users" in message
+            assert "3x" in message
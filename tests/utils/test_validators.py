@@ -0,0 +1,29 @@
+import pytest
+from master_server.utils.validators import (
+    is_alphanumeric,
+    is_fixed_length_alphanumeric,
+    is_word,
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("abc123", True), ("ABC", True), ("", False), ("ab_c", False), ("abç", False)],
+)
+def test_is_alphanumeric(value: str, expected: bool):
+    assert is_alphanumeric(value) is expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("User_1", True), ("", True), ("user-1", False), ("user 1", False), ("ü", False)],
+)
+def test_is_word(value: str, expected: bool):
+    assert is_word(value) is expected
+
+
+def test_is_fixed_length_alphanumeric():
+    assert is_fixed_length_alphanumeric("ab123", 5)
+    assert not is_fixed_length_alphanumeric("ab12", 5)
+    assert not is_fixed_length_alphanumeric("ab12!", 5)
+    assert not is_fixed_length_alphanumeric("²" * 5, 5)
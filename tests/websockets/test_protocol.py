@@ -0,0 +1,159 @@
+import asyncio
+import time
+import pytest
+from master_server.constants.websocket_constants import MAX_FRAME_PAYLOAD_BYTES
+from master_server.enums.websocket_enums import FrameTypeEnum
+from master_server.websockets.protocol import (
+    FRAME_HEADER,
+    FrameError,
+    buffered,
+    encode_frame,
+    iter_frames,
+    parse_frames,
+)
+from master_server.websockets.test import process_frames
+
+
+def test_parse_frames():
+    data = encode_frame(FrameTypeEnum.AUDIO, 1, b"abc") + encode_frame(
+        FrameTypeEnum.AUDIO, 2, b""
+    )
+    frames = list(parse_frames(data))
+
+    assert [(frame.type, frame.sequence) for frame in frames] == [
+        (FrameTypeEnum.AUDIO, 1),
+        (FrameTypeEnum.AUDIO, 2),
+    ]
+    assert bytes(frames[0].payload) == b"abc"
+    assert bytes(frames[1].payload) == b""
+
+    # case 1: truncated header
+    with pytest.raises(FrameError):
+        list(parse_frames(data[: FRAME_HEADER.size - 1]))
+
+    # case 2: truncated payload
+    with pytest.raises(FrameError):
+        list(parse_frames(encode_frame(FrameTypeEnum.AUDIO, 1, b"abc")[:-1]))
+
+    # case 3: unsupported version
+    with pytest.raises(FrameError):
+        list(parse_frames(b"\x02" + data[1:]))
+
+    # case 4: unknown frame type
+    with pytest.raises(FrameError):
+        list(parse_frames(FRAME_HEADER.pack(1, 99, 1, 0)))
+
+    # case 5: payload too large
+    with pytest.raises(FrameError):
+        list(parse_frames(FRAME_HEADER.pack(1, 1, 1, MAX_FRAME_PAYLOAD_BYTES + 1)))
+
+
+async def iter_items(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.anyio
+async def test_buffered_pushes_back_on_producer():
+    produced = []
+
+    async def source():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    items = buffered(source(), max_size=2)
+    assert await anext(items) == 0
+    await asyncio.sleep(0.01)
+
+    # The producer waits while the buffer is full
+    assert len(produced) <= 4
+
+    assert [item async for item in items] == list(range(1, 10))
+
+
+@pytest.mark.anyio
+async def test_buffered_raises_source_errors():
+    async def source():
+        yield 1
+        raise RuntimeError("Receive failed")
+
+    with pytest.raises(RuntimeError):
+        [item async for item in buffered(source(), max_size=2)]
+
+
+@pytest.mark.anyio
+async def test_buffered_stops_producer_when_consumer_stops():
+    async def source():
+        for i in range(10):
+            yield i
+
+    tasks = len(asyncio.all_tasks())
+    items = buffered(source(), max_size=2)
+    assert await anext(items) == 0
+    await asyncio.sleep(0.01)
+
+    # The consumer stops while the producer waits for room in the full buffer
+    await asyncio.wait_for(items.aclose(), timeout=1)
+    assert len(asyncio.all_tasks()) == tasks
+
+
+@pytest.mark.anyio
+async def test_process_frames():
+    messages = [
+        encode_frame(FrameTypeEnum.AUDIO, 1, b"ab")
+        + encode_frame(FrameTypeEnum.AUDIO, 2, b"cd"),
+        '{"type": "type1"}',
+        "not json",
+        b"\x00",
+        '{"type": "unknown"}',
+        '{"type": "end"}',
+        encode_frame(FrameTypeEnum.AUDIO, 3, b"ignored"),
+    ]
+    responses = [
+        response async for response in process_frames(iter_frames(iter_items(messages)))
+    ]
+
+    assert responses == [
+        {"type": "ack", "sequence": 1},
+        {"type": "ack", "sequence": 2},
+        {"result": "type1"},
+        {"type": "error", "message": "Invalid JSON message"},
+        {"type": "error", "message": "Truncated frame header"},
+        {"type": "error", "message": "Unknown message type"},
+        {"type": "end", "frames": 2, "bytes": 4},
+    ]
+
+
+async def run_pipeline(frame_count: int, payload: bytes) -> list[dict]:
+    messages = [
+        encode_frame(FrameTypeEnum.AUDIO, i, payload) for i in range(frame_count)
+    ]
+    messages.append('{"type": "end"}')
+
+    return [
+        response
+        async for response in process_frames(
+            iter_frames(buffered(iter_items(messages), max_size=64))
+        )
+    ]
+
+
+@pytest.mark.anyio
+async def test_pipeline():
+    payload = bytes(640)  # 20ms of 16kHz 16-bit mono audio
+    responses = await run_pipeline(200, payload)
+
+    assert len(responses) == 201
+    assert responses[-1] == {"type": "end", "frames": 200, "bytes": 200 * len(payload)}
+
+
+@pytest.mark.benchmark
+@pytest.mark.anyio
+async def test_pipeline_throughput():
+    frame_count = 20_000
+
+    start = time.perf_counter()
+    await run_pipeline(frame_count, bytes(640))
+    elapsed = time.perf_counter() - start
+    print(f"Processed {frame_count / elapsed:,.0f} frames/sec per connection")